@@ -0,0 +1,231 @@
+"""
+Code Autocomplete
+Typo-tolerant prefix completion over ICF, KSI and KVÅ codes and titles.
+
+Keys (normalised codes, titles and title words) are kept in one sorted
+array, which acts as an implicit trie: the subtree for a prefix is a
+contiguous range found by bisection. Fuzzy matching walks that trie with
+a Levenshtein automaton (one DP row per trie edge) and prunes branches
+that already exceed the edit budget. A sparse table over key ranks pulls
+the best k completions out of any range without scanning it.
+"""
+
+import heapq
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+
+from .search_index import catalogue_records, normalize, tokenize
+
+
+MAX_EDITS = 2
+EXACT_PREFIX = 1
+_MAX_PULLS_PER_RESULT = 50
+
+# Key kinds, best first
+_KIND_CODE = 0
+_KIND_TITLE = 1
+_KIND_WORD = 2
+
+
+def default_edits(query: str) -> int:
+    """Edit budget that grows with query length (0 / 1 / 2)"""
+    if len(query) < 3:
+        return 0
+    if len(query) < 6:
+        return 1
+    return 2
+
+
+def _step(query: str, row: List[int], char: str) -> List[int]:
+    """Advance the Levenshtein automaton for query by one trie edge"""
+    next_row = [row[0] + 1]
+    left = row[0] + 1
+    for col, expected in enumerate(query, 1):
+        value = row[col - 1] + (expected != char)
+        if row[col] + 1 < value:
+            value = row[col] + 1
+        if left + 1 < value:
+            value = left + 1
+        next_row.append(value)
+        left = value
+    return next_row
+
+
+class AutocompleteIndex:
+    """Immutable sorted-key index; build once, query from any thread"""
+
+    def __init__(self, records: Iterable[Tuple[str, str, str, str, str]]):
+        self.systems: List[str] = []
+        self.codes: List[str] = []
+        self.titles: List[str] = []
+
+        entries: List[Tuple[str, Tuple[int, int, int], int]] = []
+        for doc, (system, code, title, _alt_title, _description) in enumerate(records):
+            self.systems.append(system)
+            self.codes.append(code)
+            self.titles.append(title)
+            entries.append((normalize(code), (_KIND_CODE, len(code), doc), doc))
+            folded = normalize(title)
+            if folded:
+                entries.append((folded, (_KIND_TITLE, len(title), doc), doc))
+            for word in set(tokenize(title)):
+                if len(word) >= 3:
+                    entries.append((word, (_KIND_WORD, len(title), doc), doc))
+
+        entries.sort(key=lambda entry: entry[0])
+        self.keys: List[str] = [key for key, _, _ in entries]
+        self.docs = array("i", [doc for _, _, doc in entries])
+
+        # Global rank per key: lower is better (codes, then short titles)
+        order = sorted(range(len(entries)), key=lambda i: entries[i][1])
+        self.ranks = array("i", [0]) * len(entries)
+        for rank, i in enumerate(order):
+            self.ranks[i] = rank
+
+        self._sparse = self._build_sparse_table()
+
+    def _build_sparse_table(self) -> List[array]:
+        """levels[j][i] = position of the best rank in keys[i : i + 2**j]"""
+        ranks = self.ranks
+        levels = [array("i", range(len(ranks)))]
+        span = 1
+        while 2 * span <= len(ranks):
+            prev = levels[-1]
+            levels.append(
+                array(
+                    "i",
+                    [
+                        a if ranks[a] < ranks[b] else b
+                        for a, b in zip(prev[: len(prev) - span], prev[span:])
+                    ],
+                )
+            )
+            span *= 2
+        return levels
+
+    def _best_in(self, lo: int, hi: int) -> int:
+        """Position of the best-ranked key in keys[lo:hi] (hi > lo)"""
+        level = (hi - lo).bit_length() - 1
+        table = self._sparse[level]
+        a, b = table[lo], table[hi - (1 << level)]
+        return a if self.ranks[a] < self.ranks[b] else b
+
+    def _prefix_range(self, prefix: str, lo: int = 0, hi: Optional[int] = None) -> Tuple[int, int]:
+        hi = len(self.keys) if hi is None else hi
+        start = bisect_left(self.keys, prefix, lo, hi)
+        end = bisect_left(self.keys, prefix + "\uffff", start, hi)
+        return start, end
+
+    def _children(self, lo: int, hi: int, depth: int) -> Iterator[Tuple[str, int, int]]:
+        """(edge char, lo, hi) of the implicit trie node keys[lo:hi] at depth"""
+        keys = self.keys
+        i = lo
+        while i < hi and len(keys[i]) <= depth:
+            i += 1  # keys ending at this node sort first
+        while i < hi:
+            prefix = keys[i][: depth + 1]
+            _, end = self._prefix_range(prefix, i, hi)
+            yield prefix[depth], i, end
+            i = end
+
+    def _fuzzy_ranges(self, query: str, max_edits: int) -> List[Tuple[int, int, int]]:
+        """(distance, lo, hi) for trie nodes whose path matches query within max_edits"""
+        found: List[Tuple[int, int, int]] = []
+        # The first character must match exactly; typos there are rare and
+        # relaxing it multiplies the trie walk by the alphabet size
+        lo, hi = self._prefix_range(query[:EXACT_PREFIX])
+        if hi <= lo:
+            return found
+        row = list(range(len(query) + 1))
+        for char in query[:EXACT_PREFIX]:
+            row = _step(query, row, char)
+        stack = [(lo, hi, EXACT_PREFIX, row)]
+        while stack:
+            lo, hi, depth, row = stack.pop()
+            for char, child_lo, child_hi in self._children(lo, hi, depth):
+                next_row = _step(query, row, char)
+                distance = next_row[-1]
+                best_reachable = min(next_row)
+                if distance <= max_edits:
+                    found.append((distance, child_lo, child_hi))
+                # Descend while a match is still possible and could get closer
+                if best_reachable <= max_edits and best_reachable < distance:
+                    stack.append((child_lo, child_hi, depth + 1, next_row))
+        return found
+
+    def complete(
+        self,
+        query: str,
+        systems: Optional[Iterable[str]] = None,
+        limit: int = 10,
+        max_edits: Optional[int] = None,
+    ) -> List[Tuple[int, int]]:
+        """Up to limit (doc id, edit distance) completions, best first"""
+        query = normalize(query.strip())
+        if not query or limit <= 0:
+            return []
+        if max_edits is None:
+            max_edits = default_edits(query)
+        max_edits = max(0, min(max_edits, MAX_EDITS, len(query) - EXACT_PREFIX))
+
+        allowed = set(systems) if systems is not None else None
+        results: List[Tuple[int, int]] = []
+        seen: Set[int] = set()
+
+        # Exact prefix matches first; the automaton only fills what is left
+        lo, hi = self._prefix_range(query)
+        if hi > lo:
+            self._collect([(0, lo, hi)], allowed, limit, results, seen)
+        if len(results) < limit and max_edits > 0:
+            fuzzy = [entry for entry in self._fuzzy_ranges(query, max_edits) if entry[0] > 0]
+            self._collect(fuzzy, allowed, limit, results, seen)
+        return results
+
+    def _collect(
+        self,
+        ranges: List[Tuple[int, int, int]],
+        allowed: Optional[Set[str]],
+        limit: int,
+        results: List[Tuple[int, int]],
+        seen: Set[int],
+    ) -> None:
+        """Append best-ranked unseen docs from (distance, lo, hi) ranges"""
+        heap = []
+        for distance, lo, hi in ranges:
+            best = self._best_in(lo, hi)
+            heap.append((distance, self.ranks[best], best, lo, hi))
+        heapq.heapify(heap)
+
+        budget = limit * _MAX_PULLS_PER_RESULT
+        while heap and len(results) < limit and budget > 0:
+            budget -= 1
+            distance, _, pos, lo, hi = heapq.heappop(heap)
+            # Split the range around the popped key and keep both halves
+            for sub_lo, sub_hi in ((lo, pos), (pos + 1, hi)):
+                if sub_hi > sub_lo:
+                    best = self._best_in(sub_lo, sub_hi)
+                    heapq.heappush(heap, (distance, self.ranks[best], best, sub_lo, sub_hi))
+
+            doc = self.docs[pos]
+            if doc in seen:
+                continue
+            seen.add(doc)
+            if allowed is not None and self.systems[doc] not in allowed:
+                continue
+            results.append((doc, distance))
+
+
+_index: Optional[AutocompleteIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_autocomplete_index() -> AutocompleteIndex:
+    """Process-wide autocomplete index, built on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = AutocompleteIndex(catalogue_records())
+    return _index
@@ -0,0 +1,12 @@
+"""
+Benchmarks
+Micro benchmarks for the mapping engine and a macro benchmark that drives
+the FastAPI app in-process over ASGI (no server, no network).
+
+Both report p50/p99 latency, throughput and peak RSS, can save the results
+as a JSON baseline and compare a run against one, flagging regressions
+beyond a threshold:
+
+    python -m backend.benchmarks engine --save baseline-engine.json
+    python -m backend.benchmarks api --compare baseline-api.json --threshold 0.2
+"""
@@ -0,0 +1,73 @@
+"""
+Command line for the benchmark suite (see backend/benchmarks/__init__.py)
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from .harness import compare, load_results, print_table, save_results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.benchmarks",
+        description="Benchmark the mapping engine (engine) or the FastAPI app in-process (api)",
+    )
+    parser.add_argument("suite", choices=["engine", "api"])
+    parser.add_argument("--scale", type=float, default=1.0, help="engine: iteration multiplier")
+    parser.add_argument("--requests", type=int, default=5000, help="api: measured requests")
+    parser.add_argument("--concurrency", type=int, default=16, help="api: concurrent clients")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="api: worker processes for heavy routes (sets SEMANTIC_BRIDGE_WORKERS)",
+    )
+    parser.add_argument("--save", type=Path, help="write results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="JSON baseline to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="relative change counted as a regression (p99 allows twice this)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.suite == "engine":
+        from .engine_bench import run as run_engine
+
+        results = run_engine(args.scale)
+        meta = {"scale": args.scale}
+    else:
+        if args.workers is not None:
+            os.environ["SEMANTIC_BRIDGE_WORKERS"] = str(args.workers)
+        # Admit every client unless a limit is configured, so heavy routes
+        # are measured rather than rejected with 503
+        os.environ.setdefault("SEMANTIC_BRIDGE_WORKER_QUEUE", str(args.concurrency))
+        from .api_bench import run as run_api
+
+        results, meta = run_api(args.requests, args.concurrency)
+        if meta["errors"]:
+            print(f"Error responses: {meta['errors']}", file=sys.stderr)
+
+    print_table(results)
+
+    if args.save:
+        save_results(args.save, args.suite, results, meta)
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        regressions = compare(load_results(args.compare), results, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+API benchmark
+In-process ASGI load driver: calls the FastAPI app directly (lifespan
+included) with a weighted mix of requests from concurrent clients, so
+routing, validation, middleware, caching and serialisation are measured
+without a server or network stack.
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Sequence, Tuple
+from urllib.parse import quote, urlencode
+
+from . import workload
+from .harness import BenchResult, summarize
+
+# (method, path, query params, JSON body)
+Request = Tuple[str, str, Dict[str, Any], Any]
+
+
+class ASGIClient:
+    """Minimal HTTP client speaking ASGI to an app in the same process"""
+
+    def __init__(self, app: Callable[..., Any], headers: Sequence[Tuple[bytes, bytes]] = ()):
+        self.app = app
+        self.headers = list(headers)
+
+    async def request(
+        self, method: str, path: str, params: Dict[str, Any] = None, body: Any = None
+    ) -> Tuple[int, bytes]:
+        payload = b"" if body is None else json.dumps(body).encode("utf-8")
+        headers = [(b"host", b"bench"), *self.headers]
+        if body is not None:
+            headers.append((b"content-type", b"application/json"))
+            headers.append((b"content-length", str(len(payload)).encode()))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": quote(path).encode("ascii"),
+            "query_string": urlencode(params or {}, doseq=True).encode("ascii"),
+            "root_path": "",
+            "headers": headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("bench", 80),
+        }
+        done = asyncio.Event()
+        request_sent = False
+        status = 0
+        chunks: List[bytes] = []
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": payload, "more_body": False}
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    done.set()
+
+        await self.app(scope, receive, send)
+        done.set()
+        return status, b"".join(chunks)
+
+
+@asynccontextmanager
+async def lifespan(app: Callable[..., Any]) -> AsyncIterator[None]:
+    """Run the app's startup and shutdown handlers around a block"""
+    inbox: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+    outbox: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+    await inbox.put({"type": "lifespan.startup"})
+    task = asyncio.ensure_future(
+        app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}, inbox.get, outbox.put)
+    )
+    message = await outbox.get()
+    if message["type"] != "lifespan.startup.complete":
+        raise RuntimeError(f"App startup failed: {message.get('message', message['type'])}")
+    try:
+        yield
+    finally:
+        await inbox.put({"type": "lifespan.shutdown"})
+        await outbox.get()
+        await task
+
+
+def request_mix(engine: Any, total: int, seed: int = workload.SEED) -> List[Tuple[str, Request]]:
+    """(benchmark name, request) pairs in the proportions of a school deployment"""
+    rng = random.Random(seed)
+    codes = workload.zipf_codes(engine.icf_database.codes, total, seed=seed)
+    ksi_targets = sorted(engine.ksi_to_icf_map)[:150]
+    notes = workload.notes(256, seed=seed)
+    searches = workload.search_queries(256, seed=seed)
+    completions = workload.autocomplete_queries(256, seed=seed)
+    interventions = workload.intervention_requests(engine.icf_database.codes, 256, seed=seed)
+
+    def batch(i: int) -> Dict[str, Any]:
+        return {"items": [{"code": code} for code in rng.sample(codes, 100)]}
+
+    mix: List[Tuple[int, str, Callable[[int], Request]]] = [
+        (25, "api.icf_to_ksi", lambda i: ("GET", f"/api/v1/mapping/icf-to-ksi/{codes[i]}", {}, None)),
+        (15, "api.icf_to_bbic", lambda i: ("GET", f"/api/v1/mapping/icf-to-bbic/{codes[i]}", {}, None)),
+        (5, "api.ksi_to_icf", lambda i: ("GET", f"/api/v1/mapping/ksi-to-icf/{rng.choice(ksi_targets)}", {}, None)),
+        (12, "api.icf_code", lambda i: ("GET", f"/api/v1/codes/icf/{codes[i]}", {}, None)),
+        (6, "api.icf_page", lambda i: ("GET", "/api/v1/codes/icf", {"limit": 100, "category": codes[i][0]}, None)),
+        (8, "api.search", lambda i: ("POST", "/api/v1/codes/search", {}, {"query": searches[i % 256]})),
+        (8, "api.autocomplete", lambda i: ("GET", "/api/v1/codes/autocomplete", {"q": completions[i % 256]}, None)),
+        (4, "api.batch_100", lambda i: ("POST", "/api/v1/mapping/batch", {}, batch(i))),
+        (10, "api.analyze_text", lambda i: ("POST", "/api/v1/ai/analyze-text", {}, {"text": notes[i % 256]})),
+        (7, "api.interventions", lambda i: ("POST", "/api/v1/interventions/suggest", {}, {"icf_codes": interventions[i % 256]})),
+    ]
+    names = [name for _, name, _ in mix]
+    builders = {name: build for _, name, build in mix}
+    picks = rng.choices(names, weights=[weight for weight, _, _ in mix], k=total)
+    return [(name, builders[name](i)) for i, name in enumerate(picks)]
+
+
+async def drive(
+    client: ASGIClient, requests: List[Tuple[str, Request]], concurrency: int
+) -> Tuple[Dict[str, List[int]], float, Dict[str, int]]:
+    """Send requests from concurrency clients; latencies (ns) per name, elapsed s, errors"""
+    latencies: Dict[str, List[int]] = {}
+    errors: Dict[str, int] = {}
+    pending = iter(requests)
+    clock = time.perf_counter_ns
+
+    async def client_loop() -> None:
+        for name, (method, path, params, body) in pending:
+            started = clock()
+            status, _ = await client.request(method, path, params, body)
+            latencies.setdefault(name, []).append(clock() - started)
+            if status >= 400:
+                errors[f"{name} {status}"] = errors.get(f"{name} {status}", 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - started, errors
+
+
+def run(total: int = 5000, concurrency: int = 16, warmup: int = 500) -> Tuple[List[BenchResult], Dict[str, Any]]:
+    """Run the API suite; returns results and run metadata (errors included)"""
+    from ..fastapi_app import api_key_valid, app, engine, warm_indexes
+
+    headers = []
+    if not api_key_valid(None):
+        headers.append((b"x-api-key", os.environ["SEMANTIC_BRIDGE_API_KEY"].encode()))
+    client = ASGIClient(app, headers)
+
+    async def main() -> Tuple[Dict[str, List[int]], float, Dict[str, int]]:
+        async with lifespan(app):
+            # Measure steady state: indexes and classifier built, caches primed
+            await asyncio.get_running_loop().run_in_executor(None, warm_indexes)
+            await drive(client, request_mix(engine, warmup, seed=workload.SEED + 1), concurrency)
+            return await drive(client, request_mix(engine, total), concurrency)
+
+    latencies, elapsed, errors = asyncio.run(main())
+
+    results = [
+        summarize("api.all", [ns for values in latencies.values() for ns in values], elapsed)
+    ]
+    results.extend(summarize(name, latencies[name], elapsed) for name in sorted(latencies))
+    meta = {"requests": total, "concurrency": concurrency, "errors": errors}
+    return results, meta
@@ -0,0 +1,101 @@
+"""
+Engine benchmarks
+SemanticMappingEngine methods (cold and cached), reference-data loading,
+search, autocomplete, text analysis and intervention suggestions.
+"""
+
+from typing import List
+
+from ..autocomplete import get_autocomplete_index
+from ..icf_store import ICFCodeStore
+from ..search_index import get_search_index
+from ..semantic_mapper import SemanticMappingEngine
+from ..snapshot import load_terminology
+from ..terminology import read_tsv_columns, terminology_path
+from ..text_analysis import analyze_text, analyze_texts
+from . import workload
+from .harness import BenchResult, measure
+
+
+def run(scale: float = 1.0) -> List[BenchResult]:
+    """Run the engine suite; scale multiplies iteration counts"""
+
+    def n(count: int) -> int:
+        return max(1, int(count * scale))
+
+    results: List[BenchResult] = []
+
+    # Reference data
+    results.append(measure("load.icf_tsv", lambda _: read_tsv_columns(terminology_path("icf")), range(n(10))))
+    results.append(
+        measure("load.icf_store", lambda _: ICFCodeStore.from_columns(load_terminology("icf")), range(n(10)))
+    )
+    results.append(measure("load.engine", lambda _: SemanticMappingEngine(eager=False), range(n(5))))
+
+    engine = SemanticMappingEngine(eager=False)
+    codes = workload.zipf_codes(engine.icf_database.codes, n(20000))
+    engine_type = type(engine)
+
+    # Mapping methods: uncached computation, then through the result cache
+    for method in ("icf_to_ksi", "icf_to_bbic", "icf_to_ibic", "icf_to_kva"):
+        compute = getattr(engine_type, method).__wrapped__
+        results.append(measure(f"map.{method}.cold", lambda code: compute(engine, code), codes[: n(5000)]))
+        bound = getattr(engine, method)
+        results.append(measure(f"map.{method}.cached", bound, codes, warmup=n(2000)))
+
+    ksi_targets = list(engine.ksi_to_icf_map)[:200]
+    results.append(measure("map.ksi_to_icf", engine.ksi_to_icf, ksi_targets * n(10)))
+    bbic_keys = engine.reverse_indexes["BBIC"].keys()
+    results.append(measure("map.bbic_to_icf", engine.bbic_to_icf, bbic_keys * n(50)))
+
+    batch = [("ICF", code) for code in codes[:250]]
+    targets = ["KSI", "BBIC", "IBIC", "KVÅ"]
+    results.append(
+        measure(
+            "map.batch_250",
+            lambda items: list(engine.map_batch(items, targets)),
+            [batch] * n(100),
+            items_per_call=len(batch),
+        )
+    )
+
+    # Search and autocomplete (index build, then queries)
+    results.append(measure("search.build_index", lambda _: get_search_index(), range(1)))
+    index = get_search_index()
+    results.append(measure("search.query", lambda q: index.search(q, limit=20), workload.search_queries(n(2000))))
+    results.append(measure("autocomplete.build_index", lambda _: get_autocomplete_index(), range(1)))
+    completer = get_autocomplete_index()
+    results.append(
+        measure("autocomplete.query", lambda q: completer.complete(q, limit=10), workload.autocomplete_queries(n(2000)))
+    )
+
+    # Text analysis: single notes, long journal entries and batches
+    short_notes = workload.notes(n(1000))
+    results.append(measure("analyze_text.note", lambda text: analyze_text(engine, text), short_notes, warmup=5))
+    long_notes = workload.notes(n(50), sentences=(40, 60))
+    results.append(measure("analyze_text.journal", lambda text: analyze_text(engine, text), long_notes))
+    chunks = [short_notes[i : i + 200] for i in range(0, len(short_notes), 200)]
+    results.append(
+        measure(
+            "analyze_texts.batch_200",
+            lambda texts: analyze_texts(engine, texts),
+            [chunk for chunk in chunks if len(chunk) == 200] or chunks,
+            items_per_call=200,
+        )
+    )
+
+    requests = workload.intervention_requests(engine.icf_database.codes, n(2000))
+    results.append(measure("suggest_interventions", engine.suggest_interventions, requests, warmup=10))
+    students = [
+        {f"elev-{i}": codes for i, codes in enumerate(requests[start : start + 500])}
+        for start in range(0, len(requests), 500)
+    ]
+    results.append(
+        measure(
+            "suggest_interventions.batch_500",
+            engine.suggest_interventions_batch,
+            [batch for batch in students if len(batch) == 500] or students,
+            items_per_call=500,
+        )
+    )
+    return results
@@ -0,0 +1,157 @@
+"""
+Benchmark harness
+Timing, percentiles, peak RSS, JSON baselines and regression checks.
+"""
+
+import json
+import platform
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+
+@dataclass
+class BenchResult:
+    name: str
+    iterations: int
+    p50_ms: float
+    p99_ms: float
+    mean_ms: float
+    ops_per_sec: float
+    items_per_sec: Optional[float] = None
+    peak_rss_mb: Optional[float] = None
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending sequence"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), round(fraction * len(sorted_values) + 0.5)))
+    return sorted_values[rank - 1]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(
+    name: str,
+    durations_ns: List[int],
+    elapsed_s: float,
+    items_per_call: int = 1,
+) -> BenchResult:
+    durations = sorted(d / 1e6 for d in durations_ns)
+    count = len(durations)
+    ops = count / elapsed_s if elapsed_s > 0 else 0.0
+    return BenchResult(
+        name=name,
+        iterations=count,
+        p50_ms=round(percentile(durations, 0.50), 4),
+        p99_ms=round(percentile(durations, 0.99), 4),
+        mean_ms=round(sum(durations) / count, 4) if count else 0.0,
+        ops_per_sec=round(ops, 1),
+        items_per_sec=round(ops * items_per_call, 1) if items_per_call != 1 else None,
+        peak_rss_mb=peak_rss_mb(),
+    )
+
+
+def measure(
+    name: str,
+    fn: Callable[[Any], Any],
+    inputs: Iterable[Any],
+    warmup: int = 0,
+    items_per_call: int = 1,
+) -> BenchResult:
+    """Call fn once per input, timing each call"""
+    inputs = list(inputs)
+    for value in inputs[:warmup]:
+        fn(value)
+    clock = time.perf_counter_ns
+    durations: List[int] = []
+    started = clock()
+    for value in inputs:
+        before = clock()
+        fn(value)
+        durations.append(clock() - before)
+    return summarize(name, durations, (clock() - started) / 1e9, items_per_call)
+
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def save_results(path: Path, suite: str, results: List[BenchResult], meta: Dict[str, Any]) -> None:
+    document = {
+        "suite": suite,
+        "environment": environment(),
+        "meta": meta,
+        "results": {result.name: asdict(result) for result in results},
+    }
+    path.write_text(json.dumps(document, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def load_results(path: Path) -> Dict[str, Dict[str, Any]]:
+    return json.loads(path.read_text(encoding="utf-8"))["results"]
+
+
+def compare(
+    baseline: Dict[str, Dict[str, Any]],
+    results: List[BenchResult],
+    threshold: float,
+) -> List[str]:
+    """
+    Regressions against a baseline: p50 or throughput worse by more than
+    threshold (relative), or p99 worse by more than twice that, since tail
+    latency is noisier.
+    """
+    regressions = []
+    for result in results:
+        before = baseline.get(result.name)
+        if not before:
+            continue
+        checks = (
+            ("p50_ms", result.p50_ms, before.get("p50_ms"), threshold, True),
+            ("p99_ms", result.p99_ms, before.get("p99_ms"), threshold * 2, True),
+            ("ops_per_sec", result.ops_per_sec, before.get("ops_per_sec"), threshold, False),
+        )
+        for metric, now, then, limit, higher_is_worse in checks:
+            if not then:
+                continue
+            change = (now - then) / then
+            if (change if higher_is_worse else -change) > limit:
+                regressions.append(
+                    f"{result.name}: {metric} {then:g} -> {now:g} ({change:+.1%})"
+                )
+    return regressions
+
+
+def print_table(results: List[BenchResult], out=sys.stdout) -> None:
+    header = f"{'benchmark':<38} {'iter':>7} {'p50 ms':>9} {'p99 ms':>9} {'ops/s':>11} {'items/s':>11} {'rss MB':>7}"
+    print(header, file=out)
+    print("-" * len(header), file=out)
+    for r in results:
+        items = f"{r.items_per_sec:.0f}" if r.items_per_sec is not None else "-"
+        rss = f"{r.peak_rss_mb:.0f}" if r.peak_rss_mb is not None else "-"
+        print(
+            f"{r.name:<38} {r.iterations:>7} {r.p50_ms:>9.4f} {r.p99_ms:>9.4f} "
+            f"{r.ops_per_sec:>11.1f} {items:>11} {rss:>7}",
+            file=out,
+        )
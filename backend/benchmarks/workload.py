@@ -0,0 +1,78 @@
+"""
+Benchmark workloads
+Seeded, realistic inputs: a few school-relevant ICF codes account for most
+lookups (Zipf-distributed over the catalogue), free-text notes in the
+register of elevhälsa journals, and intervention requests of 1-5 codes.
+"""
+
+import random
+from typing import List, Sequence, Tuple
+
+from ..icf_models import ICF_CURATED_CODES
+from ..ksi_models import KSI_TO_ICF_MAPPINGS
+
+SEED = 20241101
+
+NOTE_SENTENCES = (
+    "Eleven har svårt att koncentrera sig under lektionerna.",
+    "Hon läser långsamt och läsförståelsen är svag.",
+    "Han skriver korta texter men stavningen är osäker.",
+    "Eleven oroar sig inför prov och sover dåligt.",
+    "Det är högt ljud i klassrummet vilket stör arbetet.",
+    "Har få kamrater och är ofta ensam på rasten.",
+    "Konflikter med andra elever i korridoren.",
+    "Matematiken fungerar bra, men problemlösning är svårt.",
+    "Eleven har ont i magen på morgnarna och hög frånvaro.",
+    "Vårdnadshavare berättar om stökig hemsituation.",
+    "Behöver stöd med att planera och komma igång med uppgifter.",
+    "Talar tydligt men har svårt att följa muntliga instruktioner.",
+)
+
+
+def zipf_codes(codes: Sequence[str], count: int, exponent: float = 1.1, seed: int = SEED) -> List[str]:
+    """
+    count draws from codes where frequency falls off with rank. Curated
+    school codes take the top ranks, the rest of the catalogue the tail.
+    """
+    rng = random.Random(seed)
+    known = set(codes)
+    popular = [code for code in ICF_CURATED_CODES if code in known]
+    for icf_codes in KSI_TO_ICF_MAPPINGS.values():
+        popular.extend(code for code in icf_codes if code in known and code not in popular)
+    seen = set(popular)
+    tail = [code for code in codes if code not in seen]
+    rng.shuffle(tail)
+    ranked = popular + tail
+    weights = [1.0 / (rank ** exponent) for rank in range(1, len(ranked) + 1)]
+    return rng.choices(ranked, weights=weights, k=count)
+
+
+def notes(count: int, sentences: Tuple[int, int] = (1, 4), seed: int = SEED) -> List[str]:
+    """Journal-style notes of a few sentences each"""
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choices(NOTE_SENTENCES, k=rng.randint(*sentences)))
+        for _ in range(count)
+    ]
+
+
+def intervention_requests(codes: Sequence[str], count: int, seed: int = SEED) -> List[List[str]]:
+    rng = random.Random(seed)
+    pool = zipf_codes(codes, count * 5, seed=seed)
+    return [rng.sample(pool, rng.randint(1, 5)) for _ in range(count)]
+
+
+def search_queries(count: int, seed: int = SEED) -> List[str]:
+    rng = random.Random(seed)
+    queries = (
+        "koncentration", "läsa", "skriva", "uppmärksamhet", "sömn", "oro",
+        "kamrat relationer", "problemlösning", "räkna", "hörsel", "ljud",
+        "att kommunicera", "emotionella funktioner", "stöd i lärande",
+    )
+    return [rng.choice(queries) for _ in range(count)]
+
+
+def autocomplete_queries(count: int, seed: int = SEED) -> List[str]:
+    rng = random.Random(seed)
+    queries = ("d16", "b14", "kon", "läs", "skri", "uppmärk", "sömm", "d7", "SCA", "emot")
+    return [rng.choice(queries) for _ in range(count)]
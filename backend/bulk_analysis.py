@@ -0,0 +1,106 @@
+"""
+Bulk Text Analysis
+Reads an NDJSON upload of notes for /api/v1/ai/analyze-text/bulk
+incrementally and groups it into chunks for the worker pool.
+
+Each line is either a note, {"id": ..., "text": ...}, or a survey response
+with freetext_responses (see SurveyResponse), which expands to one note
+per answered question. Only one partial line and one chunk per worker are
+held in memory, however large the upload is. Lines that cannot be read
+become {"line": n, "error": ...} entries in the output instead of failing
+the stream.
+"""
+
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple
+
+from .serialization import loads
+
+# A single NDJSON line (note or survey response) may not exceed this
+MAX_LINE_BYTES = 1_000_000
+# Notes per worker task
+BULK_CHUNK_SIZE = 200
+
+Note = Dict[str, Any]
+
+
+async def ndjson_lines(
+    body: AsyncIterable[bytes], max_line_bytes: int = MAX_LINE_BYTES, keep_blank: bool = False
+) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    (line number, line) for each non-blank line of a streamed body (every
+    line with keep_blank). Over-long lines are yielded as None so the
+    caller can report them.
+    """
+    buffer = b""
+    line_no = 0
+    skipping = False
+    async for data in body:
+        buffer += data
+        # Scan by offset: slicing off each line would copy the rest of a
+        # large chunk once per line
+        start = 0
+        while True:
+            newline = buffer.find(b"\n", start)
+            if newline < 0:
+                break
+            line, start = buffer[start:newline], newline + 1
+            line_no += 1
+            if skipping:
+                skipping = False
+            elif keep_blank or line.strip():
+                yield line_no, line
+        buffer = buffer[start:]
+        if not skipping and len(buffer) > max_line_bytes:
+            # Report the line once and drop its bytes until the next newline
+            skipping = True
+            yield line_no + 1, None
+        if skipping:
+            buffer = b""
+    if buffer.strip() and not skipping:
+        yield line_no + 1, buffer
+
+
+def notes_from_record(line_no: int, record: Any) -> List[Note]:
+    """Notes carried by one parsed line"""
+    if not isinstance(record, dict):
+        return [{"line": line_no, "error": "Expected a JSON object"}]
+
+    if "freetext_responses" in record:
+        survey = {
+            key: record[key] for key in ("survey_id", "student_id") if key in record
+        }
+        notes = []
+        for index, answer in enumerate(record.get("freetext_responses") or []):
+            text = answer.get("response") if isinstance(answer, dict) else None
+            if not isinstance(text, str) or not text.strip():
+                continue
+            question_id = answer.get("question_id") or str(index)
+            note = dict(survey, question_id=question_id, text=text)
+            note["id"] = f"{record.get('survey_id', line_no)}/{question_id}"
+            notes.append(note)
+        return notes
+
+    text = record.get("text")
+    if not isinstance(text, str):
+        return [{"line": line_no, "error": "Missing text"}]
+    return [{"id": record.get("id", line_no), "text": text}]
+
+
+async def note_chunks(
+    body: AsyncIterable[bytes], chunk_size: int = BULK_CHUNK_SIZE
+) -> AsyncIterator[Tuple[List[Note]]]:
+    """Notes from an NDJSON body, as (chunk,) argument tuples for the pool"""
+    chunk: List[Note] = []
+    async for line_no, line in ndjson_lines(body):
+        if line is None:
+            chunk.append({"line": line_no, "error": "Line too long"})
+        else:
+            try:
+                chunk.extend(notes_from_record(line_no, loads(line)))
+            except ValueError:
+                chunk.append({"line": line_no, "error": "Invalid JSON"})
+        if len(chunk) >= chunk_size:
+            yield (chunk,)
+            chunk = []
+    if chunk:
+        yield (chunk,)
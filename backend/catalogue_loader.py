@@ -0,0 +1,147 @@
+"""
+Catalogue Loader
+Builds the engine's KSI and KVÅ mapping tables from the published
+catalogues (data/ksi.tsv and data/kva-medicinska-atgarder-kma.tsv).
+
+Columns are read whole (from the terminology snapshot when available) and
+the free-text "Relaterad ICF-kod" column is parsed once per distinct
+value: KSI repeats the same reference on every action under a target, so
+~1,500 linked rows reduce to about 150 parses.
+"""
+
+import re
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
+
+from .snapshot import load_terminology
+
+# One ICF reference or range: "d160", "d5708A", "d110 - d199", "e115-e145xx".
+# Trailing xx/yy are catalogue placeholders for "unspecified" and are dropped.
+_ICF_REF = re.compile(
+    r"\b([bdes]\d+[A-Z]?)(?:xx|yy)?(?:\s*-\s*([bdes]\d+[A-Z]?)(?:xx|yy)?)?"
+)
+
+
+class ICFRangeResolver:
+    """Expands ICF references and ranges to codes present in the catalogue"""
+
+    def __init__(self, icf_codes: Iterable[str]):
+        self._known = set(icf_codes)
+        buckets: Dict[Tuple[str, int], List[str]] = {}
+        for code in self._known:
+            if "-" not in code:
+                buckets.setdefault((code[0], len(code)), []).append(code)
+        self._buckets = {key: sorted(codes) for key, codes in buckets.items()}
+
+    def expand(self, start: str, end: str = "") -> List[str]:
+        """Catalogue codes for start, or for every same-level code in start..end"""
+        if not end or end == start:
+            return [start] if start in self._known else []
+        if start[0] != end[0] or len(start) != len(end):
+            return [code for code in (start, end) if code in self._known]
+        bucket = self._buckets.get((start[0], len(start)), [])
+        return bucket[bisect_left(bucket, start) : bisect_right(bucket, end)]
+
+    def parse(self, value: str) -> Tuple[List[str], int]:
+        """(ICF codes, unresolved reference count) for a free-text reference"""
+        codes: List[str] = []
+        unresolved = 0
+        for start, end in _ICF_REF.findall(value):
+            expanded = self.expand(start, end)
+            if not expanded:
+                unresolved += 1
+            for code in expanded:
+                if code not in codes:
+                    codes.append(code)
+        return codes, unresolved
+
+
+@dataclass
+class CatalogueLinks:
+    """ICF links and hierarchy parsed from one catalogue"""
+    to_icf: Dict[str, List[str]] = field(default_factory=dict)
+    parents: Dict[str, str] = field(default_factory=dict)
+    titles: Dict[str, str] = field(default_factory=dict)
+    stats: Dict[str, float] = field(default_factory=dict)
+
+
+def _link_column(
+    codes: Sequence[str],
+    parents: Sequence[str],
+    titles: Sequence[str],
+    related: Sequence[str],
+    resolver: ICFRangeResolver,
+    inherit: bool,
+) -> CatalogueLinks:
+    """
+    Parse a catalogue's code, parent, title and related-ICF columns.
+    With inherit, rows without a reference take their parent's ICF codes.
+    """
+    links = CatalogueLinks()
+    parsed: Dict[str, Tuple[List[str], int]] = {}
+    unresolved = 0
+
+    for code, parent, title, value in zip(codes, parents, titles, related):
+        links.titles[code] = title
+        if parent:
+            links.parents[code] = parent
+        if not value:
+            continue
+        if value not in parsed:
+            parsed[value] = resolver.parse(value)
+            unresolved += parsed[value][1]
+        icf_codes = parsed[value][0]
+        if icf_codes:
+            links.to_icf[code] = icf_codes
+
+    linked = len(links.to_icf)
+    if inherit:
+        # Catalogue order lists parents before children
+        for code in codes:
+            parent = links.parents.get(code)
+            if code not in links.to_icf and parent in links.to_icf:
+                links.to_icf[code] = links.to_icf[parent]
+
+    links.stats = {
+        "rows": len(codes),
+        "linked_rows": linked,
+        "inherited_rows": len(links.to_icf) - linked,
+        "distinct_references": len(parsed),
+        "unresolved_references": unresolved,
+        "icf_links": sum(len(icf_codes) for icf_codes in links.to_icf.values()),
+    }
+    return links
+
+
+def load_ksi_links(resolver: ICFRangeResolver) -> CatalogueLinks:
+    """KSI target and action codes with their related ICF codes"""
+    started = time.perf_counter()
+    columns: Mapping[str, Sequence[str]] = load_terminology("ksi")
+    links = _link_column(
+        columns["Kod"],
+        columns["Överordnad kod"],
+        columns["Titel"],
+        columns["Relaterad ICF-kod"],
+        resolver,
+        inherit=True,
+    )
+    links.stats["load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return links
+
+
+def load_kva_links(resolver: ICFRangeResolver) -> CatalogueLinks:
+    """KVÅ codes with their related ICF codes (only a small share is linked)"""
+    started = time.perf_counter()
+    columns: Mapping[str, Sequence[str]] = load_terminology("kva")
+    links = _link_column(
+        columns["Kod"],
+        columns["Överordnad kod"],
+        columns["Titel"],
+        columns["Relaterad ICF-kod"],
+        resolver,
+        inherit=False,
+    )
+    links.stats["load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return links
@@ -3,25 +3,138 @@ FastAPI wrapper around the semantic mapping engine.
 Exposes lightweight endpoints used by the React prototype.
 """
 
-from dataclasses import asdict
+import base64
+from bisect import bisect_right
+from contextlib import asynccontextmanager
+from datetime import datetime
 import os
-from typing import List, Optional
+import threading
+from typing import Any, Dict, List, Literal, Optional, Sequence
 
-from fastapi import Depends, FastAPI, Header, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
+from starlette.requests import ClientDisconnect
+from starlette.types import Receive, Scope, Send
 
-from .icf_models import ICFCode, ICF_DATABASE
-from .ksi_models import KSITarget, KSI_TARGET_NAMES
-from .semantic_mapper import MappingResult, SemanticMappingEngine
+from .autocomplete import MAX_EDITS, get_autocomplete_index
+from .bulk_analysis import note_chunks
+from .gap_analysis import DEFAULT_MIN_EXTENT, get_qualifier_extents
+from .http_cache import ResponseCache, ResponseCacheMiddleware, etag_matches, make_etag
+from .icf_models import ICFFunctionDescription
+from .icf_store import ICF_DATABASE, ICF_LOAD_MS
+from .intervention_models import (
+    PDCARecord,
+    SHANARRIDomain,
+    SpiderChartData,
+    SupportIntervention,
+    SurveyResponse,
+    WelfareProfile,
+)
+from .ksi_models import KSITarget
+from .metrics import (
+    METRICS_ENABLED,
+    MetricsMiddleware,
+    MetricsRegistry,
+    instrument_engine,
+    register_service_metrics,
+)
+from .profile_store import RecordConflict, close_profile_store, get_profile_store
+from .search_index import get_search_index
+from .semantic_mapper import MappingResult, SemanticMappingEngine, normalize_system
+from .serialization import dumps, join_array
+from .student_columns import to_datetime64
+from .survey_ingest import FreetextWorker, SurveyIngest, ingest_stream
+from .text_analysis import get_keyword_automaton
+from .text_classifier import get_classifier
+from .wellbeing_metrics import get_wellbeing_metrics
+from .wellbeing_series import DEFAULT_PERCENTILES, get_wellbeing_series
+from .workers import (
+    PoolSaturated,
+    WorkerPool,
+    analyze_notes_chunk,
+    analyze_text_task,
+    bind_engine,
+    map_batch_chunk,
+    suggest_interventions_batch_task,
+    suggest_interventions_task,
+)
+
+
+def warm_indexes() -> None:
+    get_search_index()
+    get_autocomplete_index()
+    get_keyword_automaton(engine)
+    get_classifier()
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Build the search indexes and keyword automaton off the request path so startup stays fast
+    threading.Thread(target=warm_indexes, name="search-index", daemon=True).start()
+    worker_pool.start()
+    # Free text queued before a restart (or by the ingest CLI) is picked up
+    freetext_worker.start()
+    yield
+    await freetext_worker.stop()
+    worker_pool.shutdown()
+    close_profile_store()
 
 
 app = FastAPI(
     title="Semantic Bridge API",
     version="1.0.0",
     description="Minimal FastAPI adapter for the semantic mapping engine",
+    lifespan=lifespan,
 )
 
+engine = SemanticMappingEngine()
+
+# Heavy requests (batch mapping, text analysis, suggestions) run here
+worker_pool = WorkerPool.from_env()
+bind_engine(engine)
+
+# Analyses queued survey free text in the background, chunk by chunk in the pool
+freetext_worker = FreetextWorker(worker_pool)
+
+# Encoded GET responses for reference data (codes and mappings)
+response_cache = ResponseCache(int(os.getenv("SEMANTIC_BRIDGE_RESPONSE_CACHE_SIZE", "2048")))
+# Cached bodies and their ETags belong to the reference data they were built from
+engine.add_reload_listener(response_cache.clear)
+
+MAX_BATCH_ITEMS = 20000
+# ICF codes across all students in one intervention batch
+MAX_BATCH_ICF_CODES = 100000
+# Batches with more unique codes than this are streamed as NDJSON
+BATCH_STREAM_THRESHOLD = 500
+# Unique codes per worker task
+BATCH_CHUNK_SIZE = 250
+
+
+def api_key_valid(x_api_key: Optional[str]) -> bool:
+    expected = os.getenv("SEMANTIC_BRIDGE_API_KEY")
+    return not expected or x_api_key == expected
+
+
+async def require_api_key(x_api_key: Optional[str] = Header(None)) -> None:
+    """
+    Optional API key guard. If SEMANTIC_BRIDGE_API_KEY is set, requests must include it.
+    """
+    if not api_key_valid(x_api_key):
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+
+app.add_middleware(
+    ResponseCacheMiddleware,
+    prefixes=["/api/v1/codes/", "/api/v1/mapping/"],
+    cache=response_cache,
+    max_age=int(os.getenv("SEMANTIC_BRIDGE_CACHE_MAX_AGE", "3600")),
+    public=not os.getenv("SEMANTIC_BRIDGE_API_KEY"),
+    authorize=api_key_valid,
+)
+# Added last so it wraps the cache and cached responses still get CORS headers
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -30,21 +143,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-engine = SemanticMappingEngine()
-
-
-def require_api_key(x_api_key: Optional[str] = Header(None)) -> None:
-    """
-    Optional API key guard. If SEMANTIC_BRIDGE_API_KEY is set, requests must include it.
-    """
-    expected = os.getenv("SEMANTIC_BRIDGE_API_KEY")
-    if expected and x_api_key != expected:
-        raise HTTPException(status_code=401, detail="Invalid API key")
+# Prometheus metrics at /metrics (SEMANTIC_BRIDGE_METRICS=1); when disabled
+# nothing below is registered and requests are not touched
+metrics: Optional[MetricsRegistry] = None
+if METRICS_ENABLED:
+    metrics = MetricsRegistry()
+    instrument_engine(engine, metrics)
+    register_service_metrics(metrics, engine, response_cache, worker_pool, ICF_LOAD_MS)
+    # Outermost, so responses served by the cache are timed as well
+    app.add_middleware(MetricsMiddleware, registry=metrics, routes=app.routes)
 
 
 class SearchRequest(BaseModel):
     query: str
     systems: List[str] = ["icf", "ksi", "bbic"]
+    limit: int = Field(20, ge=1, le=100)
+
+
+class BatchMappingItem(BaseModel):
+    source_system: str = "ICF"
+    code: str
+
+
+class BatchMappingRequest(BaseModel):
+    items: List[BatchMappingItem] = Field(..., max_length=MAX_BATCH_ITEMS)
+    target_systems: List[str] = ["KSI", "BBIC", "IBIC", "KVÅ"]
+    stream: bool = False
 
 
 class AnalyzeTextRequest(BaseModel):
@@ -53,20 +177,117 @@ class AnalyzeTextRequest(BaseModel):
     standards: List[str] = []
 
 
+class SuggestInterventionsRequest(BaseModel):
+    icf_codes: List[str] = Field(..., max_length=MAX_BATCH_ITEMS)
+    context: str = "school"
+
+
+SeriesKind = Literal["spider_charts", "surveys"]
+Bucket = Literal["none", "month", "term", "year"]
+
+
+class CohortTimelineRequest(BaseModel):
+    student_ids: Optional[List[str]] = Field(None, description="Cohort; all students when omitted")
+    kind: SeriesKind = "spider_charts"
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    bucket: Literal["month", "term", "year"] = "term"
+    percentiles: List[float] = Field(list(DEFAULT_PERCENTILES), max_length=9)
+
+
+class GapAnalysisRequest(BaseModel):
+    icf_codes: Optional[List[str]] = Field(
+        None, max_length=MAX_BATCH_ITEMS, description="ICF codes; all assessed codes when omitted"
+    )
+    classes: Optional[Dict[str, List[str]]] = Field(
+        None, max_length=MAX_BATCH_ITEMS, description="Student ids per class; whole school when omitted"
+    )
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    min_extent: int = Field(DEFAULT_MIN_EXTENT, ge=0, le=4)
+
+
+class SuggestInterventionsBatchRequest(BaseModel):
+    students: Dict[str, List[str]] = Field(..., max_length=MAX_BATCH_ITEMS)
+    context: str = "school"
+
+
+@app.exception_handler(PoolSaturated)
+async def pool_saturated_handler(_: Request, exc: PoolSaturated) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server busy, retry later"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(RecordConflict)
+async def record_conflict_handler(_: Request, exc: RecordConflict) -> JSONResponse:
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response encoded with orjson (stdlib fallback). Bytes are sent as-is.
+    Endpoints returning it skip response_model validation and jsonable_encoder.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for endpoints that keep reading the request body while
+    the response streams. The body reader owns receive() (and sees client
+    disconnects), so the default disconnect listener, which would swallow
+    body messages, is not started.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
 def serialize_result(result: MappingResult) -> dict:
     """
-    Convert MappingResult dataclass to JSON-friendly dict.
+    JSON-friendly dict for a MappingResult (cached on the result, read-only).
     """
-    return asdict(result)
+    return result.payload
+
+
+def mapping_response(result: MappingResult) -> Response:
+    """
+    Send a MappingResult's pre-serialised JSON without re-encoding it.
+    """
+    return FastJSONResponse(result.json_bytes)
 
 
 @app.get("/health", summary="Health check")
-def health() -> dict:
-    return {
+async def health() -> dict:
+    status = {
         "status": "ok",
         "timestamp": os.getenv("NOW", ""),
         "services": {"semantic_mapper": "ready"},
+        "catalogues": engine.catalogue_stats,
     }
+    status["response_cache"] = response_cache.stats()
+    status["worker_pool"] = worker_pool.stats()
+    if engine.matrix is not None:
+        status["mapping_matrix"] = engine.matrix.stats()
+    return status
+
+
+if metrics is not None:
+
+    @app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_api_key)])
+    async def prometheus_metrics() -> Response:
+        return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app.get(
@@ -74,9 +295,9 @@ def health() -> dict:
     dependencies=[Depends(require_api_key)],
     response_model=dict,
 )
-def map_icf_to_ksi(icf_code: str) -> dict:
+async def map_icf_to_ksi(icf_code: str) -> Response:
     result = engine.icf_to_ksi(icf_code)
-    return serialize_result(result)
+    return mapping_response(result)
 
 
 @app.get(
@@ -84,13 +305,11 @@ def map_icf_to_ksi(icf_code: str) -> dict:
     dependencies=[Depends(require_api_key)],
     response_model=dict,
 )
-def map_ksi_to_icf(ksi_target: str) -> dict:
-    try:
-        target_enum = KSITarget(ksi_target)
-    except ValueError:
+async def map_ksi_to_icf(ksi_target: str) -> Response:
+    if ksi_target not in engine.ksi_to_icf_map:
         raise HTTPException(status_code=400, detail="Unknown KSI target")
-    result = engine.ksi_to_icf(target_enum)
-    return serialize_result(result)
+    result = engine.ksi_to_icf(ksi_target)
+    return mapping_response(result)
 
 
 @app.get(
@@ -98,9 +317,20 @@ def map_ksi_to_icf(ksi_target: str) -> dict:
     dependencies=[Depends(require_api_key)],
     response_model=dict,
 )
-def map_icf_to_bbic(icf_code: str) -> dict:
+async def map_icf_to_bbic(icf_code: str) -> Response:
     result = engine.icf_to_bbic(icf_code)
-    return serialize_result(result)
+    return mapping_response(result)
+
+
+REVERSE_KEY_NAMES = {"BBIC": "BBIC dimension", "IBIC": "IBIC area", "KVÅ": "KVÅ code"}
+
+
+def reverse_mapping_response(source_system: str, result: MappingResult) -> Response:
+    if not result.target_codes:
+        raise HTTPException(
+            status_code=404, detail=f"{REVERSE_KEY_NAMES[source_system]} not found"
+        )
+    return FastJSONResponse({"source_system": source_system, **serialize_result(result)})
 
 
 @app.get(
@@ -108,28 +338,85 @@ def map_icf_to_bbic(icf_code: str) -> dict:
     dependencies=[Depends(require_api_key)],
     response_model=dict,
 )
-def map_bbic_to_icf(bbic_domain: str) -> dict:
-    matches = [
-        (code, meta)
-        for code, meta in engine.icf_to_bbic_map.items()
-        if meta[0].lower() == bbic_domain.lower()
+async def map_bbic_to_icf(bbic_domain: str) -> Response:
+    """BBIC dimension or subdimension (case-insensitive) to ICF codes"""
+    return reverse_mapping_response("BBIC", engine.bbic_to_icf(bbic_domain))
+
+
+@app.get(
+    "/api/v1/mapping/ibic-to-icf/{ibic_area}",
+    dependencies=[Depends(require_api_key)],
+    response_model=dict,
+)
+async def map_ibic_to_icf(ibic_area: str) -> Response:
+    """IBIC area or subarea (case-insensitive) to ICF codes"""
+    return reverse_mapping_response("IBIC", engine.ibic_to_icf(ibic_area))
+
+
+@app.get(
+    "/api/v1/mapping/kva-to-icf/{kva_code}",
+    dependencies=[Depends(require_api_key)],
+    response_model=dict,
+)
+async def map_kva_to_icf(kva_code: str) -> Response:
+    """KVÅ procedure code (case-insensitive) to ICF codes"""
+    return reverse_mapping_response("KVÅ", engine.kva_to_icf(kva_code))
+
+
+@app.post(
+    "/api/v1/mapping/batch",
+    dependencies=[Depends(require_api_key)],
+)
+async def map_batch(request: BatchMappingRequest):
+    """
+    Map many codes to several target systems in one request.
+    Repeated (source_system, code) pairs are resolved once. Work runs in
+    the worker pool in chunks; large batches, or stream=true, are returned
+    as NDJSON with one line per unique code as chunks complete.
+    """
+    pairs = list(
+        dict.fromkeys((normalize_system(item.source_system), item.code) for item in request.items)
+    )
+    targets = request.target_systems
+    chunks = [
+        (pairs[start : start + BATCH_CHUNK_SIZE], targets)
+        for start in range(0, len(pairs), BATCH_CHUNK_SIZE)
     ]
 
-    if not matches:
-        raise HTTPException(status_code=404, detail="BBIC dimension not found")
+    if request.stream or len(pairs) > BATCH_STREAM_THRESHOLD:
+        # The slot is held until the stream ends, however it ends
+        lease = worker_pool.acquire()
 
-    codes = [code for code, _ in matches]
-    descriptions = [meta[1] for _, meta in matches]
-    avg_confidence = sum(meta[2] for _, meta in matches) / len(matches)
+        async def lines():
+            try:
+                async for entries in worker_pool.run_ordered(map_batch_chunk, chunks):
+                    yield b"".join(entry + b"\n" for entry in entries)
+            finally:
+                lease.release()
 
-    return {
-        "source_code": bbic_domain,
-        "source_system": "BBIC",
-        "target_system": "ICF",
-        "target_codes": codes,
-        "target_descriptions": descriptions,
-        "confidence": avg_confidence,
-    }
+        return StreamingResponse(
+            lines(), media_type="application/x-ndjson", background=BackgroundTask(lease.release)
+        )
+
+    async with worker_pool.slot():
+        entries = [
+            entry
+            async for encoded in worker_pool.run_ordered(map_batch_chunk, chunks)
+            for entry in encoded
+        ]
+    return FastJSONResponse(join_array(entries))
+
+
+def encode_cursor(code: str) -> str:
+    return base64.urlsafe_b64encode(code.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 @app.get(
@@ -137,21 +424,54 @@ def map_bbic_to_icf(bbic_domain: str) -> dict:
     dependencies=[Depends(require_api_key)],
     response_model=dict,
 )
-def list_icf_codes(
-    category: Optional[str] = None, limit: int = 100, offset: int = 0
-) -> dict:
-    codes: List[ICFCode] = []
-    for code in ICF_DATABASE.values():
-        if category and not code.code.startswith(category):
-            continue
-        codes.append(code)
-
-    total = len(codes)
-    sliced = codes[offset : offset + limit]
-    return {
-        "codes": [code.model_dump() for code in sliced],
-        "total": total,
-    }
+async def list_icf_codes(
+    category: Optional[str] = None,
+    limit: int = Query(100, ge=1),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+) -> Response:
+    """
+    ICF codes in hierarchy (pre-)order, optionally limited to a category.
+    Pass next_cursor from the previous page as cursor to continue; offset
+    is kept for older clients. Responses carry an ETag tied to the
+    reference-data version, and If-None-Match yields 304 without a body.
+    """
+    etag = make_etag("codes/icf", category, limit, offset, cursor)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    # Positions in the pre-ordered code array; a category code is one span
+    if not category:
+        positions: Sequence[int] = range(len(ICF_DATABASE))
+    elif category in ICF_DATABASE:
+        positions = range(*ICF_DATABASE.subtree_span(category))
+    else:
+        positions = [
+            position
+            for position in range(len(ICF_DATABASE))
+            if ICF_DATABASE.codes[ICF_DATABASE.preorder_row(position)].startswith(category)
+        ]
+
+    start = offset
+    if cursor:
+        row = ICF_DATABASE.row_of(decode_cursor(cursor))
+        if row < 0:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        start = bisect_right(positions, ICF_DATABASE.preorder_position(row))
+
+    page = [ICF_DATABASE.preorder_row(position) for position in positions[start : start + limit]]
+    next_cursor = None
+    if page and start + limit < len(positions):
+        next_cursor = encode_cursor(ICF_DATABASE.codes[page[-1]])
+
+    codes = join_array(ICF_DATABASE.model_json(row) for row in page)
+    body = (
+        b'{"codes":' + codes
+        + b',"total":' + dumps(len(positions))
+        + b',"next_cursor":' + dumps(next_cursor) + b"}"
+    )
+    return FastJSONResponse(body, headers={"ETag": etag})
 
 
 @app.get(
@@ -159,11 +479,11 @@ def list_icf_codes(
     dependencies=[Depends(require_api_key)],
     response_model=dict,
 )
-def get_icf_code(code: str) -> dict:
-    icf_code = ICF_DATABASE.get(code)
-    if not icf_code:
+async def get_icf_code(code: str) -> Response:
+    row = ICF_DATABASE.row_of(code)
+    if row < 0:
         raise HTTPException(status_code=404, detail="ICF code not found")
-    return icf_code.model_dump()
+    return FastJSONResponse(ICF_DATABASE.model_json(row))
 
 
 @app.get(
@@ -171,8 +491,13 @@ def get_icf_code(code: str) -> dict:
     dependencies=[Depends(require_api_key)],
     response_model=List[dict],
 )
-def list_ksi_codes() -> List[dict]:
-    return [{"code": target.value, "description": KSI_TARGET_NAMES[target]} for target in KSITarget]
+async def list_ksi_codes() -> Response:
+    return FastJSONResponse(
+        [
+            {"code": target.value, "description": engine.ksi_titles.get(target.value, target.value)}
+            for target in KSITarget
+        ]
+    )
 
 
 @app.post(
@@ -180,70 +505,594 @@ def list_ksi_codes() -> List[dict]:
     dependencies=[Depends(require_api_key)],
     response_model=List[dict],
 )
-def search_codes(request: SearchRequest) -> List[dict]:
-    query = request.query.lower()
-    systems = set(request.systems)
-    results: List[dict] = []
-
-    if "icf" in systems:
-        for icf in ICF_DATABASE.values():
-            if query in icf.name_sv.lower() or query in icf.code.lower():
-                results.append(
-                    {"system": "icf", "code": icf.code, "description": icf.name_sv}
-                )
-    if "ksi" in systems:
-        for target, description in KSI_TARGET_NAMES.items():
-            if query in description.lower() or query in target.value.lower():
-                results.append(
-                    {
-                        "system": "ksi",
-                        "code": target.value,
-                        "description": description,
-                    }
-                )
-    return results
+def search_codes(request: SearchRequest) -> Response:
+    """
+    Ranked full-text search over the ICF, KSI and KVÅ catalogues.
+    """
+    index = get_search_index()
+    hits = index.search(request.query, systems=request.systems, limit=request.limit)
+    return FastJSONResponse([
+        {
+            "system": index.systems[doc],
+            "code": index.codes[doc],
+            "description": index.titles[doc],
+            "score": round(score, 4),
+        }
+        for doc, score in hits
+    ])
+
+
+@app.get(
+    "/api/v1/codes/autocomplete",
+    dependencies=[Depends(require_api_key)],
+    response_model=List[dict],
+)
+def autocomplete_codes(
+    q: str = Query(..., min_length=1, max_length=100),
+    systems: Optional[List[str]] = Query(None),
+    limit: int = Query(10, ge=1, le=50),
+    max_edits: Optional[int] = Query(None, ge=0, le=MAX_EDITS),
+) -> Response:
+    """
+    Prefix completion over codes and titles, tolerant to small typos.
+    max_edits defaults to 0/1/2 depending on query length.
+    """
+    index = get_autocomplete_index()
+    hits = index.complete(q, systems=systems, limit=limit, max_edits=max_edits)
+    return FastJSONResponse([
+        {
+            "system": index.systems[doc],
+            "code": index.codes[doc],
+            "description": index.titles[doc],
+            "distance": distance,
+        }
+        for doc, distance in hits
+    ])
 
 
 @app.post(
     "/api/v1/ai/analyze-text",
     dependencies=[Depends(require_api_key)],
 )
-def analyze_text(request: AnalyzeTextRequest) -> dict:
+async def analyze_text(request: AnalyzeTextRequest) -> Response:
     """
-    Lightweight, rule-based analyzer that maps key phrases to ICF codes.
-    Acts as a placeholder for a ML-powered service.
+    Suggest ICF codes for free text: TF-IDF classifier ranking with
+    calibrated confidences, plus keyword matches with their text spans.
     """
-    text = request.text.lower()
-    candidates = {
-        "koncentration": "d160",
-        "läs": "d140",
-        "skriv": "d145",
-        "social": "d710",
-        "oro": "b152",
-    }
-    matched_codes = [code for keyword, code in candidates.items() if keyword in text]
-    mapped = [serialize_result(engine.icf_to_bbic(code)) for code in matched_codes]
-
-    suggestions = []
-    for code in matched_codes:
-        icf_entry = ICF_DATABASE.get(code)
-        suggestions.append(
-            {
-                "code": code,
-                "description": icf_entry.name_sv if icf_entry else code,
-                "confidence": 0.65,
-                "category": "rule-based",
-                "reasoning": "Keyword match",
-            }
+    async with worker_pool.slot():
+        result = await worker_pool.run(analyze_text_task, request.text)
+    return FastJSONResponse(result)
+
+
+@app.post(
+    "/api/v1/ai/analyze-text/bulk",
+    dependencies=[Depends(require_api_key)],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/x-ndjson": {"schema": {"type": "string"}}},
+        }
+    },
+)
+async def analyze_text_bulk(request: Request) -> Response:
+    """
+    Analyze an NDJSON upload of notes ({"id", "text"} or survey responses
+    with freetext_responses). The body is read incrementally and analyzed in
+    chunks across the worker pool; one NDJSON line per note (id, ICF
+    suggestions, BBIC domains) is streamed back in upload order.
+    """
+    # The slot is held until the stream ends, however it ends
+    lease = worker_pool.acquire()
+
+    async def lines():
+        try:
+            async for encoded in worker_pool.run_ordered(
+                analyze_notes_chunk, note_chunks(request.stream())
+            ):
+                yield encoded
+        except ClientDisconnect:
+            pass
+        finally:
+            lease.release()
+
+    return DuplexStreamingResponse(
+        lines(), media_type="application/x-ndjson", background=BackgroundTask(lease.release)
+    )
+
+
+@app.post(
+    "/api/v1/interventions/suggest",
+    dependencies=[Depends(require_api_key)],
+)
+async def suggest_interventions(request: SuggestInterventionsRequest) -> Response:
+    """KSI intervention suggestions for a set of ICF codes"""
+    async with worker_pool.slot():
+        suggestions = await worker_pool.run(
+            suggest_interventions_task, request.icf_codes, request.context
         )
+    return FastJSONResponse(suggestions)
 
-    return {
-        "text": request.text,
-        "icf_suggestions": suggestions,
-        "bbic_domains": [item["target_descriptions"] for item in mapped],
-        "analysis_summary": "Rule-based analysis for demo purposes",
-        "confidence": 0.65 if matched_codes else 0.0,
-    }
+
+@app.post(
+    "/api/v1/interventions/suggest/batch",
+    dependencies=[Depends(require_api_key)],
+)
+async def suggest_interventions_batch(request: SuggestInterventionsBatchRequest) -> Response:
+    """
+    KSI intervention suggestions for many students ({student_id: [ICF codes]}).
+    Each distinct suggestion is listed once; students reference them by index.
+    """
+    if sum(len(codes) for codes in request.students.values()) > MAX_BATCH_ICF_CODES:
+        raise HTTPException(status_code=413, detail="Too many ICF codes in batch")
+    async with worker_pool.slot():
+        result = await worker_pool.run(
+            suggest_interventions_batch_task, request.students, request.context
+        )
+    return FastJSONResponse(result)
+
+
+# Welfare profiles: each sub-entity is read and written on its own, so a
+# change never loads or rewrites the whole profile
+
+
+def check_student(student_id: str, *entities: Any) -> None:
+    for entity in entities:
+        if entity.student_id != student_id:
+            raise HTTPException(status_code=400, detail="student_id does not match the path")
+
+
+def stored_or_404(body: Optional[bytes], what: str) -> Response:
+    if body is None:
+        raise HTTPException(status_code=404, detail=f"{what} not found")
+    return FastJSONResponse(body)
+
+
+def deleted_or_404(deleted: bool, what: str) -> Response:
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"{what} not found")
+    return Response(status_code=204)
+
+
+@app.get("/api/v1/profiles", dependencies=[Depends(require_api_key)], response_model=dict)
+def list_profiles(
+    review_before: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+) -> Response:
+    """
+    Profile-level fields (no sub-entities) in student_id order, optionally
+    only profiles with next_review_date before review_before.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    profiles, next_after = get_profile_store().list_profiles(review_before, limit, after)
+    next_cursor = encode_cursor(next_after) if next_after is not None else None
+    return FastJSONResponse(
+        b'{"profiles":' + join_array(profiles) + b',"next_cursor":' + dumps(next_cursor) + b"}"
+    )
+
+
+@app.put("/api/v1/profiles/{student_id}", dependencies=[Depends(require_api_key)], status_code=204)
+def put_profile(student_id: str, profile: WelfareProfile) -> Response:
+    """
+    Store a profile. Sub-entities in the body are upserted; stored ones not
+    in the body are kept (delete them through their own endpoints).
+    """
+    check_student(
+        student_id,
+        profile,
+        profile.current_wellbeing,
+        *profile.active_interventions,
+        *profile.icf_functions,
+        *profile.survey_history,
+        *profile.spider_chart_history,
+        *profile.pdca_records,
+    )
+    get_profile_store().put_profile(profile)
+    if profile.survey_history:
+        freetext_worker.notify()
+    return Response(status_code=204)
+
+
+@app.get("/api/v1/profiles/{student_id}", dependencies=[Depends(require_api_key)], response_model=dict)
+def get_profile(student_id: str) -> Response:
+    """Full profile assembled from the stored sub-entities"""
+    return stored_or_404(get_profile_store().get_profile(student_id), "Profile")
+
+
+@app.delete("/api/v1/profiles/{student_id}", dependencies=[Depends(require_api_key)], status_code=204)
+def delete_profile(student_id: str) -> Response:
+    """Delete a profile and everything stored for the student"""
+    return deleted_or_404(get_profile_store().delete_profile(student_id), "Profile")
+
+
+@app.get(
+    "/api/v1/profiles/{student_id}/interventions",
+    dependencies=[Depends(require_api_key)],
+    response_model=List[dict],
+)
+def list_student_interventions(
+    student_id: str,
+    active: Optional[bool] = None,
+    ksi_target: Optional[KSITarget] = None,
+    shanarri_domain: Optional[SHANARRIDomain] = None,
+) -> Response:
+    interventions, _ = get_profile_store().list_interventions(
+        student_id=student_id,
+        ksi_target=ksi_target.value if ksi_target else None,
+        shanarri_domain=shanarri_domain.value if shanarri_domain else None,
+        active=active,
+    )
+    return FastJSONResponse(join_array(interventions))
+
+
+@app.put(
+    "/api/v1/profiles/{student_id}/interventions/{intervention_id}",
+    dependencies=[Depends(require_api_key)],
+    status_code=204,
+)
+def put_intervention(student_id: str, intervention_id: str, intervention: SupportIntervention) -> Response:
+    check_student(student_id, intervention)
+    if intervention.id != intervention_id:
+        raise HTTPException(status_code=400, detail="id does not match the path")
+    get_profile_store().put_intervention(intervention)
+    return Response(status_code=204)
+
+
+@app.get(
+    "/api/v1/profiles/{student_id}/interventions/{intervention_id}",
+    dependencies=[Depends(require_api_key)],
+    response_model=dict,
+)
+def get_intervention(student_id: str, intervention_id: str) -> Response:
+    return stored_or_404(get_profile_store().get_intervention(student_id, intervention_id), "Intervention")
+
+
+@app.delete(
+    "/api/v1/profiles/{student_id}/interventions/{intervention_id}",
+    dependencies=[Depends(require_api_key)],
+    status_code=204,
+)
+def delete_intervention(student_id: str, intervention_id: str) -> Response:
+    return deleted_or_404(
+        get_profile_store().delete_intervention(student_id, intervention_id), "Intervention"
+    )
+
+
+@app.get(
+    "/api/v1/profiles/{student_id}/icf-functions",
+    dependencies=[Depends(require_api_key)],
+    response_model=List[dict],
+)
+def list_icf_functions(
+    student_id: str,
+    icf_code: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+) -> Response:
+    """ICF function descriptions by assessment date, optionally within [date_from, date_to)"""
+    return FastJSONResponse(
+        join_array(get_profile_store().list_icf_functions(student_id, icf_code, date_from, date_to))
+    )
+
+
+@app.put(
+    "/api/v1/profiles/{student_id}/icf-functions/{function_id}",
+    dependencies=[Depends(require_api_key)],
+    status_code=204,
+)
+def put_icf_function(student_id: str, function_id: str, function: ICFFunctionDescription) -> Response:
+    check_student(student_id, function)
+    if function.id != function_id:
+        raise HTTPException(status_code=400, detail="id does not match the path")
+    get_profile_store().put_icf_function(function)
+    return Response(status_code=204)
+
+
+@app.get(
+    "/api/v1/profiles/{student_id}/icf-functions/{function_id}",
+    dependencies=[Depends(require_api_key)],
+    response_model=dict,
+)
+def get_icf_function(student_id: str, function_id: str) -> Response:
+    return stored_or_404(
+        get_profile_store().get_icf_function(student_id, function_id), "ICF function description"
+    )
+
+
+@app.delete(
+    "/api/v1/profiles/{student_id}/icf-functions/{function_id}",
+    dependencies=[Depends(require_api_key)],
+    status_code=204,
+)
+def delete_icf_function(student_id: str, function_id: str) -> Response:
+    return deleted_or_404(
+        get_profile_store().delete_icf_function(student_id, function_id), "ICF function description"
+    )
+
+
+@app.get(
+    "/api/v1/profiles/{student_id}/surveys",
+    dependencies=[Depends(require_api_key)],
+    response_model=List[dict],
+)
+def list_surveys(
+    student_id: str, date_from: Optional[datetime] = None, date_to: Optional[datetime] = None
+) -> Response:
+    """Survey responses by survey date, optionally within [date_from, date_to)"""
+    return FastJSONResponse(join_array(get_profile_store().list_surveys(student_id, date_from, date_to)))
+
+
+@app.put(
+    "/api/v1/profiles/{student_id}/surveys/{survey_id}",
+    dependencies=[Depends(require_api_key)],
+    status_code=204,
+)
+def put_survey(student_id: str, survey_id: str, survey: SurveyResponse) -> Response:
+    check_student(student_id, survey)
+    if survey.survey_id != survey_id:
+        raise HTTPException(status_code=400, detail="survey_id does not match the path")
+    get_profile_store().put_survey(survey)
+    freetext_worker.notify()
+    return Response(status_code=204)
+
+
+@app.get(
+    "/api/v1/profiles/{student_id}/surveys/{survey_id}",
+    dependencies=[Depends(require_api_key)],
+    response_model=dict,
+)
+def get_survey(student_id: str, survey_id: str) -> Response:
+    return stored_or_404(get_profile_store().get_survey(student_id, survey_id), "Survey response")
+
+
+@app.delete(
+    "/api/v1/profiles/{student_id}/surveys/{survey_id}",
+    dependencies=[Depends(require_api_key)],
+    status_code=204,
+)
+def delete_survey(student_id: str, survey_id: str) -> Response:
+    return deleted_or_404(get_profile_store().delete_survey(student_id, survey_id), "Survey response")
+
+
+@app.post(
+    "/api/v1/surveys/ingest",
+    dependencies=[Depends(require_api_key)],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def ingest_surveys(
+    request: Request, input_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format")
+) -> Response:
+    """
+    Bulk ingest of a survey export: NDJSON (one SurveyResponse per line) or
+    CSV (survey_id, student_id, survey_date, survey_period, one column per
+    domain, q:<question_id> and freetext:<question_id> columns). The body is
+    read incrementally and stored in batches; the NDJSON response streams
+    {"line", "error"} per rejected row, {"progress"} after each batch and a
+    final {"summary"}. Free-text answers are queued for ICF analysis.
+    """
+    ingest = SurveyIngest(get_profile_store(), on_queued=freetext_worker.notify)
+
+    async def lines():
+        try:
+            async for errors, progress in ingest_stream(request.stream(), input_format, ingest):
+                for error in errors:
+                    yield dumps(error) + b"\n"
+                yield dumps({"progress": progress}) + b"\n"
+        except ClientDisconnect:
+            return
+        yield dumps({"summary": ingest.progress()}) + b"\n"
+
+    return DuplexStreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get(
+    "/api/v1/profiles/{student_id}/spider-charts",
+    dependencies=[Depends(require_api_key)],
+    response_model=List[dict],
+)
+def list_spider_charts(
+    student_id: str, date_from: Optional[datetime] = None, date_to: Optional[datetime] = None
+) -> Response:
+    """Spider-chart snapshots by timestamp, optionally within [date_from, date_to)"""
+    return FastJSONResponse(
+        join_array(get_profile_store().list_spider_charts(student_id, date_from, date_to))
+    )
+
+
+@app.post(
+    "/api/v1/profiles/{student_id}/spider-charts",
+    dependencies=[Depends(require_api_key)],
+    status_code=204,
+)
+def add_spider_chart(student_id: str, chart: SpiderChartData) -> Response:
+    """Add a snapshot; one with the same timestamp and source is replaced"""
+    check_student(student_id, chart)
+    get_profile_store().put_spider_chart(chart)
+    return Response(status_code=204)
+
+
+@app.get(
+    "/api/v1/profiles/{student_id}/pdca",
+    dependencies=[Depends(require_api_key)],
+    response_model=List[dict],
+)
+def list_pdca_records(
+    student_id: str,
+    intervention_id: Optional[str] = None,
+    shanarri_domain: Optional[SHANARRIDomain] = None,
+) -> Response:
+    records = get_profile_store().list_pdca_records(
+        student_id, intervention_id, shanarri_domain.value if shanarri_domain else None
+    )
+    return FastJSONResponse(join_array(records))
+
+
+@app.put(
+    "/api/v1/profiles/{student_id}/pdca/{record_id}",
+    dependencies=[Depends(require_api_key)],
+    status_code=204,
+)
+def put_pdca_record(student_id: str, record_id: str, record: PDCARecord) -> Response:
+    check_student(student_id, record)
+    if record.id != record_id:
+        raise HTTPException(status_code=400, detail="id does not match the path")
+    get_profile_store().put_pdca_record(record)
+    return Response(status_code=204)
+
+
+@app.get(
+    "/api/v1/profiles/{student_id}/pdca/{record_id}",
+    dependencies=[Depends(require_api_key)],
+    response_model=dict,
+)
+def get_pdca_record(student_id: str, record_id: str) -> Response:
+    return stored_or_404(get_profile_store().get_pdca_record(student_id, record_id), "PDCA record")
+
+
+@app.delete(
+    "/api/v1/profiles/{student_id}/pdca/{record_id}",
+    dependencies=[Depends(require_api_key)],
+    status_code=204,
+)
+def delete_pdca_record(student_id: str, record_id: str) -> Response:
+    return deleted_or_404(get_profile_store().delete_pdca_record(student_id, record_id), "PDCA record")
+
+
+@app.get(
+    "/api/v1/profiles/{student_id}/timeline",
+    dependencies=[Depends(require_api_key)],
+    response_model=dict,
+)
+def student_timeline(
+    student_id: str,
+    kind: SeriesKind = "spider_charts",
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    bucket: Bucket = "none",
+) -> Response:
+    """
+    SHANARRI domain scores over time from spider charts or survey responses,
+    as one column per domain. bucket=month|term|year averages per period.
+    """
+    timeline = get_wellbeing_series(kind).student_timeline(
+        student_id, to_datetime64(date_from), to_datetime64(date_to), bucket
+    )
+    if timeline is None:
+        raise HTTPException(status_code=404, detail="No scores stored for student")
+    return FastJSONResponse(timeline)
+
+
+@app.get(
+    "/api/v1/profiles/{student_id}/wellbeing",
+    dependencies=[Depends(require_api_key)],
+    response_model=dict,
+)
+def student_wellbeing(student_id: str, kind: SeriesKind = "spider_charts") -> Response:
+    """
+    Derived SHANARRI metrics, kept up to date on every write: latest and
+    previous score, change_delta, rolling average and risk/protective flag
+    per domain
+    """
+    metrics = get_wellbeing_metrics(kind).student(student_id)
+    if metrics is None:
+        raise HTTPException(status_code=404, detail="No scores stored for student")
+    return FastJSONResponse(metrics)
+
+
+@app.get("/api/v1/wellbeing/cohort", dependencies=[Depends(require_api_key)], response_model=dict)
+def cohort_wellbeing(kind: SeriesKind = "spider_charts") -> Response:
+    """
+    Whole-school aggregates of the students' latest scores per domain:
+    students scored, mean, mean change_delta and risk/protective counts
+    """
+    return FastJSONResponse(get_wellbeing_metrics(kind).cohort())
+
+
+@app.post("/api/v1/timeline/cohort", dependencies=[Depends(require_api_key)], response_model=dict)
+def cohort_timeline(request: CohortTimelineRequest) -> Response:
+    """
+    Per-period SHANARRI aggregates for a cohort: students with scores, mean,
+    percentiles and change_delta (mean change since each student's previous
+    period) per domain.
+    """
+    if any(not 0 <= value <= 100 for value in request.percentiles):
+        raise HTTPException(status_code=400, detail="Percentiles must be within 0-100")
+    return FastJSONResponse(
+        get_wellbeing_series(request.kind).cohort(
+            request.student_ids,
+            to_datetime64(request.date_from),
+            to_datetime64(request.date_to),
+            request.bucket,
+            request.percentiles,
+        )
+    )
+
+
+@app.post("/api/v1/gap-analysis/cohort", dependencies=[Depends(require_api_key)], response_model=dict)
+def cohort_gap_analysis(request: GapAnalysisRequest) -> Response:
+    """
+    Distribution of ICF qualifier extents (0-4) per ICF code, class and term
+    from stored ICF function descriptions, each student counted once per
+    code and term with their latest assessment. Per group and term: students,
+    histogram, unspecified (8/9), mean extent, gap_share (share with extent
+    >= min_extent) and their change since the previous term with data.
+    """
+    return FastJSONResponse(
+        get_qualifier_extents().analyze(
+            request.icf_codes,
+            request.classes,
+            to_datetime64(request.date_from),
+            to_datetime64(request.date_to),
+            request.min_extent,
+        )
+    )
+
+
+@app.get("/api/v1/interventions", dependencies=[Depends(require_api_key)], response_model=dict)
+def list_interventions(
+    ksi_target: Optional[KSITarget] = None,
+    shanarri_domain: Optional[SHANARRIDomain] = None,
+    icf_code: Optional[str] = None,
+    active: Optional[bool] = None,
+    start_from: Optional[datetime] = None,
+    start_to: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+) -> Response:
+    """
+    Stored interventions across students, ordered by start date, filtered
+    by KSI target, SHANARRI domain, ICF code, active state and start date
+    in [start_from, start_to). Pass next_cursor as cursor for the next page.
+    """
+    after = None
+    if cursor:
+        start_date, separator, intervention_id = decode_cursor(cursor).partition("\n")
+        if not separator:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        after = (start_date, intervention_id)
+    interventions, next_after = get_profile_store().list_interventions(
+        ksi_target=ksi_target.value if ksi_target else None,
+        shanarri_domain=shanarri_domain.value if shanarri_domain else None,
+        icf_code=icf_code,
+        active=active,
+        start_from=start_from,
+        start_to=start_to,
+        limit=limit,
+        after=after,
+    )
+    next_cursor = encode_cursor("\n".join(next_after)) if next_after else None
+    return FastJSONResponse(
+        b'{"interventions":' + join_array(interventions)
+        + b',"next_cursor":' + dumps(next_cursor) + b"}"
+    )
 
 
 if __name__ == "__main__":
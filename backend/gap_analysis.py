@@ -0,0 +1,203 @@
+"""
+ICF Gap Analysis
+Columnar, in-memory view of ICF qualifier extents from the stored
+ICFFunctionDescription records: one row per assessment with student, ICF
+code, extent (0-4, -1 for not specified/not applicable) and date. Serves
+school-wide gap analysis: the distribution of extents per ICF code, class
+and term, with trends between terms, computed with grouped numpy counts.
+
+Like every StudentColumnsView it loads once and then reloads only the
+students written since the previous query.
+"""
+
+import threading
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .profile_store import ProfileStore, get_profile_store
+from .student_columns import StudentColumnsView, store_times
+from .wellbeing_series import bucket_keys, bucket_label
+
+# Extents 0-4 are counted; 8 (not specified) and 9 (not applicable) are not
+EXTENTS = 5
+
+DEFAULT_MIN_EXTENT = 2
+
+_EXTENT_VALUES = {str(value): value for value in range(EXTENTS)}
+
+
+def json_matrix(matrix: np.ndarray, digits: int = 3) -> list:
+    """Nested lists of rounded floats with NaN as None"""
+    values = np.round(matrix, digits).astype(object)
+    values[np.isnan(matrix)] = None
+    return values.tolist()
+
+
+class QualifierColumns(NamedTuple):
+    """Rows sorted by (student, time); offsets[i]:offsets[i + 1] are student i's"""
+    student: np.ndarray
+    time: np.ndarray
+    code: np.ndarray
+    extent: np.ndarray
+    offsets: np.ndarray
+
+
+class QualifierExtents(StudentColumnsView):
+    """Qualifier extents from the icf_functions table of a ProfileStore"""
+
+    table = "icf_functions"
+    Columns = QualifierColumns
+
+    def __init__(self, store: ProfileStore):
+        self.codes: List[str] = []
+        self.code_index: Dict[str, int] = {}
+        super().__init__(store)
+
+    def _fetch(self, student_ids: Optional[List[str]]) -> List[tuple]:
+        return self.store.qualifier_extents(student_ids)
+
+    def _code_positions(self, codes: Sequence[str]) -> np.ndarray:
+        index = self.code_index
+        positions = np.empty(len(codes), dtype=np.int32)
+        for i, code in enumerate(codes):
+            position = index.get(code)
+            if position is None:
+                position = index[code] = len(self.codes)
+                self.codes.append(code)
+            positions[i] = position
+        return positions
+
+    def _convert(self, rows: List[tuple]) -> Dict[str, np.ndarray]:
+        return {
+            "student": self.student_positions([row[0] for row in rows]),
+            "time": store_times([row[3] for row in rows]),
+            "code": self._code_positions([row[1] for row in rows]),
+            "extent": np.array([_EXTENT_VALUES.get(row[2], -1) for row in rows], dtype=np.int8),
+        }
+
+    def _class_rows(
+        self, columns: QualifierColumns, classes: Optional[Mapping[str, Sequence[str]]]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Row indexes and their class index; a student in several classes has
+        their rows once per class. Without classes every row is in class 0.
+        """
+        if classes is None:
+            return np.arange(len(columns.student)), np.zeros(len(columns.student), dtype=np.int64)
+        members = [self.known_positions(ids) for ids in classes.values()]
+        students = np.concatenate([np.zeros(0, dtype=np.int32), *members])
+        class_of = np.repeat(np.arange(len(members)), [len(ids) for ids in members])
+        starts = columns.offsets[students]
+        lengths = columns.offsets[students + 1] - starts
+        # Each member's row range, concatenated: start + 0, 1, ... per range
+        shift = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        rows = np.arange(len(shift)) + shift
+        return rows, np.repeat(class_of, lengths)
+
+    def analyze(
+        self,
+        icf_codes: Optional[Sequence[str]] = None,
+        classes: Optional[Mapping[str, Sequence[str]]] = None,
+        date_from: Optional[np.datetime64] = None,
+        date_to: Optional[np.datetime64] = None,
+        min_extent: int = DEFAULT_MIN_EXTENT,
+    ) -> dict:
+        """
+        Extent distribution per (ICF code, class) and term. Each student
+        counts once per code and term, with their latest assessment. Per
+        group and term: students assessed, histogram of extents 0-4,
+        unspecified (8/9 or none), mean extent, gap_share (share of
+        students with extent >= min_extent) and the change of both since
+        the group's previous term with assessments. Classes map a class
+        name to its student ids; without them the whole school is one group.
+        Groups without assessments are left out.
+        """
+        columns = self.refresh()
+        rows, row_class = self._class_rows(columns, classes)
+
+        # Output position per code index, -1 for codes not asked for
+        if icf_codes is None:
+            codes = list(self.codes)
+            code_slot = np.arange(len(codes), dtype=np.int64)
+        else:
+            codes = list(dict.fromkeys(icf_codes))
+            code_slot = np.full(len(self.codes), -1, dtype=np.int64)
+            for i, code in enumerate(codes):
+                if code in self.code_index:
+                    code_slot[self.code_index[code]] = i
+
+        slots = code_slot[columns.code[rows]]
+        keep = slots >= 0
+        if date_from is not None:
+            keep &= columns.time[rows] >= date_from
+        if date_to is not None:
+            keep &= columns.time[rows] < date_to
+        rows, row_class, slots = rows[keep], row_class[keep], slots[keep]
+        terms = bucket_keys(columns.time[rows], "term")
+        students = columns.student[rows].astype(np.int64)
+
+        # Latest assessment per (class, code, student, term): a student's rows
+        # are in time order, so after a stable sort it ends each run
+        term_labels, term_slot = np.unique(terms, return_inverse=True)
+        cells, cell_slot = np.unique(row_class * len(codes) + slots, return_inverse=True)
+        key = (cell_slot * (len(self.student_ids) or 1) + students) * len(term_labels) + term_slot
+        order = np.argsort(key, kind="stable")
+        key = key[order]
+        last = order[np.concatenate((key[1:] != key[:-1], [True]))] if len(key) else order
+        cell_slot, term_slot = cell_slot[last], term_slot[last]
+        extents = columns.extent[rows[last]].astype(np.int64)
+
+        counts = np.bincount(
+            (cell_slot * len(term_labels) + term_slot) * (EXTENTS + 1) + extents + 1,
+            minlength=len(cells) * len(term_labels) * (EXTENTS + 1),
+        ).reshape(len(cells), len(term_labels), EXTENTS + 1)
+        histogram, unspecified = counts[..., 1:], counts[..., 0]
+        specified = histogram.sum(axis=2)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = (histogram * np.arange(EXTENTS)).sum(axis=2) / specified
+            gap_share = histogram[..., min_extent:].sum(axis=2) / specified
+
+        # Previous term with specified extents, per group
+        seen = np.where(specified > 0, np.arange(len(term_labels)), -1)
+        previous = np.maximum.accumulate(seen, axis=1)
+        previous = np.concatenate((np.full((len(cells), 1), -1), previous[:, :-1]), axis=1)
+        has_previous = (specified > 0) & (previous >= 0)
+        before = np.maximum(previous, 0)
+        mean_delta = np.where(has_previous, mean - np.take_along_axis(mean, before, axis=1), np.nan)
+        gap_delta = np.where(
+            has_previous, gap_share - np.take_along_axis(gap_share, before, axis=1), np.nan
+        )
+
+        class_names = list(classes) if classes is not None else [None]
+        group_class, group_code = np.divmod(cells, len(codes) or 1)
+        return {
+            "terms": [bucket_label(term, "term") for term in term_labels],
+            "min_extent": min_extent,
+            # One entry per group in each list, each a list over terms
+            "groups": {
+                "icf_code": [codes[code] for code in group_code.tolist()],
+                "class": [class_names[index] for index in group_class.tolist()],
+                "students": (specified + unspecified).tolist(),
+                "histogram": histogram.tolist(),
+                "unspecified": unspecified.tolist(),
+                "mean_extent": json_matrix(mean),
+                "gap_share": json_matrix(gap_share),
+                "mean_extent_delta": json_matrix(mean_delta),
+                "gap_share_delta": json_matrix(gap_delta),
+            },
+        }
+
+
+_extents: Optional[QualifierExtents] = None
+_extents_lock = threading.Lock()
+
+
+def get_qualifier_extents() -> QualifierExtents:
+    """View over the process-wide profile store, created on first use"""
+    global _extents
+    store = get_profile_store()
+    with _extents_lock:
+        if _extents is None or _extents.store is not store:
+            _extents = QualifierExtents(store)
+        return _extents
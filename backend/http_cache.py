@@ -0,0 +1,191 @@
+"""
+HTTP Caching Helpers
+ETags derived from the reference-data version plus request parameters,
+If-None-Match evaluation for conditional GETs, and a response-caching
+middleware for endpoints that only change with the terminology files.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .snapshot import terminology_version
+
+
+def make_etag(*parts: object) -> str:
+    """Strong ETag for a response determined by the data version and parts"""
+    key = "\0".join([terminology_version()] + [str(part) for part in parts])
+    return '"' + hashlib.sha1(key.encode("utf-8")).hexdigest()[:24] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header value matches etag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    LRU of encoded response bodies keyed by (path, query string).
+    Only touched from the event loop, so no locking is needed; clear() (on
+    an engine reload) is a single dict operation and safe from any thread.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[str, bytes], CachedResponse]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key: Tuple[str, bytes]) -> Optional["CachedResponse"]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Tuple[str, bytes], entry: "CachedResponse") -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
+
+
+class CachedResponse(NamedTuple):
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    etag: str
+
+
+class ResponseCacheMiddleware:
+    """
+    ASGI middleware for GET endpoints that only change with the reference
+    data. Adds an ETag (data version + path + query) and Cache-Control
+    (private when responses need an API key), answers If-None-Match with
+    304 and serves repeat requests from the ResponseCache without running
+    the endpoint. The ETag is known before the endpoint runs, so a current
+    If-None-Match is answered with 304 even when the entry is not cached
+    (evicted, or cleared by an engine reload).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        prefixes: Sequence[str],
+        cache: ResponseCache,
+        max_age: int = 3600,
+        public: bool = True,
+        authorize: Callable[[Optional[str]], bool] = lambda api_key: True,
+    ):
+        self.app = app
+        self.prefixes = tuple(prefixes)
+        self.cache = cache
+        scope = "public" if public else "private"
+        self.cache_control = f"{scope}, max-age={max_age}".encode("latin-1")
+        self.authorize = authorize
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or not scope["path"].startswith(self.prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope["headers"])
+        api_key = request_headers.get(b"x-api-key")
+        if not self.authorize(api_key.decode("latin-1") if api_key is not None else None):
+            # Let the endpoint reject the request as usual
+            await self.app(scope, receive, send)
+            return
+
+        key = (scope["path"], scope["query_string"])
+        if_none_match = request_headers.get(b"if-none-match", b"").decode("latin-1")
+
+        entry = self.cache.get(key)
+        if entry is not None:
+            if etag_matches(if_none_match, entry.etag):
+                self.cache.not_modified += 1
+                await self._send(send, 304, self._validators(entry.etag), b"")
+            else:
+                await self._send(send, 200, entry.headers, entry.body)
+            return
+
+        etag = make_etag(*key)
+        # "*" needs an existing representation, which only the endpoint knows
+        if if_none_match.strip() != "*" and etag_matches(if_none_match, etag):
+            self.cache.not_modified += 1
+            await self._send(send, 304, self._validators(etag), b"")
+            return
+
+        captured: Dict[str, object] = {}
+        chunks: List[bytes] = []
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = [
+                    (name, value)
+                    for name, value in message.get("headers", [])
+                    if name.lower() != b"cache-control"
+                ]
+                response_etag = next(
+                    (value.decode("latin-1") for name, value in headers if name.lower() == b"etag"),
+                    None,
+                )
+                if response_etag is None and message["status"] in (200, 304):
+                    response_etag = etag
+                    headers.append((b"etag", etag.encode("latin-1")))
+                if message["status"] in (200, 304):
+                    headers.append((b"cache-control", self.cache_control))
+                captured.update(status=message["status"], headers=headers, etag=response_etag)
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body" and captured.get("status") == 200:
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    self.cache.put(
+                        key,
+                        CachedResponse(captured["headers"], b"".join(chunks), captured["etag"]),
+                    )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _validators(self, etag: str) -> List[Tuple[bytes, bytes]]:
+        return [(b"etag", etag.encode("latin-1")), (b"cache-control", self.cache_control)]
+
+    @staticmethod
+    async def _send(send: Send, status: int, headers: List[Tuple[bytes, bytes]], body: bytes) -> None:
+        if status == 304:
+            headers = [(name, value) for name, value in headers if name != b"content-length"]
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -35,7 +35,10 @@ class ICFCode(BaseModel):
     component: ICFComponent = Field(..., description="Main ICF component")
     name_sv: str = Field(..., description="Swedish name")
     name_en: Optional[str] = Field(None, description="English name")
+    alternative_title: Optional[str] = Field(None, description="Short alternative Swedish title")
     description: Optional[str] = Field(None, description="Detailed description")
+    inclusions: Optional[str] = Field(None, description="Inclusion terms (Innefattar)")
+    exclusions: Optional[str] = Field(None, description="Exclusions (Utesluter)")
     parent_code: Optional[str] = Field(None, description="Parent code in hierarchy")
     level: int = Field(..., description="Hierarchy level (1=chapter, 2-7=subcategories)")
 
@@ -155,8 +158,10 @@ ICF_CORE_SETS = {
 }
 
 
-# Complete ICF code database (sample - would be full 1,671 codes in production)
-ICF_DATABASE = {
+# Curated ICF sample with English names.
+# The full catalogue is loaded from data/icf.tsv by icf_store.ICF_DATABASE;
+# these entries enrich it with name_en and serve as fallback without the TSV.
+ICF_CURATED_CODES = {
     # Chapter b1: Mental functions
     "b1": ICFCode(code="b1", component=ICFComponent.BODY_FUNCTIONS, name_sv="Mentala funktioner", level=1),
     "b140": ICFCode(code="b140", component=ICFComponent.BODY_FUNCTIONS, name_sv="Uppmärksamhetsfunktioner",
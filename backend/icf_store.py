@@ -0,0 +1,326 @@
+"""
+ICF Code Store
+Full ICF 2025 catalogue (data/icf.tsv) held in a compact columnar layout,
+backed by the memory-mapped terminology snapshot when one is built.
+Pydantic ICFCode objects are only created when a caller asks for one.
+
+The parent_code hierarchy is numbered as nested sets (Euler tour entry
+and exit positions), so subtree listing is a slice and ancestor tests
+are two comparisons.
+"""
+
+import logging
+import time
+from typing import (
+    Collection, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+)
+
+from .icf_models import ICFCode, ICFComponent, ICF_CURATED_CODES
+from .snapshot import load_terminology
+
+
+logger = logging.getLogger(__name__)
+
+_COMPONENTS = {component.value: component for component in ICFComponent}
+
+
+class ICFCodeStore:
+    """
+    Read-only ICF catalogue with O(1) lookup by code.
+    Row data lives in parallel column sequences indexed by an integer row id;
+    parent and child indexes are row ids as well.
+    Behaves like the old ICF_DATABASE dict (get/values/items/in/len).
+    """
+
+    __slots__ = (
+        "codes",
+        "parents",
+        "titles",
+        "alt_titles",
+        "descriptions",
+        "inclusions",
+        "exclusions",
+        "_index",
+        "_parent_ids",
+        "_children",
+        "_levels",
+        "_preorder",
+        "_enter",
+        "_exit",
+        "_models",
+        "_json",
+    )
+
+    def __init__(
+        self,
+        codes: Sequence[str],
+        parents: Sequence[str],
+        titles: Sequence[str],
+        alt_titles: Sequence[str],
+        descriptions: Sequence[str],
+        inclusions: Sequence[str],
+        exclusions: Sequence[str],
+    ):
+        self.codes = codes
+        self.parents = parents
+        self.titles = titles
+        self.alt_titles = alt_titles
+        self.descriptions = descriptions
+        self.inclusions = inclusions
+        self.exclusions = exclusions
+
+        self._index: Dict[str, int] = {code: row for row, code in enumerate(codes)}
+        self._parent_ids: List[int] = [self._index.get(parent, -1) for parent in parents]
+
+        children: List[List[int]] = [[] for _ in codes]
+        for row, parent_id in enumerate(self._parent_ids):
+            if parent_id >= 0:
+                children[parent_id].append(row)
+        self._children: List[Tuple[int, ...]] = [tuple(rows) for rows in children]
+
+        self._levels: List[int] = self._compute_levels()
+        self._preorder, self._enter, self._exit = self._number_tree()
+        self._models: Dict[int, ICFCode] = {}
+        self._json: Dict[int, bytes] = {}
+
+    @classmethod
+    def from_columns(cls, columns: Mapping[str, Sequence[str]]) -> "ICFCodeStore":
+        """Build the store from ICF TSV columns (parsed or snapshot-backed)"""
+        return cls(
+            codes=columns["Kod"],
+            parents=columns["Överordnad kod"],
+            titles=columns["Titel"],
+            alt_titles=columns["Alternativ titel"],
+            descriptions=columns["Beskrivning"],
+            inclusions=columns["Innefattar"],
+            exclusions=columns["Utesluter"],
+        )
+
+    @classmethod
+    def from_models(cls, models: Sequence[ICFCode]) -> "ICFCodeStore":
+        """Build the store from ICFCode objects (curated sample fallback)"""
+        models = list(models)
+        empty = [""] * len(models)
+        return cls(
+            codes=[m.code for m in models],
+            parents=[m.parent_code or "" for m in models],
+            titles=[m.name_sv for m in models],
+            alt_titles=empty,
+            descriptions=[m.description or "" for m in models],
+            inclusions=empty,
+            exclusions=empty,
+        )
+
+    def _compute_levels(self) -> List[int]:
+        """Hierarchy depth per row (component = 0, chapter = 1, ...)"""
+        levels = [-1] * len(self.codes)
+        for row in range(len(self.codes)):
+            chain = []
+            current = row
+            while current >= 0 and levels[current] < 0:
+                chain.append(current)
+                current = self._parent_ids[current]
+            depth = levels[current] if current >= 0 else -1
+            for node in reversed(chain):
+                depth += 1
+                levels[node] = depth
+        return levels
+
+    def _number_tree(self) -> Tuple[List[int], List[int], List[int]]:
+        """
+        Depth-first (pre-order) numbering of the hierarchy.
+        Row r's subtree is preorder[enter[r]:exit[r]]; children keep
+        catalogue order and roots follow the component order.
+        """
+        preorder: List[int] = []
+        enter = [0] * len(self.codes)
+        exit_ = [0] * len(self.codes)
+        roots = [row for row, parent_id in enumerate(self._parent_ids) if parent_id < 0]
+        stack = [(row, False) for row in reversed(roots)]
+        while stack:
+            row, done = stack.pop()
+            if done:
+                exit_[row] = len(preorder)
+                continue
+            enter[row] = len(preorder)
+            preorder.append(row)
+            stack.append((row, True))
+            stack.extend((child, False) for child in reversed(self._children[row]))
+        return preorder, enter, exit_
+
+    # Row-level accessors (no pydantic involved)
+
+    def row_of(self, code: str) -> int:
+        """Row id for a code, or -1 if unknown"""
+        return self._index.get(code, -1)
+
+    def title(self, code: str) -> Optional[str]:
+        """Swedish title for a code, or None if unknown"""
+        row = self._index.get(code)
+        return self.titles[row] if row is not None else None
+
+    def level(self, code: str) -> Optional[int]:
+        row = self._index.get(code)
+        return self._levels[row] if row is not None else None
+
+    def parent_of(self, code: str) -> Optional[str]:
+        """Parent code as linked in the catalogue"""
+        row = self._index.get(code)
+        if row is None or self._parent_ids[row] < 0:
+            return None
+        return self.codes[self._parent_ids[row]]
+
+    def children_of(self, code: str) -> List[str]:
+        """Direct child codes in catalogue order"""
+        row = self._index.get(code)
+        if row is None:
+            return []
+        return [self.codes[child] for child in self._children[row]]
+
+    # Hierarchy queries (nested-set numbering)
+
+    def subtree_rows(self, code: str) -> List[int]:
+        """Rows of code and all its descendants, in hierarchy (pre-)order"""
+        row = self._index.get(code)
+        if row is None:
+            return []
+        return self._preorder[self._enter[row] : self._exit[row]]
+
+    def subtree_span(self, code: str) -> Tuple[int, int]:
+        """Pre-order positions [start, end) of code's subtree ((0, 0) if unknown)"""
+        row = self._index.get(code)
+        if row is None:
+            return 0, 0
+        return self._enter[row], self._exit[row]
+
+    def preorder_row(self, position: int) -> int:
+        """Row at a pre-order position"""
+        return self._preorder[position]
+
+    def preorder_position(self, row: int) -> int:
+        return self._enter[row]
+
+    def subtree_size(self, code: str) -> int:
+        row = self._index.get(code)
+        return self._exit[row] - self._enter[row] if row is not None else 0
+
+    def is_ancestor(self, ancestor: str, code: str) -> bool:
+        """True if ancestor is code itself or lies above it in the hierarchy"""
+        a = self._index.get(ancestor)
+        row = self._index.get(code)
+        if a is None or row is None:
+            return False
+        return self._enter[a] <= self._enter[row] < self._exit[a]
+
+    def ancestors(self, code: str) -> List[str]:
+        """Parent, grandparent, ... up to the component root"""
+        chain = []
+        row = self._index.get(code, -1)
+        while row >= 0 and self._parent_ids[row] >= 0:
+            row = self._parent_ids[row]
+            chain.append(self.codes[row])
+        return chain
+
+    def closest_row(self, code: str) -> int:
+        """
+        Row of code, or of its longest known prefix for codes outside the
+        catalogue (e.g. an unlisted fifth-level code); -1 if none.
+        """
+        for end in range(len(code), 0, -1):
+            row = self._index.get(code[:end])
+            if row is not None:
+                return row
+        return -1
+
+    def nearest_marked(self, marked: Collection[str]) -> List[int]:
+        """
+        Per row, the row of the nearest code in marked at or above it
+        (-1 if none). One pre-order pass; lookups are then O(1).
+        """
+        nearest = [-1] * len(self.codes)
+        for row in self._preorder:
+            if self.codes[row] in marked:
+                nearest[row] = row
+            elif self._parent_ids[row] >= 0:
+                nearest[row] = nearest[self._parent_ids[row]]
+        return nearest
+
+    # Dict-like surface used by the engine and API
+
+    def model(self, row: int) -> ICFCode:
+        """Pydantic model for a row, created on first use"""
+        cached = self._models.get(row)
+        if cached is not None:
+            return cached
+
+        code = self.codes[row]
+        curated = ICF_CURATED_CODES.get(code)
+        model = ICFCode(
+            code=code,
+            component=_COMPONENTS.get(code[:1], ICFComponent.BODY_FUNCTIONS),
+            name_sv=self.titles[row],
+            name_en=curated.name_en if curated else None,
+            alternative_title=self.alt_titles[row] or None,
+            description=self.descriptions[row] or None,
+            inclusions=self.inclusions[row] or None,
+            exclusions=self.exclusions[row] or None,
+            parent_code=self.parents[row] or None,
+            level=self._levels[row],
+        )
+        self._models[row] = model
+        return model
+
+    def model_json(self, row: int) -> bytes:
+        """Pre-encoded JSON of model(row), encoded once per row"""
+        cached = self._json.get(row)
+        if cached is None:
+            cached = self._json[row] = self.model(row).model_dump_json().encode("utf-8")
+        return cached
+
+    def get(self, code: str, default: Optional[ICFCode] = None) -> Optional[ICFCode]:
+        row = self._index.get(code)
+        if row is None:
+            return default
+        return self.model(row)
+
+    def __getitem__(self, code: str) -> ICFCode:
+        row = self._index.get(code)
+        if row is None:
+            raise KeyError(code)
+        return self.model(row)
+
+    def __contains__(self, code: object) -> bool:
+        return code in self._index
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.codes)
+
+    def keys(self) -> Iterator[str]:
+        return iter(self.codes)
+
+    def values(self) -> Iterator[ICFCode]:
+        return (self.model(row) for row in range(len(self.codes)))
+
+    def items(self) -> Iterator[Tuple[str, ICFCode]]:
+        return ((self.codes[row], self.model(row)) for row in range(len(self.codes)))
+
+
+def load_icf_store() -> ICFCodeStore:
+    """
+    Load the full ICF catalogue from the terminology snapshot or data/icf.tsv.
+    Falls back to the curated sample if neither is available.
+    """
+    try:
+        return ICFCodeStore.from_columns(load_terminology("icf"))
+    except (OSError, KeyError) as exc:
+        logger.warning("ICF catalogue unavailable (%s), using curated sample", exc)
+        return ICFCodeStore.from_models(list(ICF_CURATED_CODES.values()))
+
+
+# Full ICF 2025 catalogue, loaded once per process
+_load_started = time.perf_counter()
+ICF_DATABASE = load_icf_store()
+ICF_LOAD_MS = round((time.perf_counter() - _load_started) * 1000, 1)
@@ -8,6 +8,7 @@ from pydantic import BaseModel, Field
 from datetime import datetime
 from enum import Enum
 
+from .icf_models import ICFFunctionDescription
 from .ksi_models import KSITarget, KSIAction, KSIStatus
 
 
@@ -301,7 +302,7 @@ class WelfareProfile(BaseModel):
     active_interventions: List[SupportIntervention] = Field(default_factory=list, description="Current interventions")
 
     # ICF function descriptions
-    icf_functions: List[Any] = Field(default_factory=list, description="ICF function descriptions")
+    icf_functions: List[ICFFunctionDescription] = Field(default_factory=list, description="ICF function descriptions")
 
     # Environmental factors
     environmental_factors: List[Any] = Field(default_factory=list, description="ICF environmental factors")
@@ -0,0 +1,138 @@
+"""
+Keyword Automaton
+Aho–Corasick matcher for thousands of Swedish keywords and phrases.
+The automaton is compiled once; matching is a single left-to-right pass
+over the text regardless of how many patterns there are, and reports
+character offsets into the original text.
+"""
+
+from collections import deque
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum()
+
+
+def lower_preserving_offsets(text: str) -> str:
+    """Lower-case text without changing its length (offsets stay valid)"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(
+        char.lower() if len(char.lower()) == 1 else char for char in text
+    )
+
+
+class KeywordMatch(NamedTuple):
+    start: int
+    end: int
+    pattern_id: int
+
+
+class KeywordAutomaton:
+    """
+    Compiled multi-pattern matcher.
+    Patterns are matched case-insensitively and must start on a word
+    boundary. Whole-word patterns must also end on one; stem patterns
+    (whole_word=False, e.g. "läs") may run into the rest of a word
+    ("läsning").
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any, bool]]):
+        """patterns: (text, value, whole_word); equal texts share one id"""
+        self.patterns: List[str] = []
+        self.values: List[List[Any]] = []
+        self._whole_word: List[bool] = []
+        ids: Dict[str, int] = {}
+
+        goto: List[Dict[str, int]] = [{}]
+        terminal: Dict[int, int] = {}
+        for text, value, whole_word in patterns:
+            key = lower_preserving_offsets(text.strip())
+            if not key:
+                continue
+            pattern_id = ids.get(key)
+            if pattern_id is None:
+                pattern_id = ids[key] = len(self.patterns)
+                self.patterns.append(key)
+                self.values.append([])
+                self._whole_word.append(whole_word)
+                node = 0
+                for char in key:
+                    next_node = goto[node].get(char)
+                    if next_node is None:
+                        next_node = goto[node][char] = len(goto)
+                        goto.append({})
+                    node = next_node
+                terminal[node] = pattern_id
+            else:
+                # A stem and a whole word with the same text: the stem wins
+                self._whole_word[pattern_id] = self._whole_word[pattern_id] and whole_word
+            if value not in self.values[pattern_id]:
+                self.values[pattern_id].append(value)
+
+        self._goto = goto
+        self._fail = [0] * len(goto)
+        self._out: List[Tuple[int, ...]] = [()] * len(goto)
+        for node, pattern_id in terminal.items():
+            self._out[node] = (pattern_id,)
+        self._link()
+
+    def _link(self) -> None:
+        """Breadth-first failure links; outputs include those of the fail chain"""
+        goto, fail, out = self._goto, self._fail, self._out
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fallback = goto[state].get(char, 0)
+                fail[child] = fallback if fallback != child else 0
+                if out[fail[child]]:
+                    out[child] = out[child] + out[fail[child]]
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    @property
+    def node_count(self) -> int:
+        return len(self._goto)
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        """Every boundary-respecting occurrence, in order of end offset"""
+        lowered = lower_preserving_offsets(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        patterns, whole_word = self.patterns, self._whole_word
+        length = len(lowered)
+        matches: List[KeywordMatch] = []
+
+        state = 0
+        for i, char in enumerate(lowered):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not out[state]:
+                continue
+            end = i + 1
+            for pattern_id in out[state]:
+                start = end - len(patterns[pattern_id])
+                if start > 0 and _is_word_char(lowered[start - 1]):
+                    continue
+                if whole_word[pattern_id] and end < length and _is_word_char(lowered[end]):
+                    continue
+                matches.append(KeywordMatch(start, end, pattern_id))
+        return matches
+
+    def find(self, text: str) -> List[KeywordMatch]:
+        """Leftmost-longest, non-overlapping matches in text order"""
+        selected: List[KeywordMatch] = []
+        covered_to = 0
+        for match in sorted(self.find_all(text), key=lambda m: (m.start, m.start - m.end)):
+            if match.start >= covered_to:
+                selected.append(match)
+                covered_to = match.end
+        return selected
@@ -0,0 +1,156 @@
+"""
+Precomputed Mapping Matrix
+Materialises every ICF -> {KSI, BBIC, IBIC, KVÅ} answer for the whole ICF
+catalogue, indexed by integer code id, so hot-path mapping is an array
+index. Target codes are also kept as sparse CSR rows (offsets + target
+ids + confidences), which gives the reverse direction for free.
+"""
+
+import sys
+import time
+from array import array
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    from .semantic_mapper import MappingResult
+
+
+# Engine method per target system of the ICF row
+MATRIX_METHODS = {
+    "KSI": "icf_to_ksi",
+    "BBIC": "icf_to_bbic",
+    "IBIC": "icf_to_ibic",
+    "KVÅ": "icf_to_kva",
+}
+
+
+class SparseRows:
+    """
+    CSR layout of code id -> target ids with one confidence per row.
+    offsets[i]:offsets[i + 1] slices target_ids for code id i.
+    """
+
+    __slots__ = ("offsets", "target_ids", "confidence", "targets", "_target_ids")
+
+    def __init__(self):
+        self.offsets = array("i", [0])
+        self.target_ids = array("i")
+        self.confidence = array("f")
+        self.targets: List[str] = []
+        self._target_ids: Dict[str, int] = {}
+
+    def append(self, target_codes: Sequence[str], confidence: float) -> None:
+        for target in target_codes:
+            target_id = self._target_ids.get(target)
+            if target_id is None:
+                target_id = self._target_ids[target] = len(self.targets)
+                self.targets.append(target)
+            self.target_ids.append(target_id)
+        self.offsets.append(len(self.target_ids))
+        self.confidence.append(confidence)
+
+    def target_id(self, target: str) -> Optional[int]:
+        return self._target_ids.get(target)
+
+    def transpose(self) -> "SparseRows":
+        """Reverse rows: target id -> code ids (counting sort, O(nnz))"""
+        reverse = SparseRows()
+        counts = [0] * len(self.targets)
+        for target_id in self.target_ids:
+            counts[target_id] += 1
+        offsets = array("i", [0]) * (len(self.targets) + 1)
+        for target_id, count in enumerate(counts):
+            offsets[target_id + 1] = offsets[target_id] + count
+        fill = array("i", offsets[:-1])
+        code_ids = array("i", [0]) * len(self.target_ids)
+        for code_id in range(len(self.offsets) - 1):
+            for pos in range(self.offsets[code_id], self.offsets[code_id + 1]):
+                target_id = self.target_ids[pos]
+                code_ids[fill[target_id]] = code_id
+                fill[target_id] += 1
+        reverse.offsets = offsets
+        reverse.target_ids = code_ids
+        reverse.targets = list(self.targets)
+        reverse._target_ids = dict(self._target_ids)
+        return reverse
+
+    def nbytes(self) -> int:
+        return sum(
+            part.buffer_info()[1] * part.itemsize
+            for part in (self.offsets, self.target_ids, self.confidence)
+        )
+
+
+class MappingMatrix:
+    """Eager ICF -> target system results for a fixed code universe"""
+
+    def __init__(self, codes: Sequence[str], compute: Callable[[str, str], "MappingResult"]):
+        """
+        codes: ICF code universe (code id = position)
+        compute(method_name, code): uncached engine mapping
+        """
+        started = time.perf_counter()
+        self.codes = list(codes)
+        self.code_ids: Dict[str, int] = {code: i for i, code in enumerate(self.codes)}
+        self.results: Dict[str, List["MappingResult"]] = {}
+        self._by_method: Dict[str, List["MappingResult"]] = {}
+        self.rows: Dict[str, SparseRows] = {}
+
+        for system, method in MATRIX_METHODS.items():
+            results = [compute(method, code) for code in self.codes]
+            rows = SparseRows()
+            for result in results:
+                rows.append(result.target_codes, result.confidence)
+            self.results[system] = results
+            self._by_method[method] = results
+            self.rows[system] = rows
+
+        self._reverse: Dict[str, SparseRows] = {
+            system: rows.transpose() for system, rows in self.rows.items()
+        }
+        self.build_seconds = time.perf_counter() - started
+        self.memory_bytes = self._estimate_memory()
+
+    def _estimate_memory(self) -> int:
+        """Approximate bytes held by arrays, result objects and their fields"""
+        total = sum(rows.nbytes() for rows in self.rows.values())
+        total += sum(rows.nbytes() for rows in self._reverse.values())
+        for results in self.results.values():
+            total += sys.getsizeof(results)
+            for result in results:
+                total += sys.getsizeof(result) + sys.getsizeof(result.__dict__)
+                total += sys.getsizeof(result.target_codes)
+                total += sys.getsizeof(result.target_descriptions)
+                if result.metadata is not None:
+                    total += sys.getsizeof(result.metadata)
+        return total
+
+    def lookup(self, method: str, code: str) -> Optional["MappingResult"]:
+        """Precomputed result for an engine method, or None outside the matrix"""
+        code_id = self.code_ids.get(code)
+        results = self._by_method.get(method)
+        if code_id is None or results is None:
+            return None
+        return results[code_id]
+
+    def reverse(self, system: str, target_code: str) -> List[str]:
+        """ICF codes whose precomputed mapping to system includes target_code"""
+        rows = self._reverse.get(system)
+        if rows is None:
+            return []
+        target_id = rows.target_id(target_code)
+        if target_id is None:
+            return []
+        return [
+            self.codes[code_id]
+            for code_id in rows.target_ids[rows.offsets[target_id] : rows.offsets[target_id + 1]]
+        ]
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "codes": len(self.codes),
+            "systems": list(self.rows),
+            "nonzero": {system: len(rows.target_ids) for system, rows in self.rows.items()},
+            "build_ms": round(self.build_seconds * 1000, 1),
+            "memory_bytes": self.memory_bytes,
+        }
@@ -0,0 +1,377 @@
+"""
+Metrics
+Request, engine and service instrumentation exposed in Prometheus text
+format at /metrics.
+
+Enabled with SEMANTIC_BRIDGE_METRICS=1. When it is off nothing is
+registered: no middleware, no wrapped engine methods and no /metrics route.
+When on, the hot path costs one clock read and one histogram update per
+request or engine call; cache, catalogue and worker pool figures are read
+from their existing stats only when /metrics is scraped.
+
+Engine timings cover calls made in the API process. Work sent to the
+worker pool shows up in the route latency of the request that sent it.
+"""
+
+import functools
+import inspect
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+METRICS_ENABLED = os.getenv("SEMANTIC_BRIDGE_METRICS", "").lower() in ("1", "true", "yes")
+
+# Seconds; engine lookups sit in the low buckets, batch and bulk work in the high ones
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Engine methods timed when metrics are enabled
+ENGINE_METHODS = (
+    "icf_to_ksi",
+    "ksi_to_icf",
+    "icf_to_bbic",
+    "icf_to_ibic",
+    "icf_to_kva",
+    "bbic_to_icf",
+    "ibic_to_icf",
+    "kva_to_icf",
+    "shanarri_to_icf",
+    "map_to_all_systems",
+    "map_to_systems",
+    "map_batch",
+    "suggest_interventions",
+    "intervention_rows",
+    "suggest_interventions_batch",
+)
+
+_LE_INF = 'le="+Inf"'
+
+Labels = Tuple[str, ...]
+Sample = Union[float, Mapping[Labels, float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_label_text(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram; buckets are stored per bucket and summed on render"""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket..., overflow, sum]
+        self._series: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Labels, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        for labels, values in series:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_label_text(self.label_names, labels, le)} {_number(cumulative)}"
+                )
+            total = cumulative + values[len(self.buckets)]
+            label_text = _label_text(self.label_names, labels)
+            lines.append(
+                f"{self.name}_bucket{_label_text(self.label_names, labels, _LE_INF)} {_number(total)}"
+            )
+            lines.append(f"{self.name}_sum{label_text} {repr(values[-1])}")
+            lines.append(f"{self.name}_count{label_text} {_number(total)}")
+        return lines
+
+
+class Collected:
+    """Counter or gauge whose samples are read from a callback at scrape time"""
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        help_text: str,
+        collect: Callable[[], Sample],
+        label_names: Sequence[str] = (),
+    ):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.collect = collect
+        self.label_names = tuple(label_names)
+
+    def render(self) -> List[str]:
+        samples = self.collect()
+        if not isinstance(samples, Mapping):
+            samples = {(): samples}
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(samples.items()):
+            lines.append(f"{self.name}{_label_text(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics in registration order; asking again for a name returns the same metric"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def _register(self, name: str, create: Callable[[], Any]) -> Any:
+        if name not in self._metrics:
+            self._metrics[name] = create()
+        return self._metrics[name]
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(name, lambda: Counter(name, help_text, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(name, lambda: Histogram(name, help_text, label_names, buckets))
+
+    def collected(
+        self,
+        name: str,
+        kind: str,
+        help_text: str,
+        collect: Callable[[], Sample],
+        label_names: Sequence[str] = (),
+    ) -> None:
+        self._register(name, lambda: Collected(name, kind, help_text, collect, label_names))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    Per-route latency histogram (method, route template, status).
+    Requests answered before routing (e.g. from the response cache) are
+    matched against the app's routes so they get the same label.
+    """
+
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry, routes: Iterable[Any]):
+        self.app = app
+        self.routes = routes
+        self.latency = registry.histogram(
+            "semantic_bridge_http_request_duration_seconds",
+            "HTTP request latency by route, until the response body is complete",
+            ("method", "route", "status"),
+        )
+
+    def _route(self, scope: Scope) -> str:
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        for candidate in self.routes:
+            match, _ = candidate.matches(scope)
+            if match == Match.FULL:
+                return candidate.path
+        return "unmatched"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.latency.observe(
+                (scope["method"], self._route(scope), str(status)),
+                time.perf_counter() - started,
+            )
+
+
+def instrument_engine(engine: Any, registry: MetricsRegistry, methods: Sequence[str] = ENGINE_METHODS) -> None:
+    """Count and time engine methods (instance attributes shadow the class methods)"""
+    calls = registry.counter(
+        "semantic_bridge_engine_calls_total", "Engine method calls", ("method",)
+    )
+    duration = registry.histogram(
+        "semantic_bridge_engine_duration_seconds",
+        "Engine method latency (cached results included)",
+        ("method",),
+    )
+
+    def timed(name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+        labels = (name,)
+
+        if inspect.isgeneratorfunction(method):
+            # Time spent producing items until the generator is exhausted or
+            # closed, not just creating it, and not the caller's work in between
+            @functools.wraps(method)
+            def generator_wrapper(*args: Any, **kwargs: Any) -> Any:
+                elapsed = 0.0
+                started = time.perf_counter()
+                try:
+                    items = method(*args, **kwargs)
+                    while True:
+                        try:
+                            item = next(items)
+                        except StopIteration:
+                            return
+                        finally:
+                            elapsed += time.perf_counter() - started
+                        yield item
+                        started = time.perf_counter()
+                finally:
+                    duration.observe(labels, elapsed)
+                    calls.inc(labels)
+
+            return generator_wrapper
+
+        @functools.wraps(method)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                duration.observe(labels, time.perf_counter() - started)
+                calls.inc(labels)
+
+        return wrapper
+
+    for name in methods:
+        method = getattr(engine, name, None)
+        if method is not None:
+            setattr(engine, name, timed(name, method))
+    # Batch mapping dispatches through a table of methods; rebuild it so it
+    # picks up the timed ones
+    engine.mapping_methods = engine._mapping_methods()
+
+
+def _stats_samples(stats: Callable[[], Mapping[str, float]], key: str) -> Callable[[], float]:
+    return lambda: stats().get(key, 0)
+
+
+def register_service_metrics(
+    registry: MetricsRegistry,
+    engine: Any,
+    response_cache: Any,
+    worker_pool: Any,
+    icf_load_ms: Optional[float] = None,
+) -> None:
+    """Scrape-time figures from the caches, reference data and worker pool"""
+    for prefix, stats, what in (
+        ("semantic_bridge_response_cache", response_cache.stats, "HTTP response cache"),
+        ("semantic_bridge_mapping_cache", engine.result_cache.stats, "Engine mapping result cache"),
+    ):
+        for key in ("hits", "misses"):
+            registry.collected(
+                f"{prefix}_{key}_total", "counter", f"{what} {key}", _stats_samples(stats, key)
+            )
+        registry.collected(f"{prefix}_entries", "gauge", f"{what} entries", _stats_samples(stats, "size"))
+    registry.collected(
+        "semantic_bridge_response_cache_not_modified_total",
+        "counter",
+        "Conditional requests answered with 304",
+        _stats_samples(response_cache.stats, "not_modified"),
+    )
+
+    def load_seconds() -> Dict[Labels, float]:
+        samples = {
+            (name,): stats.get("load_ms", 0) / 1000
+            for name, stats in engine.catalogue_stats.items()
+            if "load_ms" in stats
+        }
+        if icf_load_ms is not None:
+            samples[("icf",)] = icf_load_ms / 1000
+        if engine.matrix is not None:
+            samples[("mapping_matrix",)] = engine.matrix.stats()["build_ms"] / 1000
+        return samples
+
+    registry.collected(
+        "semantic_bridge_reference_load_seconds",
+        "gauge",
+        "Time spent loading or building reference data",
+        load_seconds,
+        ("source",),
+    )
+
+    for key, kind, help_text in (
+        ("pending", "gauge", "Heavy requests admitted and not yet finished"),
+        ("max_pending", "gauge", "Admission limit for heavy requests"),
+        ("workers", "gauge", "Worker processes (0 = server threadpool)"),
+        ("rejected", "counter", "Heavy requests rejected with 503"),
+    ):
+        name = f"semantic_bridge_worker_pool_{key}" + ("_total" if kind == "counter" else "")
+        registry.collected(name, kind, help_text, _stats_samples(worker_pool.stats, key))
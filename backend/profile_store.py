@@ -0,0 +1,1023 @@
+"""
+Welfare Profile Store
+SQLite storage for WelfareProfile and its sub-entities. Interventions,
+ICF function descriptions, survey responses, spider charts and PDCA
+records each get their own table, so one record can be read or replaced
+without loading the whole profile. Rows keep the entity's JSON as
+validated on write (served as-is on read) next to indexed columns for
+queries: student, KSI target, SHANARRI domain, ICF code, qualifier and
+dates. Record ids are global: writing an id stored for another student
+raises RecordConflict rather than replacing that student's record.
+Free-text survey answers are queued in freetext_queue until their ICF
+analysis is merged into the survey's ai_analysis.
+
+The store runs in-process; SEMANTIC_BRIDGE_PROFILE_DB selects the database
+file (":memory:" for a throwaway store).
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .icf_models import ICFFunctionDescription
+from .intervention_models import (
+    PDCARecord,
+    SHANARRIDomain,
+    SpiderChartData,
+    SupportIntervention,
+    SurveyResponse,
+    WelfareProfile,
+)
+from .serialization import dumps, join_array, loads
+from .terminology import DATA_DIR
+
+PROFILE_DB_PATH = os.getenv("SEMANTIC_BRIDGE_PROFILE_DB", str(DATA_DIR / "profiles.sqlite3"))
+
+# Stored as PRAGMA user_version. SCHEMA only creates missing tables and
+# indexes (CREATE ... IF NOT EXISTS) and never alters existing ones, so a
+# schema change must bump this and add an explicit upgrade step in
+# ProfileStore.__init__ for databases on the previous version.
+SCHEMA_VERSION = 1
+
+# One REAL column per SHANARRI domain for survey and spider-chart scores
+DOMAIN_COLUMNS: Tuple[str, ...] = tuple(domain.value for domain in SHANARRIDomain)
+
+CHILD_TABLES = ("interventions", "icf_functions", "surveys", "spider_charts", "pdca_records")
+
+# Tables holding SHANARRI domain scores, with their time column
+SCORE_TABLES = {"spider_charts": "timestamp", "surveys": "survey_date"}
+
+# Called after a committed write with (table, affected student ids)
+ChangeListener = Callable[[str, Set[str]], None]
+
+# Profile fields stored in their own tables
+PROFILE_CHILDREN = {
+    "current_wellbeing",
+    "active_interventions",
+    "icf_functions",
+    "survey_history",
+    "spider_chart_history",
+    "pdca_records",
+}
+
+_SCORES = ", ".join(f"{column} REAL" for column in DOMAIN_COLUMNS)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS profiles (
+    student_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    next_review_date TEXT,
+    body BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS profiles_next_review ON profiles (next_review_date);
+
+CREATE TABLE IF NOT EXISTS interventions (
+    id TEXT PRIMARY KEY,
+    student_id TEXT NOT NULL,
+    ksi_code TEXT NOT NULL,
+    ksi_target TEXT NOT NULL,
+    ksi_action TEXT NOT NULL,
+    ksi_status TEXT NOT NULL,
+    shanarri_domain TEXT,
+    source TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    planned_end_date TEXT,
+    actual_end_date TEXT,
+    body BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS interventions_student ON interventions (student_id, start_date, id);
+CREATE INDEX IF NOT EXISTS interventions_target ON interventions (ksi_target, start_date, id);
+CREATE INDEX IF NOT EXISTS interventions_domain ON interventions (shanarri_domain, start_date, id);
+CREATE INDEX IF NOT EXISTS interventions_start ON interventions (start_date, id);
+
+-- start_date is repeated here so ICF code queries page in start-date order
+CREATE TABLE IF NOT EXISTS intervention_icf (
+    icf_code TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    intervention_id TEXT NOT NULL,
+    PRIMARY KEY (icf_code, start_date, intervention_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS intervention_icf_intervention ON intervention_icf (intervention_id);
+
+CREATE TABLE IF NOT EXISTS icf_functions (
+    id TEXT PRIMARY KEY,
+    student_id TEXT NOT NULL,
+    icf_chapter TEXT NOT NULL,
+    icf_code TEXT NOT NULL,
+    qualifier_extent TEXT,
+    assessment_date TEXT NOT NULL,
+    body BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS icf_functions_student ON icf_functions (student_id, assessment_date);
+CREATE INDEX IF NOT EXISTS icf_functions_code ON icf_functions (icf_code, assessment_date);
+
+CREATE TABLE IF NOT EXISTS surveys (
+    student_id TEXT NOT NULL,
+    survey_id TEXT NOT NULL,
+    survey_date TEXT NOT NULL,
+    survey_period TEXT NOT NULL,
+    {_SCORES},
+    body BLOB NOT NULL,
+    UNIQUE (student_id, survey_id)
+);
+CREATE INDEX IF NOT EXISTS surveys_student_date ON surveys (student_id, survey_date);
+CREATE INDEX IF NOT EXISTS surveys_date ON surveys (survey_date);
+
+-- Free-text survey answers waiting for ICF analysis, oldest first
+CREATE TABLE IF NOT EXISTS freetext_queue (
+    id INTEGER PRIMARY KEY,
+    student_id TEXT NOT NULL,
+    survey_id TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS freetext_queue_survey ON freetext_queue (student_id, survey_id);
+
+CREATE TABLE IF NOT EXISTS spider_charts (
+    student_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    source TEXT NOT NULL,
+    {_SCORES},
+    body BLOB NOT NULL,
+    UNIQUE (student_id, timestamp, source)
+);
+CREATE INDEX IF NOT EXISTS spider_charts_timestamp ON spider_charts (timestamp);
+
+CREATE TABLE IF NOT EXISTS pdca_records (
+    id TEXT PRIMARY KEY,
+    student_id TEXT NOT NULL,
+    intervention_id TEXT,
+    shanarri_domain TEXT NOT NULL,
+    phase TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    body BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pdca_student ON pdca_records (student_id, timestamp);
+CREATE INDEX IF NOT EXISTS pdca_intervention ON pdca_records (intervention_id);
+CREATE INDEX IF NOT EXISTS pdca_domain ON pdca_records (shanarri_domain, timestamp);
+"""
+
+
+def sql_time(value: Optional[datetime]) -> Optional[str]:
+    """Sortable text for date columns: UTC, naive datetimes taken as UTC"""
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat(timespec="microseconds")
+
+
+def _body(model: Any, exclude: Optional[set] = None) -> bytes:
+    return model.model_dump_json(exclude=exclude).encode("utf-8")
+
+
+def _enum_value(value: Any) -> Any:
+    # Validated bulk rows carry the plain values already
+    return getattr(value, "value", value)
+
+
+def _enum_keys(values: dict) -> dict:
+    return {_enum_value(key): value for key, value in values.items()}
+
+
+def _scores(scores: dict) -> Tuple[Optional[float], ...]:
+    by_value = _enum_keys(scores)
+    return tuple(by_value.get(column) for column in DOMAIN_COLUMNS)
+
+
+def _chart_history(scores: dict, previous: dict) -> dict:
+    """previous_scores and change_delta of a spider chart (domain-value keys)"""
+    return {
+        "previous_scores": previous,
+        "change_delta": {
+            domain: round(score - previous[domain], 3)
+            for domain, score in scores.items()
+            if domain in previous
+        },
+    }
+
+
+def _intervention_row(intervention: SupportIntervention) -> tuple:
+    return (
+        intervention.id,
+        intervention.student_id,
+        intervention.ksi_code,
+        intervention.ksi_target.value,
+        intervention.ksi_action.value,
+        intervention.ksi_status.value,
+        _enum_value(intervention.shanarri_domain),
+        intervention.source.value,
+        sql_time(intervention.start_date),
+        sql_time(intervention.planned_end_date),
+        sql_time(intervention.actual_end_date),
+        _body(intervention),
+    )
+
+
+def _icf_function_row(function: ICFFunctionDescription) -> tuple:
+    return (
+        function.id,
+        function.student_id,
+        function.icf_chapter,
+        function.icf_code,
+        _enum_value(function.qualifier_extent),
+        sql_time(function.assessment_date),
+        _body(function),
+    )
+
+
+def survey_values(
+    student_id: str,
+    survey_id: str,
+    survey_date: datetime,
+    survey_period: str,
+    domain_scores: dict,
+    body: bytes,
+) -> tuple:
+    """Row for the surveys table (domain_scores keyed by domain or its value)"""
+    return (
+        student_id,
+        survey_id,
+        sql_time(survey_date),
+        survey_period,
+        *_scores(domain_scores),
+        body,
+    )
+
+
+def freetext_answers(responses: Sequence[dict]) -> List[Tuple[str, str]]:
+    """(question_id, text) of the answered free-text questions of a survey"""
+    answers = []
+    for index, answer in enumerate(responses):
+        text = answer.get("response")
+        if isinstance(text, str) and text.strip():
+            answers.append((answer.get("question_id") or str(index), text))
+    return answers
+
+
+# A survey row and the free-text answers to queue for it
+SurveyEntry = Tuple[tuple, List[Tuple[str, str]]]
+
+
+def _survey_entry(survey: SurveyResponse) -> SurveyEntry:
+    row = survey_values(
+        survey.student_id,
+        survey.survey_id,
+        survey.survey_date,
+        survey.survey_period,
+        survey.domain_scores,
+        _body(survey),
+    )
+    # Surveys that arrive with an analysis are not analysed again
+    return row, [] if survey.ai_analysis else freetext_answers(survey.freetext_responses)
+
+
+def _spider_chart_row(chart: SpiderChartData) -> tuple:
+    return (
+        chart.student_id,
+        sql_time(chart.timestamp),
+        chart.source,
+        *_scores(chart.scores),
+        _body(chart),
+    )
+
+
+def _pdca_row(record: PDCARecord) -> tuple:
+    return (
+        record.id,
+        record.student_id,
+        record.intervention_id,
+        record.shanarri_domain.value,
+        record.phase,
+        sql_time(record.timestamp),
+        _body(record),
+    )
+
+
+def _placeholders(count: int) -> str:
+    return ", ".join("?" * count)
+
+
+_SCORE_NAMES = ", ".join(DOMAIN_COLUMNS)
+
+
+def _upsert(table: str, columns: Sequence[str]) -> str:
+    """
+    INSERT keyed on a global id that replaces an existing row only when it
+    belongs to the same student; a row owned by another student is left
+    alone and the statement changes nothing (see _write_owned)
+    """
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns[1:])
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({_placeholders(len(columns))}) "
+        f"ON CONFLICT (id) DO UPDATE SET {updates} WHERE student_id = excluded.student_id"
+    )
+
+
+INSERT_INTERVENTION = _upsert(
+    "interventions",
+    (
+        "id",
+        "student_id",
+        "ksi_code",
+        "ksi_target",
+        "ksi_action",
+        "ksi_status",
+        "shanarri_domain",
+        "source",
+        "start_date",
+        "planned_end_date",
+        "actual_end_date",
+        "body",
+    ),
+)
+INSERT_ICF_FUNCTION = _upsert(
+    "icf_functions",
+    (
+        "id",
+        "student_id",
+        "icf_chapter",
+        "icf_code",
+        "qualifier_extent",
+        "assessment_date",
+        "body",
+    ),
+)
+INSERT_SURVEY = (
+    f"INSERT OR REPLACE INTO surveys (student_id, survey_id, survey_date, survey_period, "
+    f"{_SCORE_NAMES}, body) VALUES ({_placeholders(5 + len(DOMAIN_COLUMNS))})"
+)
+INSERT_SPIDER_CHART = (
+    f"INSERT OR REPLACE INTO spider_charts (student_id, timestamp, source, {_SCORE_NAMES}, body) "
+    f"VALUES ({_placeholders(4 + len(DOMAIN_COLUMNS))})"
+)
+INSERT_PDCA = _upsert(
+    "pdca_records",
+    ("id", "student_id", "intervention_id", "shanarri_domain", "phase", "timestamp", "body"),
+)
+
+
+class RecordConflict(ValueError):
+    """A record id that is already stored for another student"""
+
+
+def _write_owned(conn: sqlite3.Connection, table: str, sql: str, rows: Sequence[tuple]) -> None:
+    """
+    Run an _upsert statement for rows of (id, student_id, ...). Raises
+    RecordConflict (rolling back the enclosing transaction) when an id
+    belongs to another student, instead of overwriting that student's row.
+    """
+    if not rows or conn.executemany(sql, rows).rowcount == len(rows):
+        return
+    taken = [
+        record_id
+        for record_id, student_id in {(row[0], row[1]) for row in rows}
+        if conn.execute(
+            f"SELECT 1 FROM {table} WHERE id = ? AND student_id != ?", (record_id, student_id)
+        ).fetchone()
+    ]
+    raise RecordConflict(f"{table} id already used by another student: {', '.join(sorted(taken))}")
+
+
+class ProfileStore:
+    """
+    SQLite-backed profile storage. One connection is shared by all threads
+    and serialised with a lock; statements are short and index-backed.
+    Reads return stored JSON (bytes) rather than pydantic models.
+    Listeners are told which students changed in which table after each
+    committed write, so derived in-memory views can refresh just those.
+    """
+
+    def __init__(self, path: str = PROFILE_DB_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._listeners: List[ChangeListener] = []
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
+        self._conn.execute("PRAGMA cache_size=-65536")
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise RuntimeError(
+                f"Profile database {path} has schema version {version}, expected {SCHEMA_VERSION}"
+            )
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+            self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Connection inside one committed (or rolled back) transaction"""
+        with self._lock, self._conn:
+            yield self._conn
+
+    def add_listener(self, listener: ChangeListener) -> None:
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: ChangeListener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, table: str, student_ids: Iterable[str]) -> None:
+        changed = set(student_ids)
+        if changed:
+            for listener in list(self._listeners):
+                listener(table, changed)
+
+    def _fetch(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _bodies(self, sql: str, params: Sequence[Any] = ()) -> List[bytes]:
+        return [row[0] for row in self._fetch(sql, params)]
+
+    def _delete(self, table: str, sql: str, params: Sequence[Any]) -> bool:
+        """Run a DELETE whose first parameter is the student_id"""
+        with self.transaction() as conn:
+            deleted = conn.execute(sql, params).rowcount > 0
+        if deleted:
+            self._notify(table, {params[0]})
+        return deleted
+
+    # Profiles
+
+    def put_profile(self, profile: WelfareProfile) -> None:
+        """
+        Store profile-level fields and upsert the sub-entities it carries.
+        Stored sub-entities missing from the profile are kept.
+        """
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?, ?)",
+                (
+                    profile.student_id,
+                    sql_time(profile.created_at),
+                    sql_time(profile.updated_at),
+                    sql_time(profile.next_review_date),
+                    _body(profile, exclude=PROFILE_CHILDREN),
+                ),
+            )
+            self._put_interventions(conn, profile.active_interventions)
+            _write_owned(
+                conn,
+                "icf_functions",
+                INSERT_ICF_FUNCTION,
+                [_icf_function_row(function) for function in profile.icf_functions],
+            )
+            self._put_surveys(conn, [_survey_entry(survey) for survey in profile.survey_history])
+            self._put_spider_charts(
+                conn, [profile.current_wellbeing, *profile.spider_chart_history]
+            )
+            _write_owned(
+                conn,
+                "pdca_records",
+                INSERT_PDCA,
+                [_pdca_row(record) for record in profile.pdca_records],
+            )
+        student = {profile.student_id}
+        self._notify("profiles", student)
+        if profile.active_interventions:
+            self._notify("interventions", student)
+        if profile.icf_functions:
+            self._notify("icf_functions", student)
+        if profile.survey_history:
+            self._notify("surveys", student)
+        self._notify("spider_charts", student)
+        if profile.pdca_records:
+            self._notify("pdca_records", student)
+
+    def get_profile(self, student_id: str) -> Optional[bytes]:
+        """
+        Full profile JSON: stored fields plus the latest spider chart as
+        current_wellbeing, interventions without an actual end date and the
+        complete ICF function, survey, spider-chart and PDCA history.
+        """
+        with self._lock:
+            rows = self._fetch("SELECT body FROM profiles WHERE student_id = ?", (student_id,))
+            if not rows:
+                return None
+            current = self.latest_spider_chart(student_id)
+            interventions = self.list_interventions(student_id=student_id, active=True)
+            functions = self.list_icf_functions(student_id)
+            surveys = self.list_surveys(student_id)
+            charts = self.list_spider_charts(student_id)
+            records = self.list_pdca_records(student_id)
+        return (
+            rows[0][0][:-1]
+            + b',"current_wellbeing":' + (current or b"null")
+            + b',"active_interventions":' + join_array(interventions[0])
+            + b',"icf_functions":' + join_array(functions)
+            + b',"survey_history":' + join_array(surveys)
+            + b',"spider_chart_history":' + join_array(charts)
+            + b',"pdca_records":' + join_array(records)
+            + b"}"
+        )
+
+    def list_profiles(
+        self,
+        review_before: Optional[datetime] = None,
+        limit: int = 100,
+        after: Optional[str] = None,
+    ) -> Tuple[List[bytes], Optional[str]]:
+        """
+        Profile-level fields (no sub-entities) in student_id order, optionally
+        only those with a review due before a date. Returns the page and the
+        student_id to continue after, if there are more.
+        """
+        clauses, params = [], []
+        if review_before is not None:
+            clauses.append("next_review_date < ?")
+            params.append(sql_time(review_before))
+        if after is not None:
+            clauses.append("student_id > ?")
+            params.append(after)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._fetch(
+            f"SELECT body, student_id FROM profiles{where} ORDER BY student_id LIMIT ?",
+            (*params, limit + 1),
+        )
+        next_after = rows[limit - 1][1] if len(rows) > limit else None
+        return [row[0] for row in rows[:limit]], next_after
+
+    def delete_profile(self, student_id: str) -> bool:
+        """Remove a profile and every sub-entity stored for the student"""
+        with self.transaction() as conn:
+            conn.execute(
+                "DELETE FROM intervention_icf WHERE intervention_id IN "
+                "(SELECT id FROM interventions WHERE student_id = ?)",
+                (student_id,),
+            )
+            for table in (*CHILD_TABLES, "freetext_queue"):
+                conn.execute(f"DELETE FROM {table} WHERE student_id = ?", (student_id,))
+            deleted = conn.execute(
+                "DELETE FROM profiles WHERE student_id = ?", (student_id,)
+            ).rowcount > 0
+        for table in ("profiles", *CHILD_TABLES):
+            self._notify(table, {student_id})
+        return deleted
+
+    # Support interventions
+
+    @staticmethod
+    def _put_interventions(conn: sqlite3.Connection, interventions: Sequence[SupportIntervention]) -> None:
+        if not interventions:
+            return
+        rows = [_intervention_row(intervention) for intervention in interventions]
+        _write_owned(conn, "interventions", INSERT_INTERVENTION, rows)
+        ids = [(intervention.id,) for intervention in interventions]
+        conn.executemany("DELETE FROM intervention_icf WHERE intervention_id = ?", ids)
+        conn.executemany(
+            "INSERT OR IGNORE INTO intervention_icf VALUES (?, ?, ?)",
+            [
+                (code, row[8], row[0])
+                for intervention, row in zip(interventions, rows)
+                for code in intervention.icf_codes
+            ],
+        )
+
+    def put_intervention(self, intervention: SupportIntervention) -> None:
+        with self.transaction() as conn:
+            self._put_interventions(conn, [intervention])
+        self._notify("interventions", {intervention.student_id})
+
+    def get_intervention(self, student_id: str, intervention_id: str) -> Optional[bytes]:
+        rows = self._bodies(
+            "SELECT body FROM interventions WHERE id = ? AND student_id = ?",
+            (intervention_id, student_id),
+        )
+        return rows[0] if rows else None
+
+    def delete_intervention(self, student_id: str, intervention_id: str) -> bool:
+        with self.transaction() as conn:
+            deleted = conn.execute(
+                "DELETE FROM interventions WHERE id = ? AND student_id = ?",
+                (intervention_id, student_id),
+            ).rowcount > 0
+            if deleted:
+                conn.execute(
+                    "DELETE FROM intervention_icf WHERE intervention_id = ?", (intervention_id,)
+                )
+        if deleted:
+            self._notify("interventions", {student_id})
+        return deleted
+
+    def list_interventions(
+        self,
+        student_id: Optional[str] = None,
+        ksi_target: Optional[str] = None,
+        shanarri_domain: Optional[str] = None,
+        icf_code: Optional[str] = None,
+        active: Optional[bool] = None,
+        start_from: Optional[datetime] = None,
+        start_to: Optional[datetime] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[str, str]] = None,
+    ) -> Tuple[List[bytes], Optional[Tuple[str, str]]]:
+        """
+        Interventions ordered by (start_date, id). Returns the page and the
+        (start_date, id) key to continue after when limit cut it short.
+        """
+        clauses, params = [], []
+        source = "interventions AS i"
+        # With an ICF code, walk the link table in (start_date, id) order
+        order = "i.start_date, i.id"
+        if icf_code is not None:
+            source = (
+                "intervention_icf AS l JOIN interventions AS i ON i.id = l.intervention_id"
+            )
+            order = "l.start_date, l.intervention_id"
+            clauses.append("l.icf_code = ?")
+            params.append(icf_code)
+        for column, value in (
+            ("i.student_id", student_id),
+            ("i.ksi_target", ksi_target),
+            ("i.shanarri_domain", shanarri_domain),
+        ):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if active is not None:
+            clauses.append("i.actual_end_date IS NULL" if active else "i.actual_end_date IS NOT NULL")
+        start = order.split(", ")[0]
+        if start_from is not None:
+            clauses.append(f"{start} >= ?")
+            params.append(sql_time(start_from))
+        if start_to is not None:
+            clauses.append(f"{start} < ?")
+            params.append(sql_time(start_to))
+        if after is not None:
+            clauses.append(f"({order}) > (?, ?)")
+            params.extend(after)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT i.body, {order} FROM {source}{where} ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+        rows = self._fetch(sql, params)
+        next_after = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_after = (rows[-1][1], rows[-1][2])
+        return [row[0] for row in rows], next_after
+
+    # ICF function descriptions
+
+    def put_icf_function(self, function: ICFFunctionDescription) -> None:
+        with self.transaction() as conn:
+            _write_owned(conn, "icf_functions", INSERT_ICF_FUNCTION, [_icf_function_row(function)])
+        self._notify("icf_functions", {function.student_id})
+
+    def get_icf_function(self, student_id: str, function_id: str) -> Optional[bytes]:
+        rows = self._bodies(
+            "SELECT body FROM icf_functions WHERE id = ? AND student_id = ?",
+            (function_id, student_id),
+        )
+        return rows[0] if rows else None
+
+    def delete_icf_function(self, student_id: str, function_id: str) -> bool:
+        return self._delete(
+            "icf_functions",
+            "DELETE FROM icf_functions WHERE student_id = ? AND id = ?",
+            (student_id, function_id),
+        )
+
+    def list_icf_functions(
+        self,
+        student_id: str,
+        icf_code: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+    ) -> List[bytes]:
+        """A student's ICF function descriptions by assessment date"""
+        sql, params = "SELECT body FROM icf_functions WHERE student_id = ?", [student_id]
+        if icf_code is not None:
+            sql += " AND icf_code = ?"
+            params.append(icf_code)
+        if date_from is not None:
+            sql += " AND assessment_date >= ?"
+            params.append(sql_time(date_from))
+        if date_to is not None:
+            sql += " AND assessment_date < ?"
+            params.append(sql_time(date_to))
+        return self._bodies(sql + " ORDER BY assessment_date", params)
+
+    # Survey responses
+
+    @staticmethod
+    def _put_surveys(conn: sqlite3.Connection, surveys: Sequence[SurveyEntry]) -> None:
+        """Insert survey rows and queue their free-text answers (replacing queued ones)"""
+        if not surveys:
+            return
+        conn.executemany(
+            "DELETE FROM freetext_queue WHERE student_id = ? AND survey_id = ?",
+            [row[:2] for row, _ in surveys],
+        )
+        conn.executemany(INSERT_SURVEY, [row for row, _ in surveys])
+        conn.executemany(
+            "INSERT INTO freetext_queue (student_id, survey_id, question_id, text) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                (*row[:2], question_id, text)
+                for row, answers in surveys
+                for question_id, text in answers
+            ],
+        )
+
+    def put_survey(self, survey: SurveyResponse) -> None:
+        with self.transaction() as conn:
+            self._put_surveys(conn, [_survey_entry(survey)])
+        self._notify("surveys", {survey.student_id})
+
+    def put_surveys(self, surveys: Sequence[SurveyEntry]) -> None:
+        """Bulk insert of prepared rows (see survey_values) in one transaction"""
+        with self.transaction() as conn:
+            self._put_surveys(conn, surveys)
+        self._notify("surveys", {row[0] for row, _ in surveys})
+
+    def get_survey(self, student_id: str, survey_id: str) -> Optional[bytes]:
+        rows = self._bodies(
+            "SELECT body FROM surveys WHERE student_id = ? AND survey_id = ?",
+            (student_id, survey_id),
+        )
+        return rows[0] if rows else None
+
+    def delete_survey(self, student_id: str, survey_id: str) -> bool:
+        with self.transaction() as conn:
+            conn.execute(
+                "DELETE FROM freetext_queue WHERE student_id = ? AND survey_id = ?",
+                (student_id, survey_id),
+            )
+            deleted = conn.execute(
+                "DELETE FROM surveys WHERE student_id = ? AND survey_id = ?",
+                (student_id, survey_id),
+            ).rowcount > 0
+        if deleted:
+            self._notify("surveys", {student_id})
+        return deleted
+
+    def list_surveys(
+        self,
+        student_id: str,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+    ) -> List[bytes]:
+        """A student's survey responses by survey date, optionally within [from, to)"""
+        sql, params = "SELECT body FROM surveys WHERE student_id = ?", [student_id]
+        if date_from is not None:
+            sql += " AND survey_date >= ?"
+            params.append(sql_time(date_from))
+        if date_to is not None:
+            sql += " AND survey_date < ?"
+            params.append(sql_time(date_to))
+        return self._bodies(sql + " ORDER BY survey_date", params)
+
+    # Free-text queue
+
+    def queued_freetext(self, limit: int) -> List[tuple]:
+        """Oldest queued answers: (id, student_id, survey_id, question_id, text)"""
+        return self._fetch(
+            "SELECT id, student_id, survey_id, question_id, text FROM freetext_queue "
+            "ORDER BY id LIMIT ?",
+            (limit,),
+        )
+
+    def freetext_backlog(self) -> int:
+        return self._fetch("SELECT COUNT(*) FROM freetext_queue")[0][0]
+
+    def complete_freetext(
+        self, entries: Sequence[tuple], suggestions: Sequence[Optional[List[dict]]]
+    ) -> None:
+        """
+        Merge ICF suggestions for queued answers (from queued_freetext) into
+        their surveys' ai_analysis.icf_suggestions and dequeue them. Entries
+        dequeued meanwhile (survey replaced or deleted) are skipped; entries
+        with None for suggestions (analysis failed) are only dequeued.
+        """
+        by_survey: Dict[Tuple[str, str], List[dict]] = {}
+        with self.transaction() as conn:
+            for entry, found in zip(entries, suggestions):
+                dequeued = conn.execute("DELETE FROM freetext_queue WHERE id = ?", (entry[0],))
+                if dequeued.rowcount and found is not None:
+                    by_survey.setdefault(entry[1:3], []).extend(
+                        {
+                            "question_id": entry[3],
+                            "code": item["code"],
+                            "confidence": item["confidence"],
+                        }
+                        for item in found
+                    )
+            for (student_id, survey_id), found in by_survey.items():
+                row = conn.execute(
+                    "SELECT body FROM surveys WHERE student_id = ? AND survey_id = ?",
+                    (student_id, survey_id),
+                ).fetchone()
+                if row is None:
+                    continue
+                survey = loads(row[0])
+                analysis = survey.get("ai_analysis") or {}
+                # Answers of one survey can span two queue batches
+                answered = {item["question_id"] for item in found}
+                earlier = [
+                    item
+                    for item in analysis.get("icf_suggestions", [])
+                    if item.get("question_id") not in answered
+                ]
+                analysis["icf_suggestions"] = sorted(
+                    earlier + found, key=lambda item: -item["confidence"]
+                )
+                survey["ai_analysis"] = analysis
+                conn.execute(
+                    "UPDATE surveys SET body = ? WHERE student_id = ? AND survey_id = ?",
+                    (dumps(survey), student_id, survey_id),
+                )
+
+    # Spider charts
+
+    @staticmethod
+    def _put_spider_charts(conn: sqlite3.Connection, charts: Sequence[SpiderChartData]) -> None:
+        """
+        Insert snapshots in time order. A chart without previous_scores gets
+        the scores of the student's chart before it and change_delta; the
+        chart after it is re-derived if its values came from the chart it
+        now follows instead (or from the chart being replaced).
+        """
+        for chart in sorted(charts, key=lambda chart: sql_time(chart.timestamp)):
+            key = (chart.student_id, sql_time(chart.timestamp))
+            before = conn.execute(
+                "SELECT body FROM spider_charts WHERE student_id = ? AND timestamp < ? "
+                "ORDER BY timestamp DESC LIMIT 1",
+                key,
+            ).fetchone()
+            previous = loads(before[0])["scores"] if before else None
+            replaced = conn.execute(
+                "SELECT body FROM spider_charts "
+                "WHERE student_id = ? AND timestamp = ? AND source = ?",
+                (*key, chart.source),
+            ).fetchone()
+            if chart.previous_scores is None and previous is not None:
+                derived = _chart_history(_enum_keys(chart.scores), previous)
+                chart = chart.model_copy(
+                    update={
+                        field: {SHANARRIDomain(domain): value for domain, value in values.items()}
+                        for field, values in derived.items()
+                    }
+                )
+            conn.execute(INSERT_SPIDER_CHART, _spider_chart_row(chart))
+
+            after = conn.execute(
+                "SELECT rowid, body FROM spider_charts WHERE student_id = ? AND timestamp > ? "
+                "ORDER BY timestamp LIMIT 1",
+                key,
+            ).fetchone()
+            if after is None:
+                continue
+            following = loads(after[1])
+            sources = [previous, loads(replaced[0])["scores"] if replaced else None]
+            if following.get("previous_scores") in sources:
+                following.update(_chart_history(following["scores"], _enum_keys(chart.scores)))
+                conn.execute(
+                    "UPDATE spider_charts SET body = ? WHERE rowid = ?",
+                    (dumps(following), after[0]),
+                )
+
+    def put_spider_chart(self, chart: SpiderChartData) -> None:
+        """
+        Insert a snapshot; one per (student, timestamp, source). previous_scores
+        and change_delta are derived from the stored history when left out.
+        """
+        with self.transaction() as conn:
+            self._put_spider_charts(conn, [chart])
+        self._notify("spider_charts", {chart.student_id})
+
+    def latest_spider_chart(self, student_id: str) -> Optional[bytes]:
+        rows = self._bodies(
+            "SELECT body FROM spider_charts WHERE student_id = ? ORDER BY timestamp DESC LIMIT 1",
+            (student_id,),
+        )
+        return rows[0] if rows else None
+
+    def list_spider_charts(
+        self,
+        student_id: str,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+    ) -> List[bytes]:
+        """A student's spider charts by timestamp, optionally within [from, to)"""
+        sql, params = "SELECT body FROM spider_charts WHERE student_id = ?", [student_id]
+        if date_from is not None:
+            sql += " AND timestamp >= ?"
+            params.append(sql_time(date_from))
+        if date_to is not None:
+            sql += " AND timestamp < ?"
+            params.append(sql_time(date_to))
+        return self._bodies(sql + " ORDER BY timestamp", params)
+
+    # PDCA records
+
+    def put_pdca_record(self, record: PDCARecord) -> None:
+        with self.transaction() as conn:
+            _write_owned(conn, "pdca_records", INSERT_PDCA, [_pdca_row(record)])
+        self._notify("pdca_records", {record.student_id})
+
+    def get_pdca_record(self, student_id: str, record_id: str) -> Optional[bytes]:
+        rows = self._bodies(
+            "SELECT body FROM pdca_records WHERE id = ? AND student_id = ?",
+            (record_id, student_id),
+        )
+        return rows[0] if rows else None
+
+    def delete_pdca_record(self, student_id: str, record_id: str) -> bool:
+        return self._delete(
+            "pdca_records",
+            "DELETE FROM pdca_records WHERE student_id = ? AND id = ?",
+            (student_id, record_id),
+        )
+
+    def list_pdca_records(
+        self,
+        student_id: str,
+        intervention_id: Optional[str] = None,
+        shanarri_domain: Optional[str] = None,
+    ) -> List[bytes]:
+        """A student's PDCA records by timestamp"""
+        sql, params = "SELECT body FROM pdca_records WHERE student_id = ?", [student_id]
+        if intervention_id is not None:
+            sql += " AND intervention_id = ?"
+            params.append(intervention_id)
+        if shanarri_domain is not None:
+            sql += " AND shanarri_domain = ?"
+            params.append(shanarri_domain)
+        return self._bodies(sql + " ORDER BY timestamp", params)
+
+    # Columns for in-memory views
+
+    def domain_scores(self, table: str, student_ids: Optional[Sequence[str]] = None) -> List[tuple]:
+        """
+        (student_id, time, score per DOMAIN_COLUMNS) rows from a SCORE_TABLES
+        table, for all students or the given ones
+        """
+        time_column = SCORE_TABLES[table]
+        return self._student_rows(
+            f"SELECT student_id, {time_column}, {_SCORE_NAMES} FROM {table}", student_ids
+        )
+
+    def qualifier_extents(self, student_ids: Optional[Sequence[str]] = None) -> List[tuple]:
+        """(student_id, icf_code, qualifier_extent, assessment_date) rows"""
+        return self._student_rows(
+            "SELECT student_id, icf_code, qualifier_extent, assessment_date FROM icf_functions",
+            student_ids,
+        )
+
+    def _student_rows(self, sql: str, student_ids: Optional[Sequence[str]]) -> List[tuple]:
+        """Rows of a SELECT for all students (None) or the given ones"""
+        if student_ids is None:
+            return self._fetch(sql)
+        rows: List[tuple] = []
+        # Stay below SQLite's bound-parameter limit
+        for start in range(0, len(student_ids), 500):
+            chunk = student_ids[start : start + 500]
+            rows.extend(
+                self._fetch(f"{sql} WHERE student_id IN ({_placeholders(len(chunk))})", chunk)
+            )
+        return rows
+
+    def stats(self) -> dict:
+        """Row counts per table"""
+        with self._lock:
+            return {
+                table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("profiles", *CHILD_TABLES, "freetext_queue")
+            }
+
+
+_store: Optional[ProfileStore] = None
+_store_lock = threading.Lock()
+
+
+def get_profile_store() -> ProfileStore:
+    """Process-wide profile store, opened on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ProfileStore()
+    return _store
+
+
+def close_profile_store() -> None:
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+            _store = None
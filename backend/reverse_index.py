@@ -0,0 +1,83 @@
+"""
+Reverse Mapping Indexes
+Target-system keys (BBIC dimensions, IBIC areas, KVÅ codes) back to the
+ICF codes that map to them. Keys are case-folded once at build time and
+confidence aggregates are computed up front, so a reverse lookup is a
+single dict access.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+def fold_key(key: str) -> str:
+    """Case-insensitive lookup key ("Barnets Hälsa" == "barnets hälsa")"""
+    return key.strip().casefold()
+
+
+@dataclass(frozen=True)
+class ReverseEntry:
+    """All ICF codes behind one target key, with confidence aggregates"""
+    key: str
+    codes: Tuple[str, ...]
+    descriptions: Tuple[str, ...]
+    confidences: Tuple[float, ...]
+    confidence: float
+    min_confidence: float
+    max_confidence: float
+
+
+class ReverseIndex:
+    """
+    Target key -> ReverseEntry for one (source, target) system pair.
+    Fill with add(), then freeze() before serving lookups.
+    """
+
+    def __init__(self, source_system: str, target_system: str = "ICF"):
+        self.source_system = source_system
+        self.target_system = target_system
+        self._pending: Dict[str, Tuple[str, Dict[str, Tuple[str, float]]]] = {}
+        self._entries: Dict[str, ReverseEntry] = {}
+
+    def add(self, key: str, code: str, description: str, confidence: float) -> None:
+        """Record that code maps to key; the highest confidence per code wins"""
+        folded = fold_key(key)
+        if not folded:
+            return
+        _, codes = self._pending.setdefault(folded, (key.strip(), {}))
+        current = codes.get(code)
+        if current is None or confidence > current[1]:
+            codes[code] = (description, confidence)
+
+    def freeze(self) -> "ReverseIndex":
+        """Materialise entries and aggregates from everything added so far"""
+        entries = {}
+        for folded, (display, codes) in self._pending.items():
+            confidences = tuple(confidence for _, confidence in codes.values())
+            entries[folded] = ReverseEntry(
+                key=display,
+                codes=tuple(codes),
+                descriptions=tuple(description for description, _ in codes.values()),
+                confidences=confidences,
+                confidence=sum(confidences) / len(confidences),
+                min_confidence=min(confidences),
+                max_confidence=max(confidences),
+            )
+        self._entries = entries
+        return self
+
+    def get(self, key: str) -> Optional[ReverseEntry]:
+        return self._entries.get(fold_key(key))
+
+    def keys(self) -> List[str]:
+        """Display form of every key"""
+        return [entry.key for entry in self._entries.values()]
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and fold_key(key) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[ReverseEntry]:
+        return iter(self._entries.values())
@@ -0,0 +1,398 @@
+"""
+Code Search Index
+Inverted index over ICF, KSI and KVÅ records (code, title, alternative
+title, description) with Swedish-aware normalisation and BM25F ranking.
+
+Postings store precomputed per-document impacts, ordered by impact, so a
+query walks them with the threshold algorithm and stops as soon as no
+unseen record can enter the top k. Records whose code is a query token
+rank above every other hit.
+"""
+
+import heapq
+import math
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Container, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .ksi_models import KSI_TARGET_NAMES
+from .snapshot import load_terminology
+
+
+# å/ä/ö folding plus the accents that occur in the catalogues
+_FOLD = str.maketrans("åäöéèüáà", "aaoeeuaa")
+_WORD = re.compile(r"[a-z0-9]+")
+_CODE = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*")
+
+STOPWORDS = frozenset(
+    "och att i av for med som pa en ett till det den de eller om fran ar vid "
+    "inte sig sin sitt sina har kan samt sasom under t ex".split()
+)
+
+# BM25F parameters and field weights
+K1 = 1.2
+B = 0.75
+FIELD_WEIGHTS = {"code": 4.0, "title": 2.5, "alt_title": 2.0, "description": 1.0}
+
+# Query-side weights for exact and prefix (compound head) matches
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.7
+MAX_PREFIX_EXPANSIONS = 64
+
+# Decompounding: weight of a compound's parts relative to the whole word
+COMPOUND_PART_WEIGHT = 0.5
+_MIN_PART = 4
+
+
+def normalize(text: str) -> str:
+    """Lower-case and fold Swedish diacritics (å/ä -> a, ö -> o)"""
+    return text.lower().translate(_FOLD)
+
+
+def tokenize(text: str) -> List[str]:
+    """Normalised word tokens without stopwords"""
+    return [token for token in _WORD.findall(normalize(text)) if token not in STOPWORDS]
+
+
+def tokenize_query(text: str) -> List[str]:
+    """Query tokens; keeps code punctuation (SA1.AA.ZZ, b110-b139) intact"""
+    return [token for token in _CODE.findall(normalize(text)) if token not in STOPWORDS]
+
+
+def _surface_tokens(pattern: "re.Pattern[str]", text: str) -> List[Tuple[str, str]]:
+    """(normalised token, lower-cased unfolded word) pairs without stopwords"""
+    lowered = text.lower()
+    # Folding maps single characters, so spans line up in both strings
+    folded = lowered.translate(_FOLD)
+    return [
+        (match.group(), lowered[match.start() : match.end()])
+        for match in pattern.finditer(folded)
+        if match.group() not in STOPWORDS
+    ]
+
+
+class SearchIndex:
+    """
+    Immutable inverted index.
+    Records are integer doc ids with parallel system/code/title lists.
+    Each term owns two parallel arrays (doc ids and impacts) sorted by
+    impact, plus a doc-id-sorted copy for random access by bisection.
+    Terms folded from words with diacritics keep their unfolded forms, so
+    prefix expansion does not cross words ('oro' does not expand to 'öron').
+    """
+
+    def __init__(self, records: Iterable[Tuple[str, str, str, str, str]]):
+        self.systems: List[str] = []
+        self.codes: List[str] = []
+        self.titles: List[str] = []
+        self._code_docs: Dict[str, List[int]] = {}
+
+        field_terms: List[Dict[str, Dict[str, float]]] = []
+        surfaces: Dict[str, Set[str]] = {}
+        for doc, (system, code, title, alt_title, description) in enumerate(records):
+            self.systems.append(system)
+            self.codes.append(code)
+            self.titles.append(title)
+            self._code_docs.setdefault(normalize(code), []).append(doc)
+            code_tokens = [normalize(code)] + _WORD.findall(normalize(code))
+            field_terms.append(
+                {
+                    "code": self._counts(code_tokens),
+                    "title": self._counts(self._tokens(title, surfaces)),
+                    "alt_title": self._counts(self._tokens(alt_title, surfaces)),
+                    "description": self._counts(self._tokens(description, surfaces)),
+                }
+            )
+
+        self._add_compound_parts(field_terms, surfaces)
+        # Only terms with a diacritic in some source word need their forms
+        self._surfaces: Dict[str, Tuple[str, ...]] = {
+            term: tuple(forms) for term, forms in surfaces.items() if forms != {term}
+        }
+        self._build_postings(field_terms)
+
+    @staticmethod
+    def _counts(tokens: Sequence[str]) -> Dict[str, float]:
+        counts: Dict[str, float] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0.0) + 1.0
+        return counts
+
+    @staticmethod
+    def _tokens(text: str, surfaces: Dict[str, Set[str]]) -> List[str]:
+        tokens = []
+        for token, surface in _surface_tokens(_WORD, text):
+            tokens.append(token)
+            surfaces.setdefault(token, set()).add(surface)
+        return tokens
+
+    @staticmethod
+    def _split_compound(term: str, vocabulary: Container[str]) -> Optional[Tuple[str, str]]:
+        """Split a Swedish compound into two known words (with linking -s-)"""
+        if len(term) < 2 * _MIN_PART or not term.isalpha():
+            return None
+        for i in range(len(term) - _MIN_PART, _MIN_PART - 1, -1):
+            head, tail = term[:i], term[i:]
+            if tail not in vocabulary:
+                continue
+            if head in vocabulary:
+                return head, tail
+            if head.endswith("s") and head[:-1] in vocabulary and len(head) > _MIN_PART:
+                return head[:-1], tail
+        return None
+
+    def _add_compound_parts(
+        self, field_terms: List[Dict[str, Dict[str, float]]], surfaces: Dict[str, Set[str]]
+    ) -> None:
+        """Index the parts of compound words so 'förståelse' finds 'läsförståelse'"""
+        vocabulary = {
+            term
+            for fields in field_terms
+            for name in ("title", "alt_title", "description")
+            for term in fields[name]
+        }
+        splits: Dict[str, Optional[Tuple[str, str]]] = {}
+        for fields in field_terms:
+            for name in ("title", "alt_title", "description"):
+                counts = fields[name]
+                for term, count in list(counts.items()):
+                    if term not in splits:
+                        splits[term] = self._split_compound(term, vocabulary)
+                        if splits[term]:
+                            head, tail = splits[term]
+                            for form in surfaces[term]:
+                                surfaces[head].add(form[: len(head)])
+                                surfaces[tail].add(form[len(form) - len(tail) :])
+                    parts = splits[term]
+                    if parts:
+                        for part in parts:
+                            counts[part] = counts.get(part, 0.0) + count * COMPOUND_PART_WEIGHT
+
+    def _build_postings(self, field_terms: List[Dict[str, Dict[str, float]]]) -> None:
+        doc_count = len(field_terms)
+        avg_len = {
+            name: max(1.0, sum(sum(f[name].values()) for f in field_terms) / max(doc_count, 1))
+            for name in FIELD_WEIGHTS
+        }
+
+        # Weighted, length-normalised term frequency per (term, doc)
+        weighted: Dict[str, Dict[int, float]] = {}
+        for doc, fields in enumerate(field_terms):
+            for name, weight in FIELD_WEIGHTS.items():
+                counts = fields[name]
+                if not counts:
+                    continue
+                norm = 1.0 - B + B * sum(counts.values()) / avg_len[name]
+                for term, count in counts.items():
+                    bucket = weighted.setdefault(term, {})
+                    bucket[doc] = bucket.get(doc, 0.0) + weight * count / norm
+
+        self.terms: List[str] = sorted(weighted)
+        self._term_ids: Dict[str, int] = {term: i for i, term in enumerate(self.terms)}
+        self._by_impact: List[Tuple[array, array]] = []
+        self._by_doc: List[Tuple[array, array]] = []
+        self._max_impact: List[float] = []
+
+        for term in self.terms:
+            # Buckets were filled in doc order, so keys are already sorted
+            bucket = weighted[term]
+            docs = array("i", bucket)
+            idf = math.log(1.0 + (doc_count - len(docs) + 0.5) / (len(docs) + 0.5))
+            scale = idf * (K1 + 1.0)
+            impacts = array("d", [scale * tf / (tf + K1) for tf in bucket.values()])
+            self._by_doc.append((docs, impacts))
+
+            order = sorted(range(len(docs)), key=impacts.__getitem__, reverse=True)
+            self._by_impact.append(
+                (array("i", [docs[i] for i in order]), array("d", [impacts[i] for i in order]))
+            )
+            self._max_impact.append(impacts[order[0]])
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def _same_word(self, term: str, surface: str) -> bool:
+        """Whether a prefix match also holds before diacritic folding"""
+        return any(form.startswith(surface) for form in self._surfaces.get(term, (term,)))
+
+    def _expand(self, token: str, surface: str) -> List[Tuple[int, float]]:
+        """
+        Index terms matching a query token: exact, then by prefix. A prefix
+        match never outweighs the exact term: rare longer words would
+        otherwise win on IDF alone ('orofarynx' over 'oro').
+        """
+        matches: List[Tuple[int, float]] = []
+        exact = self._term_ids.get(token)
+        ceiling = math.inf
+        if exact is not None:
+            matches.append((exact, EXACT_WEIGHT))
+            ceiling = PREFIX_WEIGHT * self._max_impact[exact]
+
+        min_prefix = 2 if any(ch.isdigit() for ch in token) else 3
+        if len(token) >= min_prefix:
+            start = bisect_left(self.terms, token)
+            for term_id in range(start, min(start + MAX_PREFIX_EXPANSIONS + 1, len(self.terms))):
+                term = self.terms[term_id]
+                if not term.startswith(token):
+                    break
+                if term_id != exact and self._same_word(term, surface):
+                    weight = min(PREFIX_WEIGHT, ceiling / self._max_impact[term_id])
+                    matches.append((term_id, weight))
+        return matches
+
+    def _query_groups(self, tokens: List[Tuple[str, str]]) -> List[List[Tuple[int, float]]]:
+        """
+        Expanded terms per query token. A token that is not an index term but
+        splits into two (a compound such as 'koncentrationssvårigheter') also
+        matches its parts, at COMPOUND_PART_WEIGHT.
+        """
+        groups = []
+        for token, surface in tokens:
+            group = self._expand(token, surface)
+            if group:
+                groups.append(group)
+            if token in self._term_ids:
+                continue
+            parts = self._split_compound(token, self._term_ids)
+            if parts:
+                head, tail = parts
+                part_surfaces = (surface[: len(head)], surface[len(surface) - len(tail) :])
+                for part, part_surface in zip(parts, part_surfaces):
+                    groups.append(
+                        [
+                            (term_id, weight * COMPOUND_PART_WEIGHT)
+                            for term_id, weight in self._expand(part, part_surface)
+                        ]
+                    )
+        return groups
+
+    def _impact(self, term_id: int, doc: int) -> float:
+        docs, impacts = self._by_doc[term_id]
+        i = bisect_left(docs, doc)
+        if i < len(docs) and docs[i] == doc:
+            return impacts[i]
+        return 0.0
+
+    def _postings(self, term_id: int, weight: float) -> Iterator[Tuple[float, int]]:
+        docs, impacts = self._by_impact[term_id]
+        return ((weight * impact, doc) for doc, impact in zip(docs, impacts))
+
+    def _sorted_access(self, group: List[Tuple[int, float]]) -> Iterator[Tuple[float, int]]:
+        """Postings of an expanded query token, merged by weighted impact"""
+        # One call per term: a generator expression here would see only the last weight
+        streams = [self._postings(term_id, weight) for term_id, weight in group]
+        if len(streams) == 1:
+            return streams[0]
+        return heapq.merge(*streams, key=lambda item: item[0], reverse=True)
+
+    def search(
+        self,
+        query: str,
+        systems: Optional[Iterable[str]] = None,
+        limit: int = 20,
+    ) -> List[Tuple[int, float]]:
+        """
+        Top-k (doc id, score) for a free-text query, best first.
+        A record's score sums, per query token, its best matching term.
+        Records whose code equals a query token are scored first and get
+        the largest score any other record could reach added on top.
+        """
+        tokens = _surface_tokens(_CODE, query)
+        groups = self._query_groups(tokens)
+        if not groups or limit <= 0:
+            return []
+        allowed = set(systems) if systems is not None else None
+
+        def full_score(doc: int) -> float:
+            return sum(
+                max(weight * self._impact(term_id, doc) for term_id, weight in group)
+                for group in groups
+            )
+
+        streams = [self._sorted_access(group) for group in groups]
+        bounds = [
+            max(weight * self._max_impact[term_id] for term_id, weight in group)
+            for group in groups
+        ]
+        top: List[Tuple[float, int]] = []
+        seen: Set[int] = set()
+
+        def offer(doc: int, score: float) -> None:
+            if len(top) < limit:
+                heapq.heappush(top, (score, -doc))
+            elif score > top[0][0]:
+                heapq.heapreplace(top, (score, -doc))
+
+        code_boost = sum(bounds)
+        for token, _ in tokens:
+            for doc in self._code_docs.get(token, ()):
+                if doc in seen:
+                    continue
+                seen.add(doc)
+                if allowed is None or self.systems[doc] in allowed:
+                    offer(doc, full_score(doc) + code_boost)
+
+        while True:
+            progressed = False
+            for g, stream in enumerate(streams):
+                item = next(stream, None)
+                if item is None:
+                    bounds[g] = 0.0
+                    continue
+                progressed = True
+                bounds[g], doc = item
+                if doc in seen:
+                    continue
+                seen.add(doc)
+                if allowed is not None and self.systems[doc] not in allowed:
+                    continue
+                offer(doc, full_score(doc) if len(groups) > 1 else item[0])
+
+            if not progressed:
+                break
+            # Threshold algorithm: unseen records score at most sum(bounds)
+            if len(top) == limit and top[0][0] >= sum(bounds):
+                break
+
+        return [(-neg_doc, score) for score, neg_doc in sorted(top, reverse=True)]
+
+
+def catalogue_records() -> Iterator[Tuple[str, str, str, str, str]]:
+    """(system, code, title, alt title, description) for every catalogue row"""
+    icf = load_terminology("icf")
+    yield from zip(
+        ["icf"] * len(icf["Kod"]),
+        icf["Kod"],
+        icf["Titel"],
+        icf["Alternativ titel"],
+        icf["Beskrivning"],
+    )
+
+    ksi = load_terminology("ksi")
+    blanks = [""] * len(ksi["Kod"])
+    yield from zip(["ksi"] * len(blanks), ksi["Kod"], ksi["Titel"], blanks, ksi["Beskrivning"])
+    # Curated KSI targets that are not part of the published catalogue
+    known = set(ksi["Kod"])
+    for target, description in KSI_TARGET_NAMES.items():
+        if target.value not in known:
+            yield "ksi", target.value, description, "", ""
+
+    kva = load_terminology("kva")
+    blanks = [""] * len(kva["Kod"])
+    yield from zip(["kva"] * len(blanks), kva["Kod"], kva["Titel"], blanks, kva["Beskrivning"])
+
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """Process-wide search index, built on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SearchIndex(catalogue_records())
+    return _index
@@ -4,18 +4,32 @@ Maps between ICF, KSI, BBIC, IBIC, KVÅ, and SS 12000
 Confidence scores based on validated mappings from document
 """
 
-from typing import List, Dict, Optional, Tuple, Any
-from dataclasses import dataclass, field
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
 from enum import Enum
-
-from .icf_models import ICFCode, ICF_DATABASE, ICF_CORE_SETS
+from functools import cached_property, wraps
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+from .catalogue_loader import ICFRangeResolver, load_kva_links, load_ksi_links
+from .icf_models import ICF_CORE_SETS
+from .icf_store import ICF_DATABASE
+from .mapping_matrix import MappingMatrix
+from .reverse_index import ReverseIndex
+from .serialization import dumps
+from .snapshot import reset_terminology_version
 from .ksi_models import (
     KSITarget, KSIAction, KSIStatus, KSICode,
-    KSI_TO_ICF_MAPPINGS, ICF_TO_KSI_MAPPINGS,
+    KSI_TO_ICF_MAPPINGS,
     KSI_TARGET_NAMES, KSI_ACTION_NAMES
 )
 
 
+logger = logging.getLogger(__name__)
+
+
 class MappingConfidence(float, Enum):
     """Documented confidence scores for different system mappings"""
     ICF_KSI = 0.97  # KSI Target = ICF codes (exact)
@@ -27,17 +41,168 @@ class MappingConfidence(float, Enum):
     SS12000_EXTENDED_ICF = 0.95  # After adding new entities
 
 
-@dataclass
+# Accepted spellings of system names in API input
+SYSTEM_ALIASES = {
+    "icf": "ICF",
+    "ksi": "KSI",
+    "bbic": "BBIC",
+    "ibic": "IBIC",
+    "kva": "KVÅ",
+    "kvå": "KVÅ",
+    "shanarri": "SHANARRI",
+}
+
+
+def normalize_system(system: str) -> str:
+    """Canonical system name (ICF, KSI, BBIC, IBIC, KVÅ, SHANARRI)"""
+    return SYSTEM_ALIASES.get(system.strip().lower(), system.strip().upper())
+
+
+@dataclass(frozen=True)
 class MappingResult:
-    """Result of a semantic mapping operation"""
+    """
+    Result of a semantic mapping operation
+    Immutable: results are cached and shared between requests
+    """
     source_code: str
     target_system: str
-    target_codes: List[str]
-    target_descriptions: List[str]
+    target_codes: Tuple[str, ...]
+    target_descriptions: Tuple[str, ...]
     confidence: float
     mapping_path: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
-    warnings: List[str] = field(default_factory=list)
+    warnings: Tuple[str, ...] = ()
+
+    def __post_init__(self):
+        for name in ("target_codes", "target_descriptions", "warnings"):
+            value = getattr(self, name)
+            if not isinstance(value, tuple):
+                object.__setattr__(self, name, tuple(value))
+
+    @cached_property
+    def payload(self) -> Dict[str, Any]:
+        """JSON-ready dict, built once per result (treat as read-only)"""
+        return asdict(self)
+
+    @cached_property
+    def json_bytes(self) -> bytes:
+        """Pre-serialised UTF-8 JSON of payload"""
+        return dumps(self.payload)
+
+
+# Actions suggested in school context, by ICF component
+SCHOOL_ACTIONS = {
+    # Activities: assessment first, teaching, compensatory support, advice
+    "d": (KSIAction.AA, KSIAction.PM, KSIAction.RA, KSIAction.PN),
+    # Body functions: assessment, skills training, supportive conversation
+    "b": (KSIAction.AA, KSIAction.PH, KSIAction.PU),
+    # Environmental factors: environment management, practical support
+    "e": (KSIAction.SM, KSIAction.RB),
+}
+GENERAL_ACTIONS = (KSIAction.AA, KSIAction.PM, KSIAction.RA)
+
+ACTION_RATIONALES = {
+    KSIAction.AA: "Bedömning behövs för att kartlägga omfattning",
+    KSIAction.PM: "Undervisning kan träna denna förmåga",
+    KSIAction.RA: "Kompensatoriskt stöd kan avhjälpa svårigheter",
+    KSIAction.PN: "Råd kan hjälpa eleven att utveckla strategier",
+    KSIAction.PH: "Färdighetsträning kan förbättra funktionen",
+    KSIAction.SM: "Miljöanpassning kan minska barriärer",
+    KSIAction.RB: "Praktiskt stöd kan underlätta vardagen",
+    KSIAction.PU: "Stödjande samtal kan bearbeta svårigheter",
+}
+DEFAULT_RATIONALE = "Rekommenderad insats"
+
+_KSI_TARGETS = {target.value: target for target in KSITarget}
+
+
+@dataclass(frozen=True)
+class InterventionSuggestion:
+    """
+    One suggested KSI intervention for an ICF code
+    Immutable: rows are resolved once per code and context and shared
+    """
+    icf_code: str
+    icf_name: str
+    ksi_target: str
+    ksi_target_name: str
+    ksi_action: str
+    ksi_action_name: str
+    suggested_code: str
+    confidence: float
+    rationale: str
+
+    @cached_property
+    def payload(self) -> Dict[str, Any]:
+        """JSON-ready dict, built once per row (treat as read-only)"""
+        return asdict(self)
+
+    @cached_property
+    def json_bytes(self) -> bytes:
+        """Pre-serialised UTF-8 JSON of payload"""
+        return dumps(self.payload)
+
+
+class MappingCache:
+    """
+    Bounded LRU of immutable mapping results keyed by (method, code)
+    Shared by all request threads; cleared when reference data reloads
+    """
+
+    def __init__(self, maxsize: int = 8192):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[str, str], MappingResult]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(
+        self,
+        key: Tuple[str, str],
+        compute: Callable[[], MappingResult]
+    ) -> MappingResult:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        result = compute()
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def memoized_mapping(method: Callable[[Any, str], MappingResult]):
+    """Serve a pure code -> MappingResult engine method from the result cache"""
+    name = method.__name__
+
+    @wraps(method)
+    def wrapper(self, code):
+        if self.matrix is not None:
+            result = self.matrix.lookup(name, code)
+            if result is not None:
+                return result
+        return self.result_cache.get_or_compute((name, code), lambda: method(self, code))
+
+    return wrapper
 
 
 class SemanticMappingEngine:
@@ -46,11 +211,60 @@ class SemanticMappingEngine:
     Handles bidirectional mappings between all welfare systems
     """
 
-    def __init__(self):
+    def __init__(self, cache_size: Optional[int] = None, eager: Optional[bool] = None):
         self.icf_database = ICF_DATABASE
-        self.ksi_to_icf_map = KSI_TO_ICF_MAPPINGS
-        self.icf_to_ksi_map = ICF_TO_KSI_MAPPINGS
         self._initialize_system_mappings()
+        self._load_catalogues()
+        self._build_reverse_indexes()
+        self.mapping_methods = self._mapping_methods()
+        if cache_size is None:
+            cache_size = int(os.getenv("SEMANTIC_BRIDGE_MAPPING_CACHE_SIZE", "8192"))
+        self.result_cache = MappingCache(cache_size)
+        self._intervention_tables: Dict[bool, Dict[str, Tuple[InterventionSuggestion, ...]]] = {}
+        self._intervention_lock = threading.Lock()
+        self._reload_listeners: List[Callable[[], None]] = []
+
+        self.matrix: Optional[MappingMatrix] = None
+        if eager is None:
+            eager = os.getenv("SEMANTIC_BRIDGE_EAGER_MAPPINGS", "").lower() in ("1", "true", "yes")
+        if eager:
+            self.precompute()
+
+    def precompute(self) -> MappingMatrix:
+        """
+        Eager mode: materialise ICF -> KSI/BBIC/IBIC/KVÅ for every catalogue
+        code so mapping becomes an array lookup, and resolve the intervention
+        suggestion tables. Returns the matrix; its stats() report build time
+        and memory.
+        """
+        def compute(method_name: str, code: str) -> MappingResult:
+            return getattr(type(self), method_name).__wrapped__(self, code)
+
+        self.matrix = MappingMatrix(self.icf_database.codes, compute)
+        for school in (True, False):
+            self._intervention_table(school)
+        return self.matrix
+
+    def add_reload_listener(self, listener: Callable[[], None]) -> None:
+        """Call listener after every reload (e.g. to drop cached HTTP responses)"""
+        self._reload_listeners.append(listener)
+
+    def reload(self):
+        """
+        Rebuild mapping tables from reference data, drop cached results and
+        the reference-data version (ETags), then notify reload listeners
+        """
+        self._initialize_system_mappings()
+        self._load_catalogues()
+        self._build_reverse_indexes()
+        self.result_cache.clear()
+        self._intervention_tables.clear()
+        if self.matrix is not None:
+            self.matrix = None
+            self.precompute()
+        reset_terminology_version()
+        for listener in self._reload_listeners:
+            listener()
 
     def _initialize_system_mappings(self):
         """Initialize mappings to BBIC, IBIC, KVÅ, etc."""
@@ -135,54 +349,180 @@ class SemanticMappingEngine:
             }
         }
 
+    def _load_catalogues(self):
+        """
+        Extend the curated KSI and KVÅ tables with the "Relaterad ICF-kod"
+        links of the published catalogues. Catalogue links replace curated
+        ones for the same KSI code; curated KVÅ links are kept first.
+        """
+        ksi_to_icf: Dict[str, List[str]] = {
+            target.value: list(codes) for target, codes in KSI_TO_ICF_MAPPINGS.items()
+        }
+        self.ksi_titles: Dict[str, str] = {
+            target.value: name for target, name in KSI_TARGET_NAMES.items()
+        }
+        self.ksi_parents: Dict[str, str] = {}
+        self.kva_parents: Dict[str, str] = {}
+        self.kva_titles: Dict[str, str] = {}
+        self.catalogue_stats: Dict[str, Dict[str, float]] = {}
+
+        try:
+            resolver = ICFRangeResolver(self.icf_database.codes)
+            ksi = load_ksi_links(resolver)
+            kva = load_kva_links(resolver)
+        except (OSError, KeyError) as exc:
+            logger.warning("KSI/KVÅ catalogues unavailable (%s), using curated mappings", exc)
+        else:
+            ksi_to_icf.update(ksi.to_icf)
+            for code, title in ksi.titles.items():
+                self.ksi_titles.setdefault(code, title)
+            self.ksi_parents = ksi.parents
+            self.kva_parents = kva.parents
+            self.kva_titles = kva.titles
+
+            confidence = MappingConfidence.ICF_KVA.value
+            for kva_code, icf_codes in kva.to_icf.items():
+                for icf_code in icf_codes:
+                    procedures = self.icf_to_kva_map.setdefault(icf_code, [])
+                    if all(existing[0] != kva_code for existing in procedures):
+                        procedures.append((kva_code, kva.titles[kva_code], confidence))
+
+            self.catalogue_stats = {"ksi": ksi.stats, "kva": kva.stats}
+            logger.info(
+                "Loaded KSI (%d ICF-linked codes, %.1f ms) and KVÅ (%d, %.1f ms) catalogues",
+                len(ksi.to_icf), ksi.stats["load_ms"], len(kva.to_icf), kva.stats["load_ms"],
+            )
+
+        self.ksi_to_icf_map = ksi_to_icf
+        # ICF -> KSI targets (Axel 1 only), most specific target first
+        icf_to_ksi: Dict[str, List[str]] = {}
+        for ksi_code, icf_codes in ksi_to_icf.items():
+            if "." in ksi_code:
+                continue
+            for icf_code in icf_codes:
+                icf_to_ksi.setdefault(icf_code, []).append(ksi_code)
+        for targets in icf_to_ksi.values():
+            targets.sort(key=lambda target: len(ksi_to_icf[target]))
+        self.icf_to_ksi_map = icf_to_ksi
+        # Nearest KSI-mapped code at or above each ICF row
+        self._ksi_mapped_rows = self.icf_database.nearest_marked(icf_to_ksi)
+
+    def _build_reverse_indexes(self):
+        """Index BBIC/IBIC dimensions and KVÅ codes back to ICF"""
+        bbic = ReverseIndex("BBIC")
+        for icf_code, (dimension, subdimension, confidence) in self.icf_to_bbic_map.items():
+            bbic.add(dimension, icf_code, subdimension, confidence)
+            bbic.add(subdimension, icf_code, subdimension, confidence)
+
+        ibic = ReverseIndex("IBIC")
+        for icf_code, (area, subarea, confidence) in self.icf_to_ibic_map.items():
+            ibic.add(area, icf_code, subarea, confidence)
+            ibic.add(subarea, icf_code, subarea, confidence)
+
+        kva = ReverseIndex("KVÅ")
+        for icf_code, procedures in self.icf_to_kva_map.items():
+            description = self.icf_database.title(icf_code) or icf_code
+            for kva_code, _, confidence in procedures:
+                kva.add(kva_code, icf_code, description, confidence)
+
+        self.reverse_indexes: Dict[str, ReverseIndex] = {
+            index.source_system: index.freeze() for index in (bbic, ibic, kva)
+        }
+
+    def _reverse_to_icf(self, source_system: str, key: str) -> MappingResult:
+        entry = self.reverse_indexes[source_system].get(key)
+        if entry is None:
+            return MappingResult(
+                source_code=key,
+                target_system="ICF",
+                target_codes=[],
+                target_descriptions=[],
+                confidence=0.0,
+                warnings=[f"No ICF mapping found for {source_system} {key}"]
+            )
+        return MappingResult(
+            source_code=entry.key,
+            target_system="ICF",
+            target_codes=entry.codes,
+            target_descriptions=entry.descriptions,
+            confidence=entry.confidence,
+            mapping_path="reverse",
+            metadata={
+                "confidences": list(entry.confidences),
+                "min_confidence": entry.min_confidence,
+                "max_confidence": entry.max_confidence,
+            }
+        )
+
+    @memoized_mapping
+    def bbic_to_icf(self, bbic_domain: str) -> MappingResult:
+        """Map a BBIC dimension or subdimension back to ICF codes"""
+        return self._reverse_to_icf("BBIC", bbic_domain)
+
+    @memoized_mapping
+    def ibic_to_icf(self, ibic_area: str) -> MappingResult:
+        """Map an IBIC area or subarea back to ICF codes"""
+        return self._reverse_to_icf("IBIC", ibic_area)
+
+    @memoized_mapping
+    def kva_to_icf(self, kva_code: str) -> MappingResult:
+        """Map a KVÅ procedure code back to ICF codes"""
+        return self._reverse_to_icf("KVÅ", kva_code)
+
+    @memoized_mapping
     def icf_to_ksi(self, icf_code: str) -> MappingResult:
         """
         Map ICF code to KSI Target codes
         Confidence: 97% (KSI Axel 1 = ICF)
         """
         ksi_targets = self.icf_to_ksi_map.get(icf_code, [])
+        mapping_path = "direct"
+        mapped_via = None
 
         if not ksi_targets:
-            # Try parent code (e.g., b140 -> b1)
-            if len(icf_code) > 2:
-                parent = icf_code[:2]
-                ksi_targets = self.icf_to_ksi_map.get(parent, [])
+            # Nearest mapped ancestor in the ICF hierarchy (b1400 -> b140 -> ...)
+            row = self.icf_database.closest_row(icf_code)
+            mapped_row = self._ksi_mapped_rows[row] if row >= 0 else -1
+            if mapped_row >= 0:
+                mapped_via = self.icf_database.codes[mapped_row]
+                ksi_targets = self.icf_to_ksi_map[mapped_via]
+                mapping_path = "ancestor"
 
         target_descriptions = [
-            KSI_TARGET_NAMES.get(target, target.value)
+            self.ksi_titles.get(target, target)
             for target in ksi_targets
         ]
 
         return MappingResult(
             source_code=icf_code,
             target_system="KSI",
-            target_codes=[t.value for t in ksi_targets],
+            target_codes=ksi_targets,
             target_descriptions=target_descriptions,
             confidence=MappingConfidence.ICF_KSI.value,
-            mapping_path="direct",
+            mapping_path=mapping_path,
             metadata={
                 "mapping_type": "ICF Target to KSI Target (Axel 1)",
-                "note": "KSI Axel 1 uses ICF codes directly"
+                "note": "KSI Axel 1 uses ICF codes directly",
+                "mapped_via": mapped_via,
             }
         )
 
-    def ksi_to_icf(self, ksi_target: KSITarget) -> MappingResult:
+    @memoized_mapping
+    def ksi_to_icf(self, ksi_target: Union[KSITarget, str]) -> MappingResult:
         """
-        Map KSI Target to ICF codes
+        Map KSI Target (or catalogue action code) to ICF codes
         Confidence: 97% (exact mapping)
         """
-        icf_codes = self.ksi_to_icf_map.get(ksi_target, [])
+        ksi_code = ksi_target.value if isinstance(ksi_target, KSITarget) else ksi_target
+        icf_codes = self.ksi_to_icf_map.get(ksi_code, [])
 
-        target_descriptions = []
-        for icf_code in icf_codes:
-            icf_obj = self.icf_database.get(icf_code)
-            if icf_obj:
-                target_descriptions.append(icf_obj.name_sv)
-            else:
-                target_descriptions.append(icf_code)
+        target_descriptions = [
+            self.icf_database.title(icf_code) or icf_code
+            for icf_code in icf_codes
+        ]
 
         return MappingResult(
-            source_code=ksi_target.value,
+            source_code=ksi_code,
             target_system="ICF",
             target_codes=icf_codes,
             target_descriptions=target_descriptions,
@@ -194,6 +534,7 @@ class SemanticMappingEngine:
             }
         )
 
+    @memoized_mapping
     def icf_to_bbic(self, icf_code: str) -> MappingResult:
         """
         Map ICF to BBIC dimensions
@@ -239,6 +580,7 @@ class SemanticMappingEngine:
             }
         )
 
+    @memoized_mapping
     def icf_to_ibic(self, icf_code: str) -> MappingResult:
         """
         Map ICF to IBIC
@@ -267,6 +609,7 @@ class SemanticMappingEngine:
             }
         )
 
+    @memoized_mapping
     def icf_to_kva(self, icf_code: str) -> MappingResult:
         """
         Map ICF to KVÅ procedure codes
@@ -302,6 +645,7 @@ class SemanticMappingEngine:
             }
         )
 
+    @memoized_mapping
     def shanarri_to_icf(self, shanarri_domain: str) -> MappingResult:
         """
         Map SHANARRI/Behovskompassen domain to ICF codes
@@ -322,13 +666,7 @@ class SemanticMappingEngine:
         icf_codes = mapping["icf_codes"]
         confidence = mapping["confidence"]
 
-        descriptions = []
-        for code in icf_codes:
-            icf_obj = self.icf_database.get(code)
-            if icf_obj:
-                descriptions.append(icf_obj.name_sv)
-            else:
-                descriptions.append(code)
+        descriptions = [self.icf_database.title(code) or code for code in icf_codes]
 
         return MappingResult(
             source_code=shanarri_domain,
@@ -385,6 +723,134 @@ class SemanticMappingEngine:
             "KVÅ": self.icf_to_kva(icf_code),
         }
 
+    def _mapping_methods(self) -> Dict[Tuple[str, str], Callable[[str], MappingResult]]:
+        """(source system, target system) -> mapping method"""
+        return {
+            ("ICF", "KSI"): self.icf_to_ksi,
+            ("ICF", "BBIC"): self.icf_to_bbic,
+            ("ICF", "IBIC"): self.icf_to_ibic,
+            ("ICF", "KVÅ"): self.icf_to_kva,
+            ("KSI", "ICF"): self._ksi_code_to_icf,
+            ("BBIC", "ICF"): self.bbic_to_icf,
+            ("IBIC", "ICF"): self.ibic_to_icf,
+            ("KVÅ", "ICF"): self.kva_to_icf,
+            ("SHANARRI", "ICF"): self.shanarri_to_icf,
+        }
+
+    def _ksi_code_to_icf(self, ksi_code: str) -> MappingResult:
+        if ksi_code not in self.ksi_to_icf_map:
+            return MappingResult(
+                source_code=ksi_code,
+                target_system="ICF",
+                target_codes=[],
+                target_descriptions=[],
+                confidence=0.0,
+                warnings=[f"Unknown KSI target: {ksi_code}"]
+            )
+        return self.ksi_to_icf(ksi_code)
+
+    def map_to_systems(
+        self,
+        source_system: str,
+        code: str,
+        target_systems: Iterable[str]
+    ) -> Dict[str, MappingResult]:
+        """
+        Map one code from any supported source system to several targets
+        Unsupported system pairs yield an empty result with a warning
+        """
+        source = normalize_system(source_system)
+        results = {}
+        for target_system in target_systems:
+            target = normalize_system(target_system)
+            method = self.mapping_methods.get((source, target))
+            if method is None:
+                results[target] = MappingResult(
+                    source_code=code,
+                    target_system=target,
+                    target_codes=[],
+                    target_descriptions=[],
+                    confidence=0.0,
+                    warnings=[f"No mapping from {source} to {target}"]
+                )
+            else:
+                results[target] = method(code)
+        return results
+
+    def map_batch(
+        self,
+        items: Iterable[Tuple[str, str]],
+        target_systems: Iterable[str]
+    ) -> Iterator[Tuple[str, str, Dict[str, MappingResult]]]:
+        """
+        Map many (source_system, code) pairs to the given target systems
+        Repeated pairs are resolved once; yields in first-seen order
+        """
+        targets = list(dict.fromkeys(normalize_system(t) for t in target_systems))
+        seen = set()
+        for source_system, code in items:
+            key = (normalize_system(source_system), code)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield key[0], code, self.map_to_systems(key[0], code, targets)
+
+    def _intervention_table(self, school: bool) -> Dict[str, Tuple[InterventionSuggestion, ...]]:
+        """
+        Suggestion rows for every catalogue code in one context, resolved
+        once: KSI targets, actions, names and rationales are fixed per code
+        """
+        table = self._intervention_tables.get(school)
+        if table is not None:
+            return table
+        with self._intervention_lock:
+            table = self._intervention_tables.get(school)
+            if table is not None:
+                return table
+
+            # Uncached icf_to_ksi, so building the table does not evict hot results
+            icf_to_ksi = type(self).icf_to_ksi.__wrapped__
+            titles = self.icf_database.titles
+            table = {}
+            for row, code in enumerate(self.icf_database.codes):
+                ksi_mapping = icf_to_ksi(self, code)
+                if school:
+                    actions = SCHOOL_ACTIONS.get(code[:1], (KSIAction.AA,))
+                else:
+                    actions = GENERAL_ACTIONS
+                rows = tuple(
+                    InterventionSuggestion(
+                        icf_code=code,
+                        icf_name=titles[row],
+                        ksi_target=target.value,
+                        ksi_target_name=KSI_TARGET_NAMES.get(target, target.value),
+                        ksi_action=action.value,
+                        ksi_action_name=KSI_ACTION_NAMES.get(action, action.value),
+                        suggested_code=f"{target.value}-{action.value}",
+                        confidence=ksi_mapping.confidence,
+                        rationale=ACTION_RATIONALES.get(action, DEFAULT_RATIONALE),
+                    )
+                    for target in map(_KSI_TARGETS.get, ksi_mapping.target_codes)
+                    if target is not None
+                    for action in actions
+                )
+                if rows:
+                    table[code] = rows
+            self._intervention_tables[school] = table
+            return table
+
+    def intervention_rows(
+        self,
+        icf_codes: Iterable[str],
+        context: str = "school"
+    ) -> List[InterventionSuggestion]:
+        """Shared suggestion rows for ICF codes, in code order (unknown codes skipped)"""
+        table = self._intervention_table(context == "school")
+        rows: List[InterventionSuggestion] = []
+        for icf_code in icf_codes:
+            rows.extend(table.get(icf_code, ()))
+        return rows
+
     def suggest_interventions(
         self,
         icf_codes: List[str],
@@ -392,84 +858,39 @@ class SemanticMappingEngine:
     ) -> List[Dict[str, Any]]:
         """
         Suggest KSI interventions based on ICF codes
-        Returns list of suggested intervention configurations
+        Returns list of suggested intervention configurations (treat as read-only)
         """
-        suggestions = []
+        return [row.payload for row in self.intervention_rows(icf_codes, context)]
 
-        for icf_code in icf_codes:
-            icf_obj = self.icf_database.get(icf_code)
-            if not icf_obj:
-                continue
-
-            # Get KSI targets
-            ksi_mapping = self.icf_to_ksi(icf_code)
-
-            for ksi_target_str in ksi_mapping.target_codes:
-                try:
-                    ksi_target = KSITarget(ksi_target_str)
-                except ValueError:
+    def suggest_interventions_batch(
+        self,
+        students: Mapping[str, Iterable[str]],
+        context: str = "school"
+    ) -> Tuple[List[InterventionSuggestion], Dict[str, List[int]]]:
+        """
+        Suggestions for many students at once. Each distinct row is returned
+        once; students map to indexes into that list, in suggestion order.
+        """
+        table = self._intervention_table(context == "school")
+        suggestions: List[InterventionSuggestion] = []
+        positions: Dict[int, int] = {}
+        references: Dict[str, List[int]] = {}
+        for student_id, icf_codes in students.items():
+            indexes = []
+            seen = set()
+            for icf_code in icf_codes:
+                if icf_code in seen:
                     continue
-
-                # Suggest appropriate actions based on context
-                if context == "school":
-                    suggested_actions = self._suggest_school_actions(icf_obj, ksi_target)
-                else:
-                    suggested_actions = [KSIAction.AA, KSIAction.PM, KSIAction.RA]
-
-                for action in suggested_actions:
-                    suggestions.append({
-                        "icf_code": icf_code,
-                        "icf_name": icf_obj.name_sv,
-                        "ksi_target": ksi_target.value,
-                        "ksi_target_name": KSI_TARGET_NAMES.get(ksi_target, ksi_target.value),
-                        "ksi_action": action.value,
-                        "ksi_action_name": KSI_ACTION_NAMES.get(action, action.value),
-                        "suggested_code": f"{ksi_target.value}-{action.value}",
-                        "confidence": ksi_mapping.confidence,
-                        "rationale": self._get_action_rationale(icf_obj, action)
-                    })
-
-        return suggestions
-
-    def _suggest_school_actions(self, icf_obj: ICFCode, ksi_target: KSITarget) -> List[KSIAction]:
-        """Suggest appropriate KSI actions for school context"""
-        # For d-codes (activities), suggest pedagogical interventions
-        if icf_obj.component.value == "d":
-            return [
-                KSIAction.AA,  # Assessment first
-                KSIAction.PM,  # Teaching
-                KSIAction.RA,  # Compensatory support
-                KSIAction.PN,  # Advice
-            ]
-        # For b-codes (body functions), suggest assessment + support
-        elif icf_obj.component.value == "b":
-            return [
-                KSIAction.AA,  # Assessment
-                KSIAction.PH,  # Skills training
-                KSIAction.PU,  # Supportive conversation
-            ]
-        # For e-codes (environmental), suggest environment management
-        elif icf_obj.component.value == "e":
-            return [
-                KSIAction.SM,  # Environment management
-                KSIAction.RB,  # Practical support
-            ]
-        else:
-            return [KSIAction.AA]
-
-    def _get_action_rationale(self, icf_obj: ICFCode, action: KSIAction) -> str:
-        """Get rationale for suggested action"""
-        action_rationales = {
-            KSIAction.AA: "Bedömning behövs för att kartlägga omfattning",
-            KSIAction.PM: "Undervisning kan träna denna förmåga",
-            KSIAction.RA: "Kompensatoriskt stöd kan avhjälpa svårigheter",
-            KSIAction.PN: "Råd kan hjälpa eleven att utveckla strategier",
-            KSIAction.PH: "Färdighetsträning kan förbättra funktionen",
-            KSIAction.SM: "Miljöanpassning kan minska barriärer",
-            KSIAction.RB: "Praktiskt stöd kan underlätta vardagen",
-            KSIAction.PU: "Stödjande samtal kan bearbeta svårigheter",
-        }
-        return action_rationales.get(action, "Rekommenderad insats")
+                seen.add(icf_code)
+                for row in table.get(icf_code, ()):
+                    # Rows are shared per code, so identity is enough to de-duplicate
+                    position = positions.get(id(row))
+                    if position is None:
+                        position = positions[id(row)] = len(suggestions)
+                        suggestions.append(row)
+                    indexes.append(position)
+            references[student_id] = indexes
+        return suggestions, references
 
     def get_icf_core_set(self, condition: str) -> List[str]:
         """Get ICF Core Set for a specific condition"""
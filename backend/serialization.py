@@ -0,0 +1,34 @@
+"""
+JSON Serialisation
+Fast encoding for API responses and cached mapping results: orjson when
+installed, the standard library otherwise. Callers hand over JSON-ready
+data (dicts, lists, tuples, str/int/float/bool/None, Enums).
+"""
+
+import json
+from typing import Any, Iterable
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    """Parse UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def join_array(items: Iterable[bytes]) -> bytes:
+    """JSON array from already encoded elements"""
+    return b"[" + b",".join(items) + b"]"
+
@@ -0,0 +1,279 @@
+"""
+Terminology Snapshot
+Compiles the ICF, KSI and KVÅ TSV exports into one versioned binary file
+that workers memory-map at startup instead of parsing text.
+
+Layout (native byte order, recorded in the manifest):
+    8 bytes   magic b"SBSNAP\\0\\0"
+    4 bytes   manifest length (uint32)
+    N bytes   manifest (UTF-8 JSON): format version, byte order and per
+              table the source SHA-256, row count and column positions
+              (relative to the first 8-byte boundary after the manifest)
+    ...       per column: uint32 offsets array (rows + 1), then the UTF-8
+              string table; each section is 8-byte aligned
+
+Build with:  python -m backend.snapshot build
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional
+
+from .terminology import DATA_DIR, TERMINOLOGY_FILES, read_tsv_columns, terminology_path
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SBSNAP\0\0"
+FORMAT_VERSION = 1
+_ALIGN = 8
+
+SNAPSHOT_PATH = Path(
+    os.getenv("SEMANTIC_BRIDGE_SNAPSHOT", str(DATA_DIR / "terminology.snapshot"))
+)
+
+
+def file_sha256(path: Path) -> str:
+    """Hex SHA-256 of a file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SnapshotColumn(Sequence):
+    """
+    One string column inside a mapped snapshot.
+    Values are decoded on access; nothing is copied up front.
+    """
+
+    __slots__ = ("_offsets", "_blob")
+
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("snapshot column index out of range")
+        return str(self._blob[self._offsets[index] : self._offsets[index + 1]], "utf-8")
+
+    def __iter__(self):
+        offsets = self._offsets
+        blob = self._blob
+        start = offsets[0]
+        for i in range(1, len(offsets)):
+            end = offsets[i]
+            yield str(blob[start:end], "utf-8")
+            start = end
+
+
+class TerminologySnapshot:
+    """Read-only view over a memory-mapped snapshot file"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as handle:
+            # Shared, read-only mapping: workers on one host share the pages
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(self._mmap)
+        if bytes(view[:8]) != MAGIC:
+            raise ValueError(f"{path} is not a terminology snapshot")
+        (manifest_len,) = struct.unpack_from("=I", view, 8)
+        self.manifest = json.loads(bytes(view[12 : 12 + manifest_len]))
+        self._base = 12 + manifest_len + (-(12 + manifest_len) % _ALIGN)
+
+        if self.manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError("Unsupported snapshot format version")
+        if self.manifest.get("byteorder") != sys.byteorder:
+            raise ValueError("Snapshot was built for another byte order")
+
+        self._view = view
+
+    def table_names(self) -> List[str]:
+        return list(self.manifest["tables"])
+
+    def checksum(self, name: str) -> Optional[str]:
+        table = self.manifest["tables"].get(name)
+        return table["sha256"] if table else None
+
+    def table(self, name: str) -> Dict[str, SnapshotColumn]:
+        """Columns of one table, keyed by TSV header"""
+        table = self.manifest["tables"][name]
+        rows = table["rows"]
+        columns = {}
+        for column in table["columns"]:
+            start = self._base + column["offsets"]
+            offsets = self._view[start : start + 4 * (rows + 1)].cast("I")
+            start = self._base + column["blob"]
+            blob = self._view[start : start + column["size"]]
+            columns[column["name"]] = SnapshotColumn(offsets, blob)
+        return columns
+
+
+def _pad(buffer: bytearray) -> None:
+    buffer.extend(b"\0" * (-len(buffer) % _ALIGN))
+
+
+def build_snapshot(path: Path = SNAPSHOT_PATH) -> Dict[str, dict]:
+    """Compile all terminology TSVs into a snapshot file at path"""
+    sections = bytearray()
+    tables = {}
+
+    for name in TERMINOLOGY_FILES:
+        source = terminology_path(name)
+        columns = read_tsv_columns(source)
+        rows = len(next(iter(columns.values()), []))
+        layout = []
+        for header, values in columns.items():
+            encoded = [value.encode("utf-8") for value in values]
+            offsets = array("I", [0])
+            total = 0
+            for item in encoded:
+                total += len(item)
+                offsets.append(total)
+
+            offsets_at = len(sections)
+            sections.extend(offsets.tobytes())
+            _pad(sections)
+            blob_at = len(sections)
+            sections.extend(b"".join(encoded))
+            _pad(sections)
+            layout.append(
+                {"name": header, "offsets": offsets_at, "blob": blob_at, "size": total}
+            )
+
+        tables[name] = {
+            "source": source.name,
+            "sha256": file_sha256(source),
+            "rows": rows,
+            "columns": layout,
+        }
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "byteorder": sys.byteorder,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "tables": tables,
+    }
+
+    manifest_bytes = json.dumps(manifest).encode("utf-8")
+    header = bytearray(MAGIC + struct.pack("=I", len(manifest_bytes)) + manifest_bytes)
+    _pad(header)
+
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as handle:
+        handle.write(header)
+        handle.write(sections)
+    os.replace(tmp_path, path)
+    return tables
+
+
+_snapshot: Optional[TerminologySnapshot] = None
+_snapshot_checked = False
+
+
+def open_snapshot() -> Optional[TerminologySnapshot]:
+    """Process-wide snapshot, or None if missing or unreadable"""
+    global _snapshot, _snapshot_checked
+    if not _snapshot_checked:
+        _snapshot_checked = True
+        if SNAPSHOT_PATH.exists():
+            try:
+                _snapshot = TerminologySnapshot(SNAPSHOT_PATH)
+            except (OSError, ValueError) as exc:
+                logger.warning("Ignoring terminology snapshot %s: %s", SNAPSHOT_PATH, exc)
+    return _snapshot
+
+
+def load_terminology(name: str) -> Mapping[str, Sequence]:
+    """
+    Columns for a terminology, from the snapshot when it matches the TSV
+    checksum and from the TSV otherwise.
+    """
+    snapshot = open_snapshot()
+    if snapshot is not None and name in snapshot.manifest["tables"]:
+        source = terminology_path(name)
+        if not source.exists():
+            return snapshot.table(name)
+        if file_sha256(source) == snapshot.checksum(name):
+            return snapshot.table(name)
+        logger.warning("Terminology snapshot is stale for %s, parsing TSV", name)
+    return read_tsv_columns(terminology_path(name))
+
+
+_version: Optional[str] = None
+
+
+def terminology_version() -> str:
+    """
+    Short content hash over all terminology sources, used as the
+    reference-data version (e.g. in HTTP ETags). Computed once per process.
+    """
+    global _version
+    if _version is None:
+        snapshot = open_snapshot()
+        digest = hashlib.sha256()
+        for name in TERMINOLOGY_FILES:
+            source = terminology_path(name)
+            if source.exists():
+                checksum = file_sha256(source)
+            else:
+                checksum = (snapshot.checksum(name) if snapshot else None) or "missing"
+            digest.update(f"{name}:{checksum}\n".encode("utf-8"))
+        _version = digest.hexdigest()[:16]
+    return _version
+
+
+def reset_terminology_version() -> None:
+    """Recompute terminology_version on next use (after a reference-data reload)"""
+    global _version
+    _version = None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build or inspect the terminology snapshot")
+    parser.add_argument("command", choices=["build", "info"])
+    parser.add_argument("--output", type=Path, default=SNAPSHOT_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        started = time.perf_counter()
+        tables = build_snapshot(args.output)
+        elapsed = (time.perf_counter() - started) * 1000
+        for name, table in tables.items():
+            print(f"{name}: {table['rows']} rows from {table['source']}")
+        print(f"Wrote {args.output} ({args.output.stat().st_size} bytes) in {elapsed:.0f} ms")
+        return 0
+
+    snapshot = TerminologySnapshot(args.output)
+    print(f"Snapshot {args.output} built {snapshot.manifest['built_at']}")
+    for name in snapshot.table_names():
+        source = terminology_path(name)
+        current = file_sha256(source) if source.exists() else None
+        status = "ok" if current == snapshot.checksum(name) else "stale"
+        print(f"{name}: {snapshot.manifest['tables'][name]['rows']} rows, {status}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Student Columns
+Base for in-memory numpy views over per-student rows of a profile store
+table. A view loads the table once and then follows the store: writes mark
+their students dirty, and the next query reloads only those students.
+Rows are kept sorted by (student, time) with per-student offsets.
+"""
+
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple, Type
+
+import numpy as np
+
+from .profile_store import ProfileStore, sql_time
+
+
+def to_datetime64(value: Any) -> Optional[np.datetime64]:
+    """Query bound in the views' time base (UTC, naive taken as UTC)"""
+    return np.datetime64(sql_time(value), "s") if value is not None else None
+
+
+def store_times(texts: Sequence[str]) -> np.ndarray:
+    """Store time text (UTC ISO) to datetime64[s]"""
+    return np.array(texts, dtype="datetime64[us]").astype("datetime64[s]")
+
+
+class StudentColumnsView:
+    """
+    Subclasses set table and Columns (a NamedTuple with student, time, their
+    own columns and offsets) and implement _fetch and _convert.
+    """
+
+    table: str = ""
+    Columns: Type[NamedTuple]
+
+    def __init__(self, store: ProfileStore):
+        self.store = store
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty: Set[str] = set()
+        self.student_ids: List[str] = []
+        self.student_index: Dict[str, int] = {}
+        # Replaced as a whole, so queries never see a half-updated view
+        self.columns = self._build(self._convert([]))
+        store.add_listener(self._on_change)
+
+    def _fetch(self, student_ids: Optional[List[str]]) -> List[tuple]:
+        """Store rows for all students (None) or the given ones"""
+        raise NotImplementedError
+
+    def _convert(self, rows: List[tuple]) -> Dict[str, np.ndarray]:
+        """Arrays per column for fetched rows, "student" and "time" included"""
+        raise NotImplementedError
+
+    def _on_change(self, table: str, student_ids: Set[str]) -> None:
+        if table == self.table:
+            with self._lock:
+                self._dirty |= student_ids
+
+    def student_positions(self, student_ids: Sequence[str]) -> np.ndarray:
+        """Row index per student id, assigning new ones (call under refresh)"""
+        index = self.student_index
+        positions = np.empty(len(student_ids), dtype=np.int32)
+        for i, student_id in enumerate(student_ids):
+            position = index.get(student_id)
+            if position is None:
+                position = index[student_id] = len(self.student_ids)
+                self.student_ids.append(student_id)
+            positions[i] = position
+        return positions
+
+    def known_positions(self, student_ids: Sequence[str]) -> np.ndarray:
+        """Positions of the given students that have rows (unknown ids skipped)"""
+        index = self.student_index
+        return np.asarray(
+            [index[student_id] for student_id in student_ids if student_id in index],
+            dtype=np.int32,
+        )
+
+    def _build(self, arrays: Dict[str, np.ndarray]) -> Any:
+        order = np.lexsort((arrays["time"], arrays["student"]))
+        arrays = {name: values[order] for name, values in arrays.items()}
+        offsets = np.searchsorted(arrays["student"], np.arange(len(self.student_ids) + 1))
+        return self.Columns(offsets=offsets, **arrays)
+
+    def refresh(self) -> Any:
+        """Load on first use, then reload students written since the last query"""
+        with self._lock:
+            if self._loaded and not self._dirty:
+                return self.columns
+            if not self._loaded:
+                self._dirty.clear()
+                arrays = self._convert(self._fetch(None))
+            else:
+                dirty = sorted(self._dirty)
+                self._dirty.clear()
+                fresh = self._convert(self._fetch(dirty))
+                current = self.columns._asdict()
+                current.pop("offsets")
+                keep = ~np.isin(current["student"], self.known_positions(dirty))
+                arrays = {
+                    name: np.concatenate([values[keep], fresh[name]])
+                    for name, values in current.items()
+                }
+            self.columns = self._build(arrays)
+            self._loaded = True
+            return self.columns
+
+    def __len__(self) -> int:
+        return len(self.refresh().student)
+
+    def student_rows(
+        self,
+        student_id: str,
+        date_from: Optional[np.datetime64] = None,
+        date_to: Optional[np.datetime64] = None,
+    ) -> Optional[Tuple[Any, slice]]:
+        """
+        Current columns and the row slice of one student within [date_from,
+        date_to), or None if the student has no rows. A student's rows are
+        sorted by time, so the range is two binary searches.
+        """
+        columns = self.refresh()
+        position = self.student_index.get(student_id)
+        if position is None or position + 1 >= len(columns.offsets):
+            return None
+        start, stop = int(columns.offsets[position]), int(columns.offsets[position + 1])
+        if start == stop:
+            return None
+        times = columns.time[start:stop]
+        low = int(np.searchsorted(times, date_from)) if date_from is not None else 0
+        high = int(np.searchsorted(times, date_to)) if date_to is not None else len(times)
+        return columns, slice(start + low, start + high)
@@ -0,0 +1,527 @@
+"""
+Survey Ingest
+Bulk ingest of Gävlemodellen survey exports (v.12/v.42 waves), as NDJSON
+(one SurveyResponse per line) or CSV (one column per SHANARRI domain, plus
+q:<question_id> and freetext:<question_id> columns). The upload is read
+incrementally; each batch is validated with a plain validator for the
+SurveyResponse shape (no pydantic model per row), stored with one bulk
+insert and its free-text answers queued for ICF analysis. Rows that fail
+validation are reported by line number and skipped.
+
+Command line (writes straight to the profile database, so a running
+server's in-memory views only see the rows after a restart; ingest through
+POST /api/v1/surveys/ingest on a live server):
+
+    python -m backend.survey_ingest export.csv --errors errors.ndjson
+"""
+
+import argparse
+import asyncio
+import csv
+import logging
+import sys
+import time
+from concurrent.futures import BrokenExecutor
+from contextlib import suppress
+from datetime import datetime
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from .bulk_analysis import BULK_CHUNK_SIZE, ndjson_lines
+from .profile_store import (
+    DOMAIN_COLUMNS,
+    PROFILE_DB_PATH,
+    ProfileStore,
+    SurveyEntry,
+    freetext_answers,
+    get_profile_store,
+    survey_values,
+)
+from .serialization import dumps, loads
+from .workers import PoolSaturated, WorkerPool, analyze_notes_chunk
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("ndjson", "csv")
+
+# Records per validation and insert batch
+BATCH_SIZE = 1000
+
+CSV_FIELDS = ("survey_id", "student_id", "survey_date", "survey_period")
+QUESTION_PREFIX = "q:"
+FREETEXT_PREFIX = "freetext:"
+
+_DOMAINS = frozenset(DOMAIN_COLUMNS)
+
+# (line number, record, error): record is None when the line already failed
+Item = Tuple[int, Optional[dict], Optional[str]]
+
+
+def _text(record: dict, field: str) -> str:
+    value = record.get(field)
+    if not isinstance(value, str):
+        raise ValueError(f"{field}: expected a string")
+    return value
+
+
+def _number(value: Any, field: str) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    raise ValueError(f"{field}: expected a number")
+
+
+def _datetime(value: Any, field: str) -> datetime:
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    raise ValueError(f"{field}: expected an ISO 8601 date")
+
+
+def _objects(value: Any, field: str) -> List[dict]:
+    if not isinstance(value, list) or not all(isinstance(item, dict) for item in value):
+        raise ValueError(f"{field}: expected a list of objects")
+    return value
+
+
+def validate_survey(record: Any) -> SurveyEntry:
+    """
+    Store row and free-text answers for one record in the SurveyResponse
+    shape, with the same checks and the same stored JSON as the model.
+    Raises ValueError naming the first invalid field.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("expected a JSON object")
+    survey_id = _text(record, "survey_id")
+    student_id = _text(record, "student_id")
+    survey_period = _text(record, "survey_period")
+    survey_date = _datetime(record.get("survey_date"), "survey_date")
+
+    domain_scores = record.get("domain_scores")
+    if not isinstance(domain_scores, dict):
+        raise ValueError("domain_scores: expected an object")
+    scores = {}
+    for domain, score in domain_scores.items():
+        if domain not in _DOMAINS:
+            raise ValueError(f"domain_scores: unknown domain {domain!r}")
+        scores[domain] = _number(score, f"domain_scores.{domain}")
+
+    questions = _objects(record.get("question_responses"), "question_responses")
+    freetext = _objects(record.get("freetext_responses", []), "freetext_responses")
+    for answer in freetext:
+        if not all(isinstance(value, str) for value in answer.values()):
+            raise ValueError("freetext_responses: expected string values")
+    ai_analysis = record.get("ai_analysis")
+    if ai_analysis is not None and not isinstance(ai_analysis, dict):
+        raise ValueError("ai_analysis: expected an object")
+
+    body = dumps(
+        {
+            "survey_id": survey_id,
+            "student_id": student_id,
+            # Formatted as pydantic does, so bulk and single writes match
+            "survey_date": survey_date.isoformat().replace("+00:00", "Z"),
+            "survey_period": survey_period,
+            "domain_scores": scores,
+            "question_responses": questions,
+            "freetext_responses": freetext,
+            "ai_analysis": ai_analysis,
+        }
+    )
+    row = survey_values(student_id, survey_id, survey_date, survey_period, scores, body)
+    return row, [] if ai_analysis else freetext_answers(freetext)
+
+
+class CsvSurveys:
+    """Builds SurveyResponse-shaped records from CSV rows with a given header"""
+
+    def __init__(self, header: Sequence[str]):
+        columns = [name.strip() for name in header]
+        missing = [field for field in CSV_FIELDS if field not in columns]
+        if missing:
+            raise ValueError(f"Missing CSV columns: {', '.join(missing)}")
+        self.width = len(columns)
+        self.fields = [(field, columns.index(field)) for field in CSV_FIELDS]
+        self.domains = [(name, i) for i, name in enumerate(columns) if name in _DOMAINS]
+        self.questions = [
+            (name[len(QUESTION_PREFIX) :], i)
+            for i, name in enumerate(columns)
+            if name.startswith(QUESTION_PREFIX)
+        ]
+        self.freetext = [
+            (name[len(FREETEXT_PREFIX) :], i)
+            for i, name in enumerate(columns)
+            if name.startswith(FREETEXT_PREFIX)
+        ]
+
+    @staticmethod
+    def _number(value: str, column: str) -> float:
+        # Swedish exports write decimal commas
+        return _number(value.strip().replace(",", "."), column)
+
+    def record(self, values: Sequence[str]) -> dict:
+        if len(values) != self.width:
+            raise ValueError(f"Expected {self.width} columns, got {len(values)}")
+        record: Dict[str, Any] = {field: values[i].strip() for field, i in self.fields}
+        record["domain_scores"] = {
+            domain: self._number(values[i], domain)
+            for domain, i in self.domains
+            if values[i].strip()
+        }
+        questions = []
+        for question_id, i in self.questions:
+            value = values[i].strip()
+            if value:
+                try:
+                    answer: Any = self._number(value, question_id)
+                except ValueError:
+                    answer = value
+                questions.append({"question_id": question_id, "score": answer})
+        record["question_responses"] = questions
+        record["freetext_responses"] = [
+            {"question_id": question_id, "response": values[i]}
+            for question_id, i in self.freetext
+            if values[i].strip()
+        ]
+        return record
+
+
+async def ndjson_records(body: AsyncIterable[bytes]) -> AsyncIterator[Item]:
+    async for line_no, line in ndjson_lines(body):
+        if line is None:
+            yield line_no, None, "Line too long"
+            continue
+        try:
+            yield line_no, loads(line), None
+        except ValueError:
+            yield line_no, None, "Invalid JSON"
+
+
+async def csv_records(body: AsyncIterable[bytes]) -> AsyncIterator[Item]:
+    """
+    Records from CSV with a header row; comma or semicolon separated (taken
+    from the header). A quoted field may span lines.
+    """
+    surveys: Optional[CsvSurveys] = None
+    delimiter = ","
+    pending: List[str] = []
+    start = 0
+    async for line_no, line in ndjson_lines(body, keep_blank=True):
+        if line is None:
+            pending = []
+            yield line_no, None, "Line too long"
+            continue
+        text = line.decode("utf-8", errors="replace").rstrip("\r")
+        if not pending:
+            start = line_no
+            if not text.strip():
+                continue
+        pending.append(text)
+        # An odd number of quotes so far means a quoted field continues
+        if sum(part.count('"') for part in pending) % 2:
+            continue
+        row = "\n".join(pending)
+        pending = []
+        if surveys is None:
+            row = row.lstrip("﻿")
+            delimiter = ";" if row.count(";") > row.count(",") else ","
+            try:
+                surveys = CsvSurveys(next(csv.reader([row], delimiter=delimiter)))
+            except ValueError as exc:
+                yield start, None, str(exc)
+                return
+            continue
+        values = next(csv.reader([row], delimiter=delimiter))
+        try:
+            yield start, surveys.record(values), None
+        except ValueError as exc:
+            yield start, None, str(exc)
+    if pending:
+        yield start, None, "Unterminated quoted field"
+
+
+class SurveyIngest:
+    """Validates and stores batches of records, keeping progress counts"""
+
+    def __init__(self, store: ProfileStore, on_queued: Optional[Callable[[], None]] = None):
+        self.store = store
+        self.on_queued = on_queued
+        self.started = time.perf_counter()
+        self.rows = 0
+        self.stored = 0
+        self.failed = 0
+        self.queued = 0
+
+    def ingest_batch(self, batch: Sequence[Item]) -> List[dict]:
+        """Store the valid records of a batch; returns {"line", "error"} per failed row"""
+        errors = []
+        surveys = []
+        for line_no, record, error in batch:
+            if error is None:
+                try:
+                    surveys.append(validate_survey(record))
+                except ValueError as exc:
+                    error = str(exc)
+            if error is not None:
+                errors.append({"line": line_no, "error": error})
+        if surveys:
+            self.store.put_surveys(surveys)
+        queued = sum(len(answers) for _, answers in surveys)
+        self.rows += len(batch)
+        self.stored += len(surveys)
+        self.failed += len(errors)
+        self.queued += queued
+        if queued and self.on_queued is not None:
+            self.on_queued()
+        return errors
+
+    def progress(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "rows": self.rows,
+            "stored": self.stored,
+            "failed": self.failed,
+            "freetext_queued": self.queued,
+            "elapsed_s": round(elapsed, 3),
+            "rows_per_s": round(self.rows / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+
+async def ingest_stream(
+    body: AsyncIterable[bytes],
+    input_format: str,
+    ingest: SurveyIngest,
+    batch_size: int = BATCH_SIZE,
+) -> AsyncIterator[Tuple[List[dict], dict]]:
+    """
+    Ingest an upload batch by batch, yielding (row errors, progress) after
+    each. Batches are validated and stored in a thread, so the event loop
+    keeps serving while a large upload is written.
+    """
+    records = csv_records(body) if input_format == "csv" else ndjson_records(body)
+    batch: List[Item] = []
+    async for item in records:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            errors = await asyncio.to_thread(ingest.ingest_batch, batch)
+            yield errors, ingest.progress()
+            batch = []
+    if batch:
+        errors = await asyncio.to_thread(ingest.ingest_batch, batch)
+        yield errors, ingest.progress()
+
+
+# Free-text analysis
+
+# Seconds before retrying after the pool or the store failed
+FREETEXT_RETRY_S = 5.0
+
+
+class FreetextWorker:
+    """
+    Drains the free-text queue in the background. Chunks of queued answers
+    are analysed in the WorkerPool (analyze_notes_chunk, as bulk text
+    uploads are), one chunk at a time and only when a pool slot is free, so
+    the analysis does not compete with request handling. An answer whose
+    analysis fails on its own is logged and dequeued without suggestions;
+    pool or store failures keep the queue and are retried.
+    """
+
+    def __init__(
+        self,
+        pool: WorkerPool,
+        store: Optional[ProfileStore] = None,
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ):
+        self.pool = pool
+        self._store = store
+        self.chunk_size = chunk_size
+        self.skipped = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    @property
+    def store(self) -> ProfileStore:
+        """The given store, or the process-wide one"""
+        return self._store if self._store is not None else get_profile_store()
+
+    def start(self) -> None:
+        """Start on the running event loop; answers queued earlier are drained first"""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._wake.set()
+        self._task = self._loop.create_task(self._run())
+
+    def notify(self) -> None:
+        """Wake the worker after answers were queued; safe from any thread"""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake.set)
+
+    async def stop(self) -> None:
+        task, self._task, self._loop = self._task, None, None
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            try:
+                await self.drain()
+            except Exception:
+                logger.exception("Free-text analysis failed; queued answers are kept")
+                await asyncio.sleep(FREETEXT_RETRY_S)
+                self._wake.set()
+
+    async def drain(self) -> int:
+        """Analyse queued answers until the queue is empty; returns how many"""
+        total = 0
+        while True:
+            entries = await asyncio.to_thread(self.store.queued_freetext, self.chunk_size)
+            if not entries:
+                return total
+            suggestions = await self._analyze(entries)
+            await asyncio.to_thread(self.store.complete_freetext, entries, suggestions)
+            total += len(entries)
+
+    async def _analyze(self, entries: List[tuple]) -> List[Optional[List[dict]]]:
+        """Suggestions per entry, None for entries whose analysis fails"""
+        try:
+            return await self._run_chunk(entries)
+        except BrokenExecutor:
+            raise
+        except Exception:
+            if len(entries) > 1:
+                # Retry one by one so only the failing answers are skipped
+                results: List[Optional[List[dict]]] = []
+                for entry in entries:
+                    results.extend(await self._analyze([entry]))
+                return results
+            _, student_id, survey_id, question_id, _ = entries[0]
+            logger.exception(
+                "Skipping free-text answer %s of survey %s (student %s)",
+                question_id,
+                survey_id,
+                student_id,
+            )
+            self.skipped += 1
+            return [None]
+
+    async def _run_chunk(self, entries: List[tuple]) -> List[Optional[List[dict]]]:
+        notes = [{"id": entry[0], "text": entry[4]} for entry in entries]
+        while True:
+            try:
+                lease = self.pool.acquire()
+            except PoolSaturated as exc:
+                # Requests go first; try again when slots have freed up
+                await asyncio.sleep(exc.retry_after)
+                continue
+            try:
+                encoded = await self.pool.run(analyze_notes_chunk, notes)
+            finally:
+                lease.release()
+            return [loads(line)["icf_suggestions"] for line in encoded.splitlines()]
+
+
+# Command line
+
+
+async def _file_chunks(path: Path, size: int = 1 << 16) -> AsyncIterator[bytes]:
+    with (sys.stdin.buffer if str(path) == "-" else open(path, "rb")) as source:
+        while True:
+            chunk = source.read(size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.survey_ingest",
+        description="Ingest a survey export (NDJSON or CSV) into the profile database",
+    )
+    parser.add_argument("path", type=Path, help="export file, or - for stdin")
+    parser.add_argument(
+        "--format", choices=FORMATS, help="default: csv for .csv files, else ndjson"
+    )
+    parser.add_argument("--db", default=PROFILE_DB_PATH, help="profile database file")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--errors", type=Path, help="write row errors here as NDJSON")
+    parser.add_argument(
+        "--analyze", action="store_true", help="run ICF analysis of queued free text before exiting"
+    )
+    args = parser.parse_args(argv)
+    input_format = args.format or ("csv" if args.path.suffix.lower() == ".csv" else "ndjson")
+
+    store = ProfileStore(args.db)
+    ingest = SurveyIngest(store)
+    errors_out = open(args.errors, "wb") if args.errors else None
+    shown = 0
+
+    async def run() -> None:
+        nonlocal shown
+        async for errors, progress in ingest_stream(
+            _file_chunks(args.path), input_format, ingest, args.batch_size
+        ):
+            for error in errors:
+                if errors_out is not None:
+                    errors_out.write(dumps(error) + b"\n")
+                elif shown < 20:
+                    shown += 1
+                    print(f"\nline {error['line']}: {error['error']}", file=sys.stderr)
+            print(
+                f"\r{progress['rows']} rows, {progress['stored']} stored, "
+                f"{progress['failed']} failed, {progress['rows_per_s']:.0f} rows/s",
+                end="",
+                file=sys.stderr,
+            )
+
+    try:
+        asyncio.run(run())
+    finally:
+        if errors_out is not None:
+            errors_out.close()
+    summary = ingest.progress()
+    print(
+        f"\nStored {summary['stored']} of {summary['rows']} rows in {summary['elapsed_s']:.1f} s "
+        f"({summary['failed']} failed, {summary['freetext_queued']} free-text answers queued)",
+        file=sys.stderr,
+    )
+
+    if args.analyze:
+        pool = WorkerPool.from_env()
+        pool.start()
+        worker = FreetextWorker(pool, store)
+        try:
+            analysed = asyncio.run(worker.drain())
+        finally:
+            pool.shutdown()
+        print(
+            f"Analysed {analysed} free-text answers ({worker.skipped} skipped)", file=sys.stderr
+        )
+    store.close()
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
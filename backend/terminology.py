@@ -0,0 +1,53 @@
+"""
+Terminology data files
+Locates and reads the Socialstyrelsen TSV exports in data/
+"""
+
+import csv
+import os
+from pathlib import Path
+from typing import Dict, List
+
+
+DATA_DIR = Path(
+    os.getenv(
+        "SEMANTIC_BRIDGE_DATA_DIR",
+        str(Path(__file__).resolve().parent.parent / "data"),
+    )
+)
+
+# Source files per terminology (tab-separated, quoted, UTF-8)
+TERMINOLOGY_FILES = {
+    "icf": "icf.tsv",
+    "ksi": "ksi.tsv",
+    "kva": "kva-medicinska-atgarder-kma.tsv",
+}
+
+
+def terminology_path(name: str) -> Path:
+    """Absolute path to the TSV export for a terminology"""
+    return DATA_DIR / TERMINOLOGY_FILES[name]
+
+
+def read_tsv_columns(path: Path) -> Dict[str, List[str]]:
+    """
+    Read a TSV export column-wise.
+    Returns {header: [value per row]} with surrounding whitespace stripped,
+    so callers index columns instead of building one dict per row.
+    """
+    with open(path, encoding="utf-8-sig", newline="") as handle:
+        rows = list(csv.reader(handle, delimiter="\t"))
+
+    if not rows:
+        return {}
+
+    header = [name.strip() for name in rows[0]]
+    body = [row for row in rows[1:] if row and row[0].strip()]
+    if not body:
+        return {name: [] for name in header}
+
+    columns = zip(*(row + [""] * (len(header) - len(row)) for row in body))
+    return {
+        name: [value.strip() for value in column]
+        for name, column in zip(header, columns)
+    }
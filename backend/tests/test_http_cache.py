@@ -0,0 +1,53 @@
+"""
+ResponseCacheMiddleware: conditional GETs with and without a cached entry
+"""
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from backend.http_cache import ResponseCache, ResponseCacheMiddleware
+
+
+@pytest.fixture
+def app():
+    calls = []
+
+    async def code(request):
+        calls.append(request.url.path)
+        return JSONResponse({"code": "b140"})
+
+    app = Starlette(routes=[Route("/codes/b140", code)])
+    cache = ResponseCache()
+    app.add_middleware(ResponseCacheMiddleware, prefixes=["/codes/"], cache=cache)
+    app.state.calls = calls
+    app.state.cache = cache
+    return app
+
+
+def test_repeat_request_is_served_from_cache(app):
+    client = TestClient(app)
+    first = client.get("/codes/b140")
+    second = client.get("/codes/b140")
+    assert second.content == first.content
+    assert second.headers["etag"] == first.headers["etag"]
+    assert app.state.calls == ["/codes/b140"]
+
+
+def test_current_etag_is_not_modified_after_clear(app):
+    client = TestClient(app)
+    etag = client.get("/codes/b140").headers["etag"]
+    app.state.cache.clear()
+    response = client.get("/codes/b140", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert app.state.calls == ["/codes/b140"]
+
+
+def test_stale_etag_gets_the_body(app):
+    client = TestClient(app)
+    response = client.get("/codes/b140", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+    assert response.json() == {"code": "b140"}
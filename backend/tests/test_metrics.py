@@ -0,0 +1,63 @@
+"""
+Engine instrumentation: timing of plain and generator methods
+"""
+
+import time
+
+import pytest
+
+from backend.metrics import MetricsRegistry, instrument_engine
+
+STEP_S = 0.02
+
+
+class Engine:
+    def icf_to_bbic(self, code):
+        time.sleep(STEP_S)
+        return code
+
+    def map_batch(self, pairs, target_systems):
+        for pair in pairs:
+            time.sleep(STEP_S)
+            yield pair
+
+    def _mapping_methods(self):
+        return {}
+
+
+@pytest.fixture
+def timings():
+    registry = MetricsRegistry()
+    engine = Engine()
+    instrument_engine(engine, registry, methods=("icf_to_bbic", "map_batch"))
+    histogram = registry.histogram("semantic_bridge_engine_duration_seconds", "")
+    counter = registry.counter("semantic_bridge_engine_calls_total", "")
+
+    def seconds(method):
+        return histogram._series[(method,)][-1]
+
+    return engine, seconds, counter
+
+
+def test_plain_method_is_timed(timings):
+    engine, seconds, _ = timings
+    assert engine.icf_to_bbic("b140") == "b140"
+    assert seconds("icf_to_bbic") >= STEP_S
+
+
+def test_generator_is_timed_until_exhausted(timings):
+    engine, seconds, counter = timings
+    items = engine.map_batch([("icf", "b140"), ("icf", "d160"), ("icf", "b134")], ["bbic"])
+    for _ in items:
+        # The caller's own work between items is not counted
+        time.sleep(2 * STEP_S)
+    assert 3 * STEP_S <= seconds("map_batch") < 6 * STEP_S
+    assert counter._values[("map_batch",)] == 1
+
+
+def test_closed_generator_is_recorded(timings):
+    engine, seconds, _ = timings
+    items = engine.map_batch([("icf", "b140"), ("icf", "d160")], ["bbic"])
+    next(items)
+    items.close()
+    assert seconds("map_batch") >= STEP_S
@@ -0,0 +1,144 @@
+"""
+ProfileStore in-process (SQLite :memory:): record ownership across students
+"""
+
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+from backend.gap_analysis import QualifierExtents
+from backend.icf_models import ICFFunctionDescription
+from backend.intervention_models import (
+    PDCARecord,
+    SpiderChartData,
+    SupportIntervention,
+    WelfareProfile,
+)
+from backend.profile_store import SCHEMA_VERSION, ProfileStore, RecordConflict
+from backend.serialization import loads
+
+WHEN = datetime(2025, 3, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def store():
+    store = ProfileStore(":memory:")
+    yield store
+    store.close()
+
+
+def pdca(student_id, record_id="pdca-1", phase="Plan"):
+    return PDCARecord(
+        id=record_id,
+        student_id=student_id,
+        shanarri_domain="utvecklas",
+        phase=phase,
+        timestamp=WHEN,
+        documented_by="Mentor",
+    )
+
+
+def icf_function(student_id, function_id="func-1", extent="2"):
+    return ICFFunctionDescription(
+        id=function_id,
+        student_id=student_id,
+        icf_chapter="b1",
+        icf_code="b140",
+        function_name="Uppmärksamhetsfunktioner",
+        qualifier_extent=extent,
+        documented_by_role="Specialpedagog",
+        assessment_date=WHEN,
+        confidence=0.9,
+    )
+
+
+def intervention(student_id, intervention_id="int-1", icf_codes=("b140",)):
+    return SupportIntervention(
+        id=intervention_id,
+        student_id=student_id,
+        ksi_code="SA1-AA-1",
+        ksi_target="SA1",
+        ksi_action="AA",
+        ksi_status="1",
+        icf_codes=list(icf_codes),
+        description_structured={},
+        source="teacher_observation",
+        start_date=WHEN,
+        documented_by="Mentor",
+        responsible_roles=["Mentor"],
+        confidence=0.8,
+    )
+
+
+def test_same_student_replaces_record(store):
+    store.put_pdca_record(pdca("A"))
+    store.put_pdca_record(pdca("A", phase="Do"))
+    assert loads(store.get_pdca_record("A", "pdca-1"))["phase"] == "Do"
+
+
+@pytest.mark.parametrize(
+    "put, make, get",
+    [
+        ("put_pdca_record", pdca, "get_pdca_record"),
+        ("put_icf_function", icf_function, "get_icf_function"),
+        ("put_intervention", intervention, "get_intervention"),
+    ],
+)
+def test_id_of_another_student_is_rejected(store, put, make, get):
+    first = make("A")
+    getattr(store, put)(first)
+    notified = []
+    store.add_listener(lambda table, students: notified.append(students))
+    with pytest.raises(RecordConflict):
+        getattr(store, put)(make("B"))
+    assert getattr(store, get)("A", first.id) is not None
+    assert getattr(store, get)("B", first.id) is None
+    assert notified == []
+
+
+def test_intervention_conflict_keeps_icf_links(store):
+    store.put_intervention(intervention("A", icf_codes=["b140"]))
+    with pytest.raises(RecordConflict):
+        store.put_intervention(intervention("B", icf_codes=["d160"]))
+    page, _ = store.list_interventions(icf_code="b140")
+    assert [loads(body)["student_id"] for body in page] == ["A"]
+    assert store.list_interventions(icf_code="d160")[0] == []
+
+
+def test_profile_with_taken_id_is_rolled_back(store):
+    store.put_pdca_record(pdca("A"))
+    profile = WelfareProfile(
+        student_id="B",
+        created_at=WHEN,
+        updated_at=WHEN,
+        current_wellbeing=SpiderChartData(
+            student_id="B", timestamp=WHEN, source="v.12", scores={"trygghet": 7.0}
+        ),
+        pdca_records=[pdca("B")],
+    )
+    with pytest.raises(RecordConflict):
+        store.put_profile(profile)
+    assert store.get_profile("B") is None
+    assert store.get_pdca_record("A", "pdca-1") is not None
+
+
+def test_views_keep_the_owner_row(store):
+    extents = QualifierExtents(store)
+    store.put_icf_function(icf_function("A", extent="3"))
+    assert len(extents) == 1
+    with pytest.raises(RecordConflict):
+        store.put_icf_function(icf_function("B", extent="1"))
+    columns = extents.refresh()
+    assert [extents.student_ids[i] for i in columns.student] == ["A"]
+    assert columns.extent.tolist() == [3]
+
+
+def test_schema_version_is_set_and_checked(tmp_path):
+    path = str(tmp_path / "profiles.sqlite3")
+    ProfileStore(path).close()
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION + 1}")
+    with pytest.raises(RuntimeError):
+        ProfileStore(path)
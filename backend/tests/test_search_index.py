@@ -0,0 +1,35 @@
+"""
+Ranking of the catalogue search index
+"""
+
+import pytest
+
+from backend.search_index import get_search_index
+
+
+@pytest.fixture(scope="module")
+def index():
+    return get_search_index()
+
+
+def codes(index, query, **kwargs):
+    return [index.codes[doc] for doc, _ in index.search(query, **kwargs)]
+
+
+@pytest.mark.parametrize("query", ["b140", "d160", "TA1"])
+def test_exact_code_ranks_above_its_children(index, query):
+    assert codes(index, query, limit=5)[0] == query
+
+
+def test_exact_code_respects_system_filter(index):
+    assert "b140" not in codes(index, "b140", systems=["kva"])
+
+
+def test_prefix_does_not_cross_folded_diacritics(index):
+    # 'öron' folds to 'oron', a prefix match for 'oro' (worry)
+    titles = [index.titles[doc].lower() for doc, _ in index.search("oro", limit=10)]
+    assert not any("öron" in title for title in titles)
+
+
+def test_exact_term_outranks_prefix_matches(index):
+    assert codes(index, "oro", limit=1) == ["QA009"]
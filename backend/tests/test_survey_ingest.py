@@ -0,0 +1,54 @@
+"""
+FreetextWorker in-process (WorkerPool without processes, SQLite :memory:)
+"""
+
+import asyncio
+
+import pytest
+
+from backend import survey_ingest
+from backend.profile_store import ProfileStore
+from backend.serialization import loads
+from backend.survey_ingest import FreetextWorker, validate_survey
+from backend.workers import WorkerPool, analyze_notes_chunk
+
+
+def survey(survey_id, text):
+    return validate_survey(
+        {
+            "survey_id": survey_id,
+            "student_id": "A",
+            "survey_date": "2024-11-01T00:00:00Z",
+            "survey_period": "v.42",
+            "domain_scores": {"trygghet": 8},
+            "question_responses": [],
+            "freetext_responses": [{"question_id": "f1", "response": text}],
+        }
+    )
+
+
+@pytest.fixture
+def store():
+    store = ProfileStore(":memory:")
+    yield store
+    store.close()
+
+
+def test_failing_answer_is_skipped(store, monkeypatch):
+    def analyze(notes):
+        if any(note["text"] == "fails" for note in notes):
+            raise RuntimeError("analysis failed")
+        return analyze_notes_chunk(notes)
+
+    monkeypatch.setattr(survey_ingest, "analyze_notes_chunk", analyze)
+    texts = ["Sover dåligt och är trött", "fails", "Har svårt att räkna"]
+    store.put_surveys([survey(f"s{i}", text) for i, text in enumerate(texts)])
+    worker = FreetextWorker(WorkerPool(workers=0, max_pending=1), store, chunk_size=2)
+
+    assert asyncio.run(worker.drain()) == 3
+    assert worker.skipped == 1
+    assert store.freetext_backlog() == 0
+    analysis = [loads(store.get_survey("A", f"s{i}"))["ai_analysis"] for i in range(3)]
+    assert analysis[1] is None
+    assert analysis[0]["icf_suggestions"][0]["code"].startswith("b13")
+    assert analysis[2]["icf_suggestions"][0]["code"].startswith("d15")
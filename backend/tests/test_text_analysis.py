@@ -0,0 +1,61 @@
+"""
+Recall and calibration of analyze_texts on labelled school notes
+"""
+
+import statistics
+
+import pytest
+
+from backend.semantic_mapper import SemanticMappingEngine
+from backend.text_analysis import analyze_texts
+
+# (note, ICF codes a reviewer would accept; descendants count as correct)
+LABELLED = [
+    ("Eleven sover dåligt och är trött i skolan.", {"b134", "b130"}),
+    ("Somnar sent och har svårt att vakna på morgonen.", {"b134"}),
+    ("Har svårt att koncentrera sig på lektionerna.", {"b140", "d160"}),
+    ("Blir lätt distraherad och tappar fokus.", {"b140", "d160"}),
+    ("Eleven har svårt med läsning och läsförståelse.", {"d140", "d166"}),
+    ("Svårt att skriva för hand.", {"d145", "d170"}),
+    ("Har svårt att räkna.", {"d150", "d172"}),
+    ("Känner oro inför prov.", {"b152"}),
+    ("Är ofta orolig och ängslig.", {"b152"}),
+    ("Har inga vänner och är ensam på rasterna.", {"d750"}),
+]
+
+TOP = 5
+
+
+def _correct(code, expected):
+    return any(code.startswith(label) or label.startswith(code) for label in expected)
+
+
+@pytest.fixture(scope="module")
+def suggestions():
+    results = analyze_texts(SemanticMappingEngine(), [note for note, _ in LABELLED])
+    return [result["icf_suggestions"][:TOP] for result in results]
+
+
+def test_expected_code_in_top_suggestions(suggestions):
+    for (note, expected), found in zip(LABELLED, suggestions):
+        assert any(_correct(item["code"], expected) for item in found), note
+
+
+def test_best_suggestion_is_correct(suggestions):
+    for (note, expected), found in zip(LABELLED, suggestions):
+        assert _correct(found[0]["code"], expected), note
+
+
+def test_confidence_separates_correct_suggestions(suggestions):
+    scored = [
+        (item["confidence"], _correct(item["code"], expected))
+        for (_, expected), found in zip(LABELLED, suggestions)
+        for item in found
+    ]
+    right = [confidence for confidence, correct in scored if correct]
+    wrong = [confidence for confidence, correct in scored if not correct]
+    assert statistics.mean(right) > 2 * statistics.mean(wrong)
+    # Calibration: confident suggestions are right at least as often as claimed
+    confident = [correct for confidence, correct in scored if confidence >= 0.5]
+    claimed = statistics.mean(confidence for confidence, _ in scored if confidence >= 0.5)
+    assert confident and statistics.mean(confident) >= claimed
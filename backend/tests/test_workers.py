@@ -0,0 +1,26 @@
+"""
+Worker-side engine lifecycle (task wrapper called in-process)
+"""
+
+import pytest
+
+from backend import workers
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    # Start from a freshly warmed worker without touching the real one
+    monkeypatch.setattr(workers, "_engine", workers.SemanticMappingEngine())
+    monkeypatch.setattr(workers, "_engine_version", "v1")
+
+
+def test_engine_is_kept_while_the_version_matches(worker):
+    engine = workers._engine
+    assert workers._run_task("v1", workers.worker_engine) is engine
+
+
+def test_engine_is_rebuilt_after_a_reload(worker):
+    engine = workers._engine
+    rebuilt = workers._run_task("v2", workers.worker_engine)
+    assert rebuilt is not engine
+    assert workers._run_task("v2", workers.worker_engine) is rebuilt
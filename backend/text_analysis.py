@@ -0,0 +1,202 @@
+"""
+Text Analysis
+Analyzer behind /api/v1/ai/analyze-text: suggests ICF codes for free text
+and maps them to BBIC domains.
+
+Suggestions come from two sources:
+- the TF-IDF classifier (text_classifier), which ranks every ICF code and
+  gives each suggestion a calibrated confidence;
+- a keyword lexicon built from the terminology (ICF titles, alternative
+  titles and "Innefattar" inclusion terms, KSI target titles) plus the
+  curated school synonyms below, compiled once into a KeywordAutomaton.
+  Keyword hits are always suggested and report where in the text they are.
+A keyword hit is independent evidence for its code: its per-source
+confidence is combined with the classifier's (noisy-OR), so a hit ranks
+above codes the classifier merely finds similar. Without numpy (no
+classifier) keyword hits keep their per-source confidences.
+"""
+
+import re
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .keyword_automaton import KeywordAutomaton
+from .semantic_mapper import SemanticMappingEngine
+from .text_classifier import get_classifier, np
+
+
+# Curated school wording and word stems (matched as prefixes: "läs" →
+# "läsning"), for what pupils and staff write rather than ICF titles
+KEYWORDS = {
+    "koncentr": ("b140", "d160"),
+    "sov": ("b134",),
+    "sömn": ("b134",),
+    "somn": ("b134",),
+    "trött": ("b130",),
+    "läs": ("d140",),
+    "skriv": ("d145",),
+    "räkn": ("d150",),
+    "social": ("d710",),
+    "oro": ("b152",),
+    "orolig": ("b152",),
+    "ängsl": ("b152",),
+    "ensam": ("d750",),
+    "kompis": ("d750",),
+    "vänn": ("d750",),
+}
+
+# Classifier suggestions per text, and the least confidence worth showing
+CLASSIFIER_TOP_K = 5
+CLASSIFIER_MIN_CONFIDENCE = 0.05
+
+# Confidence per lexicon source when the classifier is unavailable
+TERM_CONFIDENCE = {
+    "title": 0.8,
+    "alt_title": 0.8,
+    "ksi_title": 0.75,
+    "inclusion": 0.7,
+    "synonym": 0.65,
+}
+
+MIN_TERM_LENGTH = 4
+
+_INCLUSION_SPLIT = re.compile(r"[;,]")
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+|\n+")
+
+
+def _sentences(text: str) -> List[str]:
+    """Sentences of a text (at least one, possibly empty)"""
+    return [part for part in _SENTENCE_END.split(text) if part.strip()] or [text]
+
+
+def _lexicon(engine: SemanticMappingEngine) -> Iterator[Tuple[str, Tuple[str, str], bool]]:
+    """(pattern, (ICF code, source), whole_word) for every lexicon entry"""
+    store = engine.icf_database
+    for row, code in enumerate(store.codes):
+        if "-" in code:
+            continue  # Chapter and block rows are too broad to suggest
+        title = store.titles[row]
+        if "specificera" in title:
+            continue  # "Andra specificerade ..." / "... ospecificerade" residual codes
+        for term in (title, title[4:] if title.lower().startswith("att ") else ""):
+            if len(term) >= MIN_TERM_LENGTH:
+                yield term, (code, "title"), True
+        if len(store.alt_titles[row]) >= MIN_TERM_LENGTH:
+            yield store.alt_titles[row], (code, "alt_title"), True
+        for phrase in _INCLUSION_SPLIT.split(store.inclusions[row]):
+            phrase = phrase.strip()
+            if len(phrase) >= MIN_TERM_LENGTH:
+                yield phrase, (code, "inclusion"), True
+
+    # KSI targets that point at exactly one ICF code
+    for ksi_code, title in engine.ksi_titles.items():
+        icf_codes = engine.ksi_to_icf_map.get(ksi_code, [])
+        if "." not in ksi_code and len(icf_codes) == 1 and len(title) >= MIN_TERM_LENGTH:
+            yield title, (icf_codes[0], "ksi_title"), True
+
+    for keyword, codes in KEYWORDS.items():
+        for code in codes:
+            yield keyword, (code, "synonym"), False
+
+
+def build_keyword_automaton(engine: SemanticMappingEngine) -> KeywordAutomaton:
+    return KeywordAutomaton(_lexicon(engine))
+
+
+_automaton: Optional[KeywordAutomaton] = None
+_automaton_engine: Optional[SemanticMappingEngine] = None
+
+
+def get_keyword_automaton(engine: SemanticMappingEngine) -> KeywordAutomaton:
+    """Automaton for engine's terminology, compiled on first use"""
+    global _automaton, _automaton_engine
+    if _automaton is None or _automaton_engine is not engine:
+        _automaton = build_keyword_automaton(engine)
+        _automaton_engine = engine
+    return _automaton
+
+
+def _suggestion(engine: SemanticMappingEngine, code: str, confidence: float, keyword: bool) -> Dict[str, Any]:
+    return {
+        "code": code,
+        "description": engine.icf_database.title(code) or code,
+        "confidence": confidence,
+        "category": "rule-based" if keyword else "classifier",
+        "reasoning": "Keyword match" if keyword else "Character n-gram similarity",
+        "matched_terms": [],
+        "spans": [],
+    }
+
+
+def blend_confidence(classifier: float, keyword: float) -> float:
+    """Noisy-OR of a classifier confidence and a keyword hit's confidence"""
+    return 1.0 - (1.0 - classifier) * (1.0 - keyword)
+
+
+def analyze_texts(engine: SemanticMappingEngine, texts: Sequence[str]) -> List[Dict[str, Any]]:
+    """Suggestions for several texts (classified as one batch)"""
+    automaton = get_keyword_automaton(engine)
+    classifier = get_classifier()
+    if classifier is not None:
+        # Notes often cover several topics: score each sentence and keep
+        # every code's best sentence
+        sentences: List[str] = []
+        starts: List[int] = []
+        for text in texts:
+            starts.append(len(sentences))
+            sentences.extend(_sentences(text))
+        if texts:
+            confidences = np.maximum.reduceat(classifier.confidences(sentences), starts, axis=0)
+            ranked = classifier.rank(confidences, CLASSIFIER_TOP_K, CLASSIFIER_MIN_CONFIDENCE)
+
+    results = []
+    for row, text in enumerate(texts):
+        matches: List[Dict[str, Any]] = []
+        by_code: Dict[str, Dict[str, Any]] = {}
+        for match in automaton.find(text):
+            span = [match.start, match.end]
+            matched = text[match.start : match.end]
+            for code, source in automaton.values[match.pattern_id]:
+                matches.append(
+                    {"start": match.start, "end": match.end, "text": matched, "code": code}
+                )
+                base = 0.0
+                if classifier is not None and code in classifier.code_index:
+                    base = float(confidences[row, classifier.code_index[code]])
+                confidence = round(blend_confidence(base, TERM_CONFIDENCE[source]), 4)
+                suggestion = by_code.get(code)
+                if suggestion is None:
+                    suggestion = by_code[code] = _suggestion(engine, code, confidence, True)
+                else:
+                    suggestion["confidence"] = max(suggestion["confidence"], confidence)
+                if matched not in suggestion["matched_terms"]:
+                    suggestion["matched_terms"].append(matched)
+                if span not in suggestion["spans"]:
+                    suggestion["spans"].append(span)
+
+        if classifier is not None:
+            for code, confidence in ranked[row]:
+                if code not in by_code:
+                    by_code[code] = _suggestion(engine, code, confidence, False)
+
+        suggestions = sorted(by_code.values(), key=lambda s: -s["confidence"])
+        mapped = [engine.icf_to_bbic(suggestion["code"]) for suggestion in suggestions]
+        results.append(
+            {
+                "text": text,
+                "icf_suggestions": suggestions,
+                "bbic_domains": [list(result.target_descriptions) for result in mapped],
+                "matches": matches,
+                "analysis_summary": (
+                    "TF-IDF character n-gram classifier with keyword spans"
+                    if classifier is not None
+                    else "Rule-based analysis for demo purposes"
+                ),
+                "confidence": suggestions[0]["confidence"] if suggestions else 0.0,
+            }
+        )
+    return results
+
+
+def analyze_text(engine: SemanticMappingEngine, text: str) -> Dict[str, Any]:
+    """Suggestions for one text, shaped like the analyze-text response"""
+    return analyze_texts(engine, [text])[0]
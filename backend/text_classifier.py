@@ -0,0 +1,441 @@
+"""
+Text Classifier
+CPU-only ICF classifier for free text: TF-IDF over hashed character
+n-grams (3-5 characters, which copes with Swedish compounds such as
+"koncentrationssvårigheter") and cosine similarity against one centroid
+per ICF code.
+
+Training documents come from icf.tsv (titles, alternative titles,
+descriptions and inclusion terms) and from KSI targets linked to a few
+ICF codes. KSI actions, which the model never sees, are used to fit a
+Platt scaling from cosine score to the probability that a suggested code
+is right (or in the same hierarchy branch), so confidences are calibrated.
+
+Featurisation and scoring are numpy array operations over whole batches:
+n-gram hashes are computed with a rolling hash over all texts at once and
+scores are a sparse (texts x features) by (features x codes) product.
+
+The trained model is stored as a .npz artefact tagged with the
+terminology version; without a matching artefact it is trained at startup
+(about a second). Build with:  python -m backend.text_classifier build
+"""
+
+import argparse
+import logging
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - the analyzer falls back to keywords
+    np = None
+
+from .catalogue_loader import ICFRangeResolver, load_ksi_links
+from .snapshot import load_terminology, terminology_version
+from .terminology import DATA_DIR
+
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+HASH_BITS = 18
+NGRAM_SIZES = (3, 4, 5)
+# KSI targets linked to more ICF codes than this are too broad to train on
+MAX_KSI_LINKS = 3
+# Texts featurised and scored per array operation
+SCORE_BATCH = 256
+# Features used by at least this many codes are scored with a dense product
+DENSE_MIN_CODES = 32
+
+MODEL_PATH = Path(
+    os.getenv("SEMANTIC_BRIDGE_CLASSIFIER", str(DATA_DIR / "icf_classifier.npz"))
+)
+
+_NON_WORD = re.compile(r"[\W\d_]+")
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_ROLL = 1_000_003
+
+
+def normalize(text: str) -> str:
+    """Lower-cased words separated (and padded) by single spaces"""
+    return " " + _NON_WORD.sub(" ", text.lower()).strip() + " "
+
+
+def hashed_ngrams(texts: Sequence[str]) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    (text index, feature, count) for the character n-grams of each text,
+    sorted by text then feature.
+    """
+    normalized = [normalize(text) for text in texts]
+    lengths = np.fromiter((len(text) for text in normalized), dtype=np.int64, count=len(texts))
+    chars = np.frombuffer("".join(normalized).encode("utf-32-le"), dtype=np.uint32)
+    chars = chars.astype(np.uint64)
+    doc = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+
+    keys = []
+    shift = np.uint64(64 - HASH_BITS)
+    with np.errstate(over="ignore"):
+        for size in NGRAM_SIZES:
+            windows = len(chars) - size + 1
+            if windows <= 0:
+                continue
+            rolling = np.full(windows, size, dtype=np.uint64)
+            for offset in range(size):
+                rolling = rolling * np.uint64(_ROLL) + chars[offset : offset + windows]
+            features = (rolling * np.uint64(_HASH_MULTIPLIER)) >> shift
+            # Windows must not run across the end of a text
+            inside = doc[:windows] == doc[size - 1 : size - 1 + windows]
+            keys.append((doc[:windows][inside] << HASH_BITS) | features[inside].astype(np.int64))
+
+    if not keys:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    unique, counts = np.unique(np.concatenate(keys), return_counts=True)
+    return unique >> HASH_BITS, unique & ((1 << HASH_BITS) - 1), counts
+
+
+def _tfidf(
+    doc: "np.ndarray", counts: "np.ndarray", idf_values: "np.ndarray", n_docs: int
+) -> "np.ndarray":
+    """Sublinear TF-IDF values, L2-normalised per document"""
+    values = (1.0 + np.log(counts)) * idf_values
+    norms = np.sqrt(np.bincount(doc, weights=values * values, minlength=n_docs))
+    norms[norms == 0] = 1.0
+    return (values / norms[doc]).astype(np.float32)
+
+
+class TextClassifier:
+    """
+    Trained model: idf per hashed feature, feature -> (code, weight)
+    postings (the transposed centroid matrix in CSR form) and the Platt
+    scaling (a, b) giving confidence = 1 / (1 + exp(-(a * cosine + b))).
+    """
+
+    def __init__(
+        self,
+        codes: Sequence[str],
+        idf: "np.ndarray",
+        postings_ptr: "np.ndarray",
+        postings_code: "np.ndarray",
+        postings_weight: "np.ndarray",
+        platt: Tuple[float, float],
+        version: str = "",
+    ):
+        self.codes = list(codes)
+        self.code_index: Dict[str, int] = {code: i for i, code in enumerate(self.codes)}
+        self.idf = idf
+        self.postings_ptr = postings_ptr
+        self.postings_code = postings_code
+        self.postings_weight = postings_weight
+        self.platt = platt
+        self.version = version
+        self._build_dense()
+
+    def _build_dense(self) -> None:
+        """
+        Dense (features x codes) block for common n-grams. Their postings
+        span most codes, so a BLAS product beats gathering them one by one.
+        """
+        used_by = np.diff(self.postings_ptr)
+        dense = np.flatnonzero(used_by >= DENSE_MIN_CODES)
+        self._dense_slot = np.full(len(used_by), -1, dtype=np.int64)
+        self._dense_slot[dense] = np.arange(len(dense))
+        self._dense = np.zeros((len(dense), len(self.codes)), dtype=np.float32)
+        for slot, feature in enumerate(dense):
+            start, end = self.postings_ptr[feature], self.postings_ptr[feature + 1]
+            self._dense[slot, self.postings_code[start:end]] = self.postings_weight[start:end]
+
+    # Scoring
+
+    def vectorize(self, texts: Sequence[str]) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """Sparse TF-IDF rows as (text index, feature, value)"""
+        doc, features, counts = hashed_ngrams(texts)
+        return doc, features, _tfidf(doc, counts, self.idf[features], len(texts))
+
+    def _cosine(self, texts: Sequence[str]) -> "np.ndarray":
+        doc, features, values = self.vectorize(texts)
+        n_codes = len(self.codes)
+
+        # Common features: dense (texts x features) @ (features x codes)
+        slots = self._dense_slot[features]
+        common = slots >= 0
+        rows = np.zeros((len(texts), len(self._dense)), dtype=np.float32)
+        rows[doc[common], slots[common]] = values[common]
+        scores = rows @ self._dense
+
+        # Rare features: gather their (text, code) contributions and sum per pair
+        starts = self.postings_ptr[features]
+        lengths = self.postings_ptr[features + 1] - starts
+        rare = ~common & (lengths > 0)
+        doc, values, starts, lengths = doc[rare], values[rare], starts[rare], lengths[rare]
+        total = int(lengths.sum())
+        first = np.cumsum(lengths) - lengths
+        positions = np.repeat(starts - first, lengths) + np.arange(total)
+        pair = np.repeat(doc, lengths) * n_codes + self.postings_code[positions]
+        contributions = np.repeat(values, lengths) * self.postings_weight[positions]
+        scores += np.bincount(pair, weights=contributions, minlength=len(texts) * n_codes).reshape(
+            len(texts), n_codes
+        ).astype(np.float32)
+        return scores
+
+    def calibrate(self, cosine: "np.ndarray") -> "np.ndarray":
+        a, b = self.platt
+        return 1.0 / (1.0 + np.exp(-(a * cosine + b)))
+
+    def confidences(self, texts: Sequence[str]) -> "np.ndarray":
+        """Calibrated confidence per (text, code), shape (len(texts), len(codes))"""
+        if not texts:
+            return np.zeros((0, len(self.codes)), dtype=np.float32)
+        parts = [
+            self.calibrate(self._cosine(texts[start : start + SCORE_BATCH]))
+            for start in range(0, len(texts), SCORE_BATCH)
+        ]
+        return np.vstack(parts)
+
+    def top_k(
+        self, texts: Sequence[str], k: int = 5, min_confidence: float = 0.0
+    ) -> List[List[Tuple[str, float]]]:
+        """Best k (ICF code, confidence) pairs per text, highest first"""
+        return self.rank(self.confidences(texts), k, min_confidence)
+
+    def rank(
+        self, confidences: "np.ndarray", k: int = 5, min_confidence: float = 0.0
+    ) -> List[List[Tuple[str, float]]]:
+        """Best k (ICF code, confidence) pairs per row of a confidences() matrix"""
+        k = min(k, len(self.codes))
+        best = np.argpartition(-confidences, k - 1, axis=1)[:, :k]
+        ranked = np.take_along_axis(confidences, best, axis=1)
+        order = np.argsort(-ranked, axis=1, kind="stable")
+        best = np.take_along_axis(best, order, axis=1).tolist()
+        ranked = np.take_along_axis(ranked, order, axis=1).tolist()
+        return [
+            [
+                (self.codes[i], round(confidence, 4))
+                for i, confidence in zip(row, row_confidences)
+                if confidence >= min_confidence
+            ]
+            for row, row_confidences in zip(best, ranked)
+        ]
+
+    # Persistence
+
+    def save(self, path: Path = MODEL_PATH) -> None:
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as handle:
+            np.savez_compressed(
+                handle,
+                format_version=np.int64(FORMAT_VERSION),
+                hash_bits=np.int64(HASH_BITS),
+                version=np.str_(self.version),
+                codes=np.array(self.codes),
+                idf=self.idf,
+                postings_ptr=self.postings_ptr,
+                postings_code=self.postings_code,
+                postings_weight=self.postings_weight,
+                platt=np.array(self.platt, dtype=np.float64),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path = MODEL_PATH) -> "TextClassifier":
+        with np.load(path) as data:
+            if int(data["format_version"]) != FORMAT_VERSION or int(data["hash_bits"]) != HASH_BITS:
+                raise ValueError("unsupported classifier format")
+            return cls(
+                codes=[str(code) for code in data["codes"]],
+                idf=data["idf"],
+                postings_ptr=data["postings_ptr"],
+                postings_code=data["postings_code"],
+                postings_weight=data["postings_weight"],
+                platt=(float(data["platt"][0]), float(data["platt"][1])),
+                version=str(data["version"]),
+            )
+
+
+# Training
+
+
+def _split_terms(value: str) -> List[str]:
+    return [term.strip() for term in re.split(r"[;,]", value) if term.strip()]
+
+
+def training_corpus() -> Tuple[Dict[str, List[str]], Dict[str, List[str]], List[Tuple[str, str]]]:
+    """
+    ({ICF code: ICF texts}, {ICF code: KSI target titles},
+    [(calibration text, ICF code)]). Calibration pairs are KSI actions with
+    a single linked ICF code.
+    """
+    icf = load_terminology("icf")
+    documents: Dict[str, List[str]] = {}
+    for code, title, alt_title, description, inclusions in zip(
+        icf["Kod"], icf["Titel"], icf["Alternativ titel"], icf["Beskrivning"], icf["Innefattar"]
+    ):
+        if "-" in code or len(code) < 4 or "specificera" in title:
+            continue  # Components, chapters, blocks and residual "(o)specificerad" codes
+        # Names count twice so short queries match them over descriptions
+        documents[code] = [title, title, alt_title, alt_title, description]
+        documents[code].extend(_split_terms(inclusions))
+
+    links = load_ksi_links(ICFRangeResolver(icf["Kod"]))
+    ksi = load_terminology("ksi")
+    ksi_titles: Dict[str, List[str]] = {}
+    calibration: List[Tuple[str, str]] = []
+    for code, title, description in zip(ksi["Kod"], ksi["Titel"], ksi["Beskrivning"]):
+        icf_codes = [c for c in links.to_icf.get(code, []) if c in documents]
+        if not icf_codes:
+            continue
+        if "." not in code and len(icf_codes) <= MAX_KSI_LINKS:
+            for icf_code in icf_codes:
+                ksi_titles.setdefault(icf_code, []).append(title)
+        elif "." in code and len(icf_codes) == 1:
+            calibration.append((f"{title}. {description}", icf_codes[0]))
+    return documents, ksi_titles, calibration
+
+
+def _fit_platt(scores: "np.ndarray", correct: "np.ndarray", iterations: int = 50) -> Tuple[float, float]:
+    """Logistic regression of correct on score (Newton's method)"""
+    a, b = 1.0, 0.0
+    for _ in range(iterations):
+        p = 1.0 / (1.0 + np.exp(-(a * scores + b)))
+        weight = np.maximum(p * (1 - p), 1e-9)
+        gradient = np.array([np.sum((p - correct) * scores), np.sum(p - correct)])
+        hessian = np.array(
+            [
+                [np.sum(weight * scores * scores), np.sum(weight * scores)],
+                [np.sum(weight * scores), np.sum(weight) + 1e-9],
+            ]
+        )
+        step = np.linalg.solve(hessian, gradient)
+        a, b = a - step[0], b - step[1]
+        if np.abs(step).max() < 1e-6:
+            break
+    return float(a), float(b)
+
+
+def _related(code: str, other: str) -> bool:
+    """Same code, or one is an ancestor of the other"""
+    return code.startswith(other) or other.startswith(code)
+
+
+def _fit(documents: Dict[str, List[str]]) -> TextClassifier:
+    """Centroid model for {ICF code: texts} (uncalibrated)"""
+    codes = sorted(documents)
+    doc, features, counts = hashed_ngrams([" ".join(documents[code]) for code in codes])
+
+    n_docs = len(codes)
+    df = np.bincount(features, minlength=1 << HASH_BITS)
+    idf = (np.log((1.0 + n_docs) / (1.0 + df)) + 1.0).astype(np.float32)
+    idf[df == 0] = 0.0
+    values = _tfidf(doc, counts, idf[features], n_docs)
+
+    # Transpose the centroid matrix: postings grouped by feature
+    order = np.argsort(features, kind="stable")
+    postings_ptr = np.zeros((1 << HASH_BITS) + 1, dtype=np.int64)
+    np.cumsum(df, out=postings_ptr[1:])
+    return TextClassifier(
+        codes=codes,
+        idf=idf,
+        postings_ptr=postings_ptr,
+        postings_code=doc[order].astype(np.int32),
+        postings_weight=values[order],
+        platt=(1.0, 0.0),
+        version=terminology_version(),
+    )
+
+
+def _calibrate(
+    model: TextClassifier, calibration: List[Tuple[str, str]], candidates: int
+) -> Tuple[float, float]:
+    """Platt scaling fitted on the top candidates for each labelled text"""
+    scores: List[float] = []
+    correct: List[float] = []
+    for start in range(0, len(calibration), SCORE_BATCH):
+        batch = calibration[start : start + SCORE_BATCH]
+        cosine = model._cosine([text for text, _ in batch])
+        best = np.argsort(-cosine, axis=1)[:, :candidates]
+        for row, (_, label) in enumerate(batch):
+            for i in best[row]:
+                scores.append(float(cosine[row, i]))
+                correct.append(1.0 if _related(model.codes[i], label) else 0.0)
+    return _fit_platt(np.array(scores), np.array(correct))
+
+
+def train(candidates: int = 5) -> TextClassifier:
+    """
+    Fit the classifier from the terminology files. Calibration uses a model
+    trained on ICF texts alone, so the KSI actions it is fitted on share no
+    training text with it; the final model adds the KSI target titles.
+    """
+    documents, ksi_titles, calibration = training_corpus()
+    platt = (1.0, 0.0)
+    if calibration:
+        platt = _calibrate(_fit(documents), calibration, candidates)
+    for code, titles in ksi_titles.items():
+        documents[code].extend(titles)
+    model = _fit(documents)
+    model.platt = platt
+    return model
+
+
+_classifier: Optional[TextClassifier] = None
+_classifier_checked = False
+
+
+def get_classifier() -> Optional[TextClassifier]:
+    """
+    Process-wide classifier: the artefact when it matches the terminology
+    version, otherwise trained in memory. None when numpy is unavailable.
+    """
+    global _classifier, _classifier_checked
+    if not _classifier_checked:
+        _classifier_checked = True
+        if np is None:
+            logger.warning("numpy is not installed, text analysis uses keyword matching only")
+            return None
+        if MODEL_PATH.exists():
+            try:
+                model = TextClassifier.load(MODEL_PATH)
+                if model.version == terminology_version():
+                    _classifier = model
+                else:
+                    logger.warning("Classifier artefact %s is stale, retraining", MODEL_PATH)
+            except (OSError, ValueError, KeyError) as exc:
+                logger.warning("Ignoring classifier artefact %s: %s", MODEL_PATH, exc)
+        if _classifier is None:
+            try:
+                _classifier = train()
+            except (OSError, KeyError) as exc:
+                logger.warning("Text classifier unavailable (%s), using keyword matching", exc)
+    return _classifier
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build or inspect the ICF text classifier")
+    parser.add_argument("command", choices=["build", "info"])
+    parser.add_argument("--output", type=Path, default=MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        started = time.perf_counter()
+        model = train()
+        model.save(args.output)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(
+            f"{len(model.codes)} ICF codes, {len(model.postings_weight)} weights, "
+            f"platt a={model.platt[0]:.3f} b={model.platt[1]:.3f}"
+        )
+        print(f"Wrote {args.output} ({args.output.stat().st_size} bytes) in {elapsed:.0f} ms")
+        return 0
+
+    model = TextClassifier.load(args.output)
+    status = "ok" if model.version == terminology_version() else "stale"
+    print(f"Classifier {args.output}: {len(model.codes)} ICF codes, {status}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
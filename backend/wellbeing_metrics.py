@@ -0,0 +1,267 @@
+"""
+Wellbeing Metrics
+Materialised metrics derived from SHANARRI domain scores (spider charts or
+survey responses) in the profile store. Per student and domain: the latest
+score, the one before it, change_delta, a rolling average over the last
+observations and a risk/protective flag; for the whole school: running
+totals of the same, so cohort means and flag counts are read, not computed.
+
+The metrics follow the store: every committed write recomputes only the
+written students (from their own rows) and moves their contribution in the
+cohort totals, so reads always return precomputed values.
+"""
+
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .profile_store import DOMAIN_COLUMNS, SCORE_TABLES, ProfileStore, get_profile_store
+from .student_columns import store_times
+
+# Observations per domain in the rolling average
+ROLLING_WINDOW = 3
+
+# Flags on the 0-10 domain scale: risk below RISK_BELOW or after a drop of
+# at least DECLINE since the previous score, protective from PROTECTIVE_FROM
+RISK_BELOW = 5.0
+PROTECTIVE_FROM = 7.0
+DECLINE = 1.0
+
+UNSCORED, RISK, NEUTRAL, PROTECTIVE = 0, 1, 2, 3
+FLAG_NAMES = {RISK: "risk", NEUTRAL: "neutral", PROTECTIVE: "protective"}
+
+
+# Values of a student without observations, per metric array
+_EMPTY = {
+    "observations": 0,
+    "latest_time": np.datetime64("NaT"),
+    "latest": np.nan,
+    "previous": np.nan,
+    "rolling": np.nan,
+    "flags": UNSCORED,
+}
+
+
+def derive_metrics(student: np.ndarray, time: np.ndarray, scores: np.ndarray, count: int) -> dict:
+    """
+    Metrics for students 0..count-1 from their score rows (student index,
+    time, domain scores with NaN where not scored). Each domain uses the
+    rows where it was scored, so partial surveys do not hide older scores.
+    """
+    order = np.lexsort((time, student))
+    student, time, scores = student[order], time[order], scores[order]
+    domains = scores.shape[1]
+    latest = np.full((count, domains), np.nan, dtype=np.float32)
+    previous = np.full((count, domains), np.nan, dtype=np.float32)
+    rolling = np.full((count, domains), np.nan, dtype=np.float32)
+
+    latest_time = np.full(count, np.datetime64("NaT"), dtype="datetime64[s]")
+    if len(student):
+        ends = np.flatnonzero(np.append(student[1:] != student[:-1], True))
+        latest_time[student[ends]] = time[ends]
+
+    for d in range(domains):
+        valid = ~np.isnan(scores[:, d])
+        rows, values = student[valid], scores[valid, d]
+        if not len(rows):
+            continue
+        last = np.append(rows[1:] != rows[:-1], True)
+        ends = np.flatnonzero(last)
+        latest[rows[ends], d] = values[ends]
+        before = ends - 1
+        has_before = before >= 0
+        has_before[has_before] = rows[before[has_before]] == rows[ends[has_before]]
+        previous[rows[ends[has_before]], d] = values[before[has_before]]
+        # Distance of each row from its student's last scored row
+        run = np.cumsum(np.append(True, last[:-1])) - 1
+        recent = ends[run] - np.arange(len(rows)) < ROLLING_WINDOW
+        totals = np.bincount(rows[recent], weights=values[recent], minlength=count)
+        counts = np.bincount(rows[recent], minlength=count)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rolling[:, d] = totals / counts
+
+    delta = latest - previous
+    flags = np.where(
+        (latest < RISK_BELOW) | (delta <= -DECLINE),
+        RISK,
+        np.where(latest >= PROTECTIVE_FROM, PROTECTIVE, NEUTRAL),
+    ).astype(np.int8)
+    flags[np.isnan(latest)] = UNSCORED
+    return {
+        "observations": np.bincount(student, minlength=count).astype(np.int32),
+        "latest_time": latest_time,
+        "latest": latest,
+        "previous": previous,
+        "rolling": rolling,
+        "flags": flags,
+    }
+
+
+def _domain_values(values: np.ndarray, digits: int = 3) -> Dict[str, float]:
+    """{domain: value} for the domains with a value"""
+    return {
+        domain: round(value, digits)
+        for domain, value in zip(DOMAIN_COLUMNS, values.tolist())
+        if value == value
+    }
+
+
+class WellbeingMetrics:
+    """Materialised metrics for one score table of a ProfileStore"""
+
+    def __init__(self, store: ProfileStore, kind: str = "spider_charts"):
+        if kind not in SCORE_TABLES:
+            raise ValueError(f"Unknown series kind: {kind}")
+        self.store = store
+        self.kind = kind
+        self._lock = threading.Lock()
+        self.student_ids: List[str] = []
+        self.student_index: Dict[str, int] = {}
+        self.arrays = derive_metrics(
+            np.zeros(0, dtype=np.int32),
+            np.zeros(0, dtype="datetime64[s]"),
+            np.zeros((0, len(DOMAIN_COLUMNS)), dtype=np.float32),
+            0,
+        )
+        # Cohort totals per domain: score sum and count, change_delta sum and
+        # count, risk and protective flags; plus students with observations
+        self._totals = np.zeros((6, len(DOMAIN_COLUMNS)))
+        self._observed = 0
+        self._cohort: Optional[dict] = None
+        # Listen before loading: a write during the load waits for the lock
+        # and then recomputes its students
+        store.add_listener(self._on_change)
+        with self._lock:
+            self._update(None)
+
+    def _on_change(self, table: str, student_ids: set) -> None:
+        if table == self.kind:
+            with self._lock:
+                self._update(sorted(student_ids))
+
+    def _positions(self, student_ids: Sequence[str]) -> np.ndarray:
+        """Position per student id, adding rows for new students"""
+        index = self.student_index
+        positions = np.empty(len(student_ids), dtype=np.int64)
+        for i, student_id in enumerate(student_ids):
+            position = index.get(student_id)
+            if position is None:
+                position = index[student_id] = len(self.student_ids)
+                self.student_ids.append(student_id)
+            positions[i] = position
+        missing = len(self.student_ids) - len(self.arrays["observations"])
+        if missing > 0:
+            # Grow by at least half, so adding students one by one stays cheap
+            missing = max(missing, len(self.student_ids) // 2)
+            for name, values in self.arrays.items():
+                filler = np.full((missing, *values.shape[1:]), _EMPTY[name], dtype=values.dtype)
+                self.arrays[name] = np.concatenate([values, filler])
+        return positions
+
+    def _contribution(self, positions: np.ndarray) -> np.ndarray:
+        latest = self.arrays["latest"][positions].astype(np.float64)
+        delta = latest - self.arrays["previous"][positions]
+        flags = self.arrays["flags"][positions]
+        scored, changed = ~np.isnan(latest), ~np.isnan(delta)
+        return np.stack(
+            [
+                np.where(scored, latest, 0.0).sum(axis=0),
+                scored.sum(axis=0),
+                np.where(changed, delta, 0.0).sum(axis=0),
+                changed.sum(axis=0),
+                (flags == RISK).sum(axis=0),
+                (flags == PROTECTIVE).sum(axis=0),
+            ]
+        )
+
+    def _update(self, student_ids: Optional[List[str]]) -> None:
+        """Recompute the given students (all when None) from the store"""
+        rows = self.store.domain_scores(self.kind, student_ids)
+        if student_ids is None:
+            student_ids = sorted({row[0] for row in rows})
+        positions = self._positions(student_ids)
+        self._totals -= self._contribution(positions)
+        self._observed -= int(np.count_nonzero(self.arrays["observations"][positions]))
+
+        local = {student_id: i for i, student_id in enumerate(student_ids)}
+        derived = derive_metrics(
+            np.array([local[row[0]] for row in rows], dtype=np.int64),
+            store_times([row[1] for row in rows]),
+            np.array([row[2:] for row in rows], dtype=np.float32).reshape(
+                len(rows), len(DOMAIN_COLUMNS)
+            ),
+            len(student_ids),
+        )
+        for name, values in derived.items():
+            self.arrays[name][positions] = values
+
+        self._totals += self._contribution(positions)
+        self._observed += int(np.count_nonzero(derived["observations"]))
+        self._cohort = None
+
+    def student(self, student_id: str) -> Optional[dict]:
+        """A student's metrics, or None without observations"""
+        with self._lock:
+            position = self.student_index.get(student_id)
+            if position is None or not self.arrays["observations"][position]:
+                return None
+            row = {name: values[position].copy() for name, values in self.arrays.items()}
+        flags = row["flags"].tolist()
+        return {
+            "student_id": student_id,
+            "kind": self.kind,
+            "observations": int(row["observations"]),
+            "latest": f"{row['latest_time']}Z",
+            "scores": _domain_values(row["latest"]),
+            "previous_scores": _domain_values(row["previous"]),
+            "change_delta": _domain_values(row["latest"] - row["previous"]),
+            "rolling_average": _domain_values(row["rolling"]),
+            "flags": {
+                domain: FLAG_NAMES[flag]
+                for domain, flag in zip(DOMAIN_COLUMNS, flags)
+                if flag != UNSCORED
+            },
+        }
+
+    def cohort(self) -> dict:
+        """
+        Whole-school aggregates from the students' latest scores: students
+        scored, mean score, mean change_delta and risk/protective counts
+        per domain
+        """
+        with self._lock:
+            if self._cohort is None:
+                totals = self._totals
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    mean = totals[0] / totals[1]
+                    delta = totals[2] / totals[3]
+                self._cohort = {
+                    "kind": self.kind,
+                    "students": self._observed,
+                    "scored": dict(zip(DOMAIN_COLUMNS, totals[1].astype(int).tolist())),
+                    "mean": _domain_values(mean),
+                    "change_delta": _domain_values(delta),
+                    "risk": dict(zip(DOMAIN_COLUMNS, totals[4].astype(int).tolist())),
+                    "protective": dict(zip(DOMAIN_COLUMNS, totals[5].astype(int).tolist())),
+                    "thresholds": {
+                        "risk_below": RISK_BELOW,
+                        "decline": DECLINE,
+                        "protective_from": PROTECTIVE_FROM,
+                    },
+                }
+            return self._cohort
+
+
+_metrics: Dict[str, WellbeingMetrics] = {}
+_metrics_lock = threading.Lock()
+
+
+def get_wellbeing_metrics(kind: str = "spider_charts") -> WellbeingMetrics:
+    """Metrics over the process-wide profile store, materialised on first use"""
+    store = get_profile_store()
+    with _metrics_lock:
+        metrics = _metrics.get(kind)
+        if metrics is None or metrics.store is not store:
+            metrics = _metrics[kind] = WellbeingMetrics(store, kind)
+        return metrics
@@ -0,0 +1,215 @@
+"""
+Wellbeing Time Series
+Columnar, in-memory view of SHANARRI domain scores (spider charts or survey
+responses) from the profile store: one row per (student, timestamp) with
+the eight domain scores as float32 (NaN where a domain was not scored),
+sorted by student and time. Serves per-student timelines with range
+queries and downsampling, and cohort aggregates (mean, percentiles,
+change_delta) per period, all vectorised with numpy.
+
+Like every StudentColumnsView it loads once and then reloads only the
+students written since the previous query.
+"""
+
+import threading
+import warnings
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .profile_store import DOMAIN_COLUMNS, SCORE_TABLES, ProfileStore, get_profile_store
+from .student_columns import StudentColumnsView, store_times
+
+BUCKETS = ("none", "month", "term", "year")
+
+DEFAULT_PERCENTILES = (10, 50, 90)
+
+
+def bucket_keys(times: np.ndarray, bucket: str) -> np.ndarray:
+    """
+    Integer period per timestamp: months or years since 1970, or school
+    terms (two per year: VT January-June, HT July-December)
+    """
+    if bucket == "month":
+        return times.astype("datetime64[M]").astype(np.int64)
+    if bucket == "year":
+        return times.astype("datetime64[Y]").astype(np.int64)
+    if bucket == "term":
+        months = times.astype("datetime64[M]").astype(np.int64)
+        return (months // 12) * 2 + (months % 12 >= 6)
+    raise ValueError(f"Unknown bucket: {bucket}")
+
+
+def bucket_label(key: int, bucket: str) -> str:
+    if bucket == "month":
+        return str(np.datetime64(int(key), "M"))
+    if bucket == "year":
+        return str(1970 + int(key))
+    year, half = divmod(int(key), 2)
+    return f"{1970 + year}-{'HT' if half else 'VT'}"
+
+
+def group_mean(keys: np.ndarray, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Unique keys and the NaN-ignoring mean score per key and domain"""
+    if len(keys) == 0:
+        return keys, np.empty((0, scores.shape[1]), dtype=np.float32)
+    if not np.all(keys[1:] >= keys[:-1]):
+        order = np.argsort(keys, kind="stable")
+        keys, scores = keys[order], scores[order]
+    # Sorted: each group is a run, summed for all domains at once
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    present = ~np.isnan(scores)
+    totals = np.add.reduceat(np.where(present, scores, 0.0), starts, axis=0)
+    counts = np.add.reduceat(present, starts, axis=0, dtype=np.int32)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return keys[starts], (totals / counts).astype(np.float32)
+
+
+def json_column(values: np.ndarray, digits: int = 3) -> List[Optional[float]]:
+    """Rounded floats with NaN as None"""
+    return [None if value != value else round(value, digits) for value in values.tolist()]
+
+
+def domain_columns(matrix: np.ndarray) -> Dict[str, List[Optional[float]]]:
+    """{domain: column} for a (rows x domains) matrix"""
+    return {domain: json_column(matrix[:, i]) for i, domain in enumerate(DOMAIN_COLUMNS)}
+
+
+class SeriesColumns(NamedTuple):
+    """Rows sorted by (student, time); offsets[i]:offsets[i + 1] are student i's"""
+    student: np.ndarray
+    time: np.ndarray
+    scores: np.ndarray
+    offsets: np.ndarray
+
+
+class WellbeingSeries(StudentColumnsView):
+    """Domain scores from one score table of a ProfileStore"""
+
+    Columns = SeriesColumns
+
+    def __init__(self, store: ProfileStore, kind: str = "spider_charts"):
+        if kind not in SCORE_TABLES:
+            raise ValueError(f"Unknown series kind: {kind}")
+        self.kind = self.table = kind
+        super().__init__(store)
+
+    def _fetch(self, student_ids: Optional[List[str]]) -> List[tuple]:
+        return self.store.domain_scores(self.kind, student_ids)
+
+    def _convert(self, rows: List[tuple]) -> Dict[str, np.ndarray]:
+        return {
+            "student": self.student_positions([row[0] for row in rows]),
+            "time": store_times([row[1] for row in rows]),
+            "scores": np.array([row[2:] for row in rows], dtype=np.float32).reshape(
+                len(rows), len(DOMAIN_COLUMNS)
+            ),
+        }
+
+    def student_timeline(
+        self,
+        student_id: str,
+        date_from: Optional[np.datetime64] = None,
+        date_to: Optional[np.datetime64] = None,
+        bucket: str = "none",
+    ) -> Optional[dict]:
+        """
+        One student's scores in [date_from, date_to), as columns per domain;
+        with a bucket, averaged per period. None if the student has no rows.
+        """
+        found = self.student_rows(student_id, date_from, date_to)
+        if found is None:
+            return None
+        columns, rows = found
+        times, scores = columns.time[rows], columns.scores[rows]
+
+        result = {"student_id": student_id, "kind": self.kind, "bucket": bucket}
+        if bucket == "none":
+            result["timestamps"] = [f"{value}Z" for value in times.astype(str)]
+            result["scores"] = domain_columns(scores)
+            return result
+        keys, means = group_mean(bucket_keys(times, bucket), scores)
+        result["periods"] = [bucket_label(key, bucket) for key in keys]
+        result["scores"] = domain_columns(means)
+        return result
+
+    def cohort(
+        self,
+        student_ids: Optional[Sequence[str]] = None,
+        date_from: Optional[np.datetime64] = None,
+        date_to: Optional[np.datetime64] = None,
+        bucket: str = "term",
+        percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    ) -> dict:
+        """
+        Aggregates per period over a cohort (all students when None). Each
+        student first counts once per period (mean of their rows); the
+        period then gets the student count, mean and percentiles per domain,
+        and change_delta: the mean change from each student's previous
+        period with scores.
+        """
+        if bucket == "none":
+            raise ValueError("Cohort aggregates need a bucket")
+        columns = self.refresh()
+        mask = np.ones(len(columns.student), dtype=bool)
+        if student_ids is not None:
+            mask &= np.isin(columns.student, self.known_positions(student_ids))
+        if date_from is not None:
+            mask &= columns.time >= date_from
+        if date_to is not None:
+            mask &= columns.time < date_to
+
+        periods = bucket_keys(columns.time[mask], bucket)
+        students = columns.student[mask].astype(np.int64)
+        # Rows sort by student then period, so one student's periods are adjacent
+        first = periods.min() if len(periods) else 0
+        span = int(periods.max() - first + 1) if len(periods) else 1
+        keys, means = group_mean(students * span + (periods - first), columns.scores[mask])
+        row_student, row_period = np.divmod(keys, span)
+
+        labels, counts = np.unique(row_period, return_counts=True)
+        slot = np.searchsorted(labels, row_period)
+
+        _, period_mean = group_mean(slot, means)
+        # Consecutive rows of one student are consecutive periods with scores
+        same_student = row_student[1:] == row_student[:-1]
+        changed_slots, changed = group_mean(
+            slot[1:][same_student], (means[1:] - means[:-1])[same_student]
+        )
+        deltas = np.full_like(period_mean, np.nan)
+        deltas[changed_slots] = changed
+
+        result = {
+            "kind": self.kind,
+            "bucket": bucket,
+            "periods": [bucket_label(label + first, bucket) for label in labels],
+            "students": counts.tolist(),
+            "mean": domain_columns(period_mean),
+            "change_delta": domain_columns(deltas),
+        }
+        by_slot = np.argsort(slot, kind="stable")
+        bounds = np.concatenate([[0], np.cumsum(counts)])
+        quantiles = np.full((len(percentiles), len(labels), means.shape[1]), np.nan, dtype=np.float32)
+        with warnings.catch_warnings():
+            # Domains nobody scored in a period stay NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            for i in range(len(labels)):
+                rows = means[by_slot[bounds[i] : bounds[i + 1]]]
+                quantiles[:, i, :] = np.nanpercentile(rows, percentiles, axis=0)
+        for p, value in enumerate(percentiles):
+            result[f"p{value:g}"] = domain_columns(quantiles[p])
+        return result
+
+
+_series: Dict[str, WellbeingSeries] = {}
+_series_lock = threading.Lock()
+
+
+def get_wellbeing_series(kind: str = "spider_charts") -> WellbeingSeries:
+    """Series over the process-wide profile store, created on first use"""
+    store = get_profile_store()
+    with _series_lock:
+        series = _series.get(kind)
+        if series is None or series.store is not store:
+            series = _series[kind] = WellbeingSeries(store, kind)
+        return series
@@ -0,0 +1,268 @@
+"""
+Worker Pool
+Runs CPU-heavy engine work (batch mapping, text analysis, intervention
+suggestions) in a process pool so it cannot starve cheap lookups served
+on the event loop.
+
+Admission is bounded: each heavy request holds a slot while it runs, and
+when all slots are taken the request is rejected with PoolSaturated
+(served as 503 + Retry-After) instead of queueing without limit.
+
+Tasks carry the API process's terminology version; a worker whose engine
+was built for another version (the API's engine was reloaded) rebuilds it
+before running the task.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from starlette.concurrency import run_in_threadpool
+
+from .semantic_mapper import SemanticMappingEngine
+from .serialization import dumps, join_array
+from .snapshot import reset_terminology_version, terminology_version
+from .text_analysis import analyze_text, analyze_texts, get_keyword_automaton
+from .text_classifier import get_classifier
+
+
+# Engine used by task functions: built once per worker process, or bound
+# to the API's engine when the pool runs in-process (workers = 0)
+_engine: Optional[SemanticMappingEngine] = None
+# Terminology version of the API process the worker's engine matches
+_engine_version: Optional[str] = None
+
+
+def bind_engine(engine: SemanticMappingEngine) -> None:
+    global _engine
+    _engine = engine
+
+
+def worker_engine() -> SemanticMappingEngine:
+    global _engine
+    if _engine is None:
+        _engine = SemanticMappingEngine()
+    return _engine
+
+
+# Task functions (module level so they can be pickled)
+
+
+def map_batch_chunk(pairs: List[Tuple[str, str]], target_systems: List[str]) -> List[bytes]:
+    """Encoded batch entries ({source_system, source_code, mappings}) for unique pairs"""
+    entries = []
+    for source_system, code, mappings in worker_engine().map_batch(pairs, target_systems):
+        # Splice each result's cached JSON instead of re-encoding payloads
+        head = dumps({"source_system": source_system, "source_code": code})
+        body = b",".join(
+            dumps(target) + b":" + result.json_bytes for target, result in mappings.items()
+        )
+        entries.append(head[:-1] + b',"mappings":{' + body + b"}}")
+    return entries
+
+
+def _warm_worker(version: str) -> None:
+    global _engine_version
+    _engine_version = version
+    get_keyword_automaton(worker_engine())
+    get_classifier()
+
+
+def _run_task(version: str, fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a task function in a worker, first catching up with an engine reload"""
+    global _engine, _engine_version
+    if version != _engine_version:
+        # A new engine object, so the keyword automaton is recompiled too
+        reset_terminology_version()
+        _engine = SemanticMappingEngine()
+        _engine_version = version
+    return fn(*args)
+
+
+def _ready() -> bool:
+    return True
+
+
+def analyze_text_task(text: str) -> Dict[str, Any]:
+    return analyze_text(worker_engine(), text)
+
+
+def analyze_notes_chunk(notes: List[Dict[str, Any]]) -> bytes:
+    """NDJSON lines for a chunk of bulk notes (error entries pass through)"""
+    texts = [note["text"] for note in notes if "error" not in note]
+    results = iter(analyze_texts(worker_engine(), texts))
+    lines = []
+    for note in notes:
+        if "error" in note:
+            lines.append(dumps(note))
+            continue
+        result = next(results)
+        entry = {key: value for key, value in note.items() if key != "text"}
+        entry["icf_suggestions"] = result["icf_suggestions"]
+        entry["bbic_domains"] = result["bbic_domains"]
+        entry["confidence"] = result["confidence"]
+        lines.append(dumps(entry))
+    return b"".join(line + b"\n" for line in lines)
+
+
+def suggest_interventions_task(icf_codes: List[str], context: str) -> bytes:
+    """Encoded suggestion list, spliced from each shared row's cached JSON"""
+    rows = worker_engine().intervention_rows(icf_codes, context)
+    return join_array(row.json_bytes for row in rows)
+
+
+def suggest_interventions_batch_task(students: Dict[str, List[str]], context: str) -> bytes:
+    """Encoded {"suggestions": [...], "students": {id: [index, ...]}}"""
+    suggestions, references = worker_engine().suggest_interventions_batch(students, context)
+    return (
+        b'{"suggestions":'
+        + join_array(row.json_bytes for row in suggestions)
+        + b',"students":'
+        + dumps(references)
+        + b"}"
+    )
+
+
+async def _as_async(items: Union[Iterable[Any], AsyncIterable[Any]]) -> AsyncIterator[Any]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+class PoolSaturated(Exception):
+    """All worker slots are busy; the client should retry later"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Worker pool is saturated")
+        self.retry_after = retry_after
+
+
+class Lease:
+    """One admitted request; release() is idempotent"""
+
+    def __init__(self, pool: "WorkerPool"):
+        self._pool = pool
+        self._held = True
+
+    def release(self) -> None:
+        if self._held:
+            self._held = False
+            self._pool.pending -= 1
+
+
+class WorkerPool:
+    """
+    Process pool with bounded admission.
+    workers = 0 runs tasks in the server's threadpool instead (development,
+    single-core hosts).
+    """
+
+    def __init__(self, workers: int, max_pending: int, retry_after: int = 2):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+
+    @classmethod
+    def from_env(cls) -> "WorkerPool":
+        workers = int(os.getenv("SEMANTIC_BRIDGE_WORKERS", str(os.cpu_count() or 1)))
+        max_pending = int(
+            os.getenv("SEMANTIC_BRIDGE_WORKER_QUEUE", str(max(workers, 1) * 4))
+        )
+        retry_after = int(os.getenv("SEMANTIC_BRIDGE_RETRY_AFTER", "2"))
+        return cls(workers, max_pending, retry_after)
+
+    def start(self) -> None:
+        if self.workers > 0 and self._executor is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context(
+                "forkserver" if "forkserver" in methods else "spawn"
+            )
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_warm_worker,
+                initargs=(terminology_version(),),
+            )
+            # Spawn the workers (and build their engines) now, not on first request
+            self._executor.submit(_ready)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def acquire(self) -> "Lease":
+        """Admit one heavy request or raise PoolSaturated"""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PoolSaturated(self.retry_after)
+        self.pending += 1
+        return Lease(self)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        lease = self.acquire()
+        try:
+            yield
+        finally:
+            lease.release()
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a task function in the pool (call inside slot())"""
+        if self.workers <= 0:
+            return await run_in_threadpool(fn, *args)
+        self.start()
+        future = self._executor.submit(_run_task, terminology_version(), fn, *args)
+        return await asyncio.wrap_future(future)
+
+    async def run_ordered(
+        self,
+        fn: Callable[..., Any],
+        chunks: Union[Iterable[Tuple[Any, ...]], AsyncIterable[Tuple[Any, ...]]],
+    ) -> AsyncIterator[Any]:
+        """
+        Results of fn(*chunk) in chunk order, keeping up to one task per
+        worker in flight so output can be streamed as it is produced.
+        Async chunk sources (e.g. a request body) are only read as far
+        ahead as that window, so memory stays bounded.
+        """
+        window = max(self.workers, 1)
+        in_flight: List["asyncio.Task[Any]"] = []
+        try:
+            async for chunk in _as_async(chunks):
+                in_flight.append(asyncio.ensure_future(self.run(fn, *chunk)))
+                if len(in_flight) >= window:
+                    yield await in_flight.pop(0)
+            while in_flight:
+                yield await in_flight.pop(0)
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+        }
@@ -30,6 +30,12 @@ export interface MappingResult {
   mappings?: Record<string, CodeMapping>;
 }
 
+export interface BatchMappingEntry {
+  source_system: string;
+  source_code: string;
+  mappings: Record<string, MappingResult>;
+}
+
 export interface AIAnalysisRequest {
   text: string;
   context?: string;
@@ -42,6 +48,15 @@ export interface ICFSuggestion {
   confidence: number;
   category: string;
   reasoning: string;
+  matched_terms?: string[];
+  spans?: [number, number][];
+}
+
+export interface TextMatch {
+  start: number;
+  end: number;
+  text: string;
+  code: string;
 }
 
 export interface AIAnalysisResponse {
@@ -49,6 +64,7 @@ export interface AIAnalysisResponse {
   icf_suggestions: ICFSuggestion[];
   ksi_codes: string[];
   bbic_domains: string[];
+  matches?: TextMatch[];
   analysis_summary: string;
   confidence: number;
 }
@@ -168,6 +184,60 @@ class SemanticBridgeAPI {
     return response.json();
   }
 
+  /**
+   * Map IBIC area to ICF codes
+   */
+  async mapIBICtoICF(ibicArea: string): Promise<MappingResult> {
+    const response = await fetch(
+      `${this.baseUrl}/api/v1/mapping/ibic-to-icf/${encodeURIComponent(ibicArea)}`
+    );
+    if (!response.ok) {
+      throw new Error(`IBIC to ICF mapping failed: ${response.statusText}`);
+    }
+    return response.json();
+  }
+
+  /**
+   * Map KVÅ procedure code to ICF codes
+   */
+  async mapKVAtoICF(kvaCode: string): Promise<MappingResult> {
+    const response = await fetch(
+      `${this.baseUrl}/api/v1/mapping/kva-to-icf/${encodeURIComponent(kvaCode)}`
+    );
+    if (!response.ok) {
+      throw new Error(`KVÅ to ICF mapping failed: ${response.statusText}`);
+    }
+    return response.json();
+  }
+
+  /**
+   * Map many codes to several target systems in one request.
+   * Repeated codes are resolved once by the backend.
+   */
+  async mapBatch(
+    items: { source_system?: string; code: string }[],
+    targetSystems: string[] = ['KSI', 'BBIC', 'IBIC', 'KVÅ']
+  ): Promise<BatchMappingEntry[]> {
+    const response = await fetch(`${this.baseUrl}/api/v1/mapping/batch`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ items, target_systems: targetSystems }),
+    });
+    if (!response.ok) {
+      throw new Error(`Batch mapping failed: ${response.statusText}`);
+    }
+    if (response.headers.get('content-type')?.includes('application/x-ndjson')) {
+      const text = await response.text();
+      return text
+        .split('\n')
+        .filter((line) => line.trim())
+        .map((line) => JSON.parse(line) as BatchMappingEntry);
+    }
+    return response.json();
+  }
+
   /**
    * Analyze text and get semantic code suggestions
    */
@@ -222,17 +292,22 @@ class SemanticBridgeAPI {
   }
 
   /**
-   * Get all available ICF codes (with pagination)
+   * Get all available ICF codes (with pagination).
+   * Pass next_cursor from the previous page as cursor to fetch the next one.
    */
   async getICFCodes(
     category?: string,
     limit: number = 100,
-    offset: number = 0
-  ): Promise<{ codes: CodeInfo[]; total: number }> {
+    offset: number = 0,
+    cursor?: string
+  ): Promise<{ codes: CodeInfo[]; total: number; next_cursor: string | null }> {
     let url = `${this.baseUrl}/api/v1/codes/icf?limit=${limit}&offset=${offset}`;
     if (category) {
       url += `&category=${encodeURIComponent(category)}`;
     }
+    if (cursor) {
+      url += `&cursor=${encodeURIComponent(cursor)}`;
+    }
     const response = await fetch(url);
     if (!response.ok) {
       throw new Error(`Failed to fetch ICF codes: ${response.statusText}`);
@@ -256,14 +331,15 @@ class SemanticBridgeAPI {
    */
   async searchCodes(
     query: string,
-    systems: string[] = ['icf', 'ksi', 'bbic']
-  ): Promise<{ system: string; code: string; description: string }[]> {
+    systems: string[] = ['icf', 'ksi', 'bbic'],
+    limit: number = 20
+  ): Promise<{ system: string; code: string; description: string; score: number }[]> {
     const response = await fetch(`${this.baseUrl}/api/v1/codes/search`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
       },
-      body: JSON.stringify({ query, systems }),
+      body: JSON.stringify({ query, systems, limit }),
     });
     if (!response.ok) {
       throw new Error(`Code search failed: ${response.statusText}`);
@@ -271,6 +347,23 @@ class SemanticBridgeAPI {
     return response.json();
   }
 
+  /**
+   * Typo-tolerant prefix autocomplete for codes and titles
+   */
+  async autocompleteCodes(
+    query: string,
+    systems?: string[],
+    limit: number = 10
+  ): Promise<{ system: string; code: string; description: string; distance: number }[]> {
+    const params = new URLSearchParams({ q: query, limit: String(limit) });
+    systems?.forEach((system) => params.append('systems', system));
+    const response = await fetch(`${this.baseUrl}/api/v1/codes/autocomplete?${params}`);
+    if (!response.ok) {
+      throw new Error(`Code autocomplete failed: ${response.statusText}`);
+    }
+    return response.json();
+  }
+
   /**
    * Subscribe to mapping events (Observer pattern)
    */